@@ -4,15 +4,51 @@ Plataforma de IA climática para mapeamento e previsão de ilhas de calor urbana
 """
 from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
-from typing import Dict, List, Optional
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import base64
 import logging
-import io
+import math
+import os
+import time
 
-from app.services.gee_client import get_satellite_data, get_multiple_variables
-from app.services.ai_model import predict_heat_islands, calculate_vulnerability
-from app.services.export_service import export_to_csv, export_to_json, export_to_pdf
-from app.utils.cache import get_cached_data, set_cached_data
+from app.services.gee_client import (
+    get_satellite_data, canonical_request, resolve_date_range
+)
+from app.services.tiling import AreaTooLarge, choose_zoom, fetch_tiled, request_bbox, tile_flight
+from app.services.gee_executor import GEEExecutorSaturated, get_gee_executor
+from app.services.gee_replay import get_gee_replay
+from app.services.ai_model import (
+    predict_heat_islands, forecast_heat_islands, calculate_vulnerability, calculate_vulnerability_batch,
+    resolve_weights
+)
+from app.services.result_store import (
+    ResultNotStored, get_result, save_file_result, save_result, save_result_reference
+)
+from app.services.jobs import JOB_RETENTION, JobQueueFull, get_job_manager
+from app.services.prewarm import Prewarmer, load_watchlist
+from app.services.spatial_join import SPATIAL_JOIN_TOLERANCE_M, vulnerability_layer
+from app.services.interpolation import grid_shape, grid_to_point_set, interpolate, points_bounds
+from app.services.hotspots import (
+    GI_CLASSES, HOTSPOT_ALPHA, HOTSPOT_NEIGHBORS, MORAN_CLASSES, detect_hotspots
+)
+from app.services.timeseries import AGGREGATIONS, TIMESERIES_MAX_YEARS, fetch_time_series, split_windows
+from app.services.export_service import (
+    COLUMNAR_FORMATS, iter_csv, iter_json, iter_columnar, export_to_pdf
+)
+from app.utils.cache import (
+    get_cached_data, set_cached_data, get_cache_stats, refresh_cache_stats, close_cache,
+    get_cached_entry, set_cached_entry, schedule_refresh
+)
+from app.utils.cache_keys import fingerprint, make_cache_key
+from app.utils.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, EXPORT_BYTES, METRICS_ENABLED, STAGE_SECONDS,
+    MetricsMiddleware, get_metrics_registry
+)
+from app.utils.point_set import PointSet, as_point_set, results_to_json
+from app.utils.raster import encode_geotiff, encode_png
+from app.utils.singleflight import SingleFlight
 from app.utils.validators import validate_coordinates, validate_date_range
 
 # Configurar logging
@@ -31,6 +67,34 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
+# Frescor dos dados de satélite no cache: após o TTL soft a entrada é servida
+# como "stale" e atualizada em segundo plano; após o TTL hard ela expira
+SATELLITE_CACHE_SOFT_TTL = int(os.getenv("SATELLITE_CACHE_SOFT_TTL", "3600"))
+SATELLITE_CACHE_HARD_TTL = int(os.getenv("SATELLITE_CACHE_HARD_TTL", "86400"))
+
+# Hotspots: pontos (ou células da grade) por análise e TTL do cache, que
+# acompanha o frescor do resultado de origem
+HOTSPOT_MAX_POINTS = int(os.getenv("HOTSPOT_MAX_POINTS", "500000"))
+HOTSPOT_CACHE_TTL = int(os.getenv("HOTSPOT_CACHE_TTL", str(SATELLITE_CACHE_SOFT_TTL)))
+
+# Máximo de regiões por chamada de vulnerabilidade em lote
+VULNERABILITY_BATCH_MAX_REGIONS = int(os.getenv("VULNERABILITY_BATCH_MAX_REGIONS", "100000"))
+
+# Regiões monitoradas são recalculadas após este tempo (segundos), antes do TTL soft
+PREWARM_REFRESH_AFTER = int(os.getenv("PREWARM_REFRESH_AFTER", str(int(SATELLITE_CACHE_SOFT_TTL * 0.8))))
+
+# Buscas acima deste volume (km² da área x variáveis) não seguram a conexão:
+# fetchData responde 202 com um job e o cliente acompanha pelo jobId
+JOB_SYNC_MAX_WORK = float(os.getenv("JOB_SYNC_MAX_WORK", "2000"))
+
+JOB_TYPES = ("fetch", "predict", "export")
+
+# Requisições idênticas (mesma chave canônica) em andamento compartilham a busca
+fetch_flight = SingleFlight("fetch")
+
+# Série de métrica da conversão dos resultados para a resposta JSON
+SERIALIZATION = STAGE_SECONDS.labels("serialization")
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -40,6 +104,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latência por rota (/metrics); o middleware mais externo, mede também o CORS
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(GEEExecutorSaturated)
+async def gee_saturated_handler(request, exc: GEEExecutorSaturated):
+    """Fila do executor GEE cheia: recusar com 503 em vez de enfileirar"""
+    logger.warning(f"⚠️ {str(exc)}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Serviço GEE sobrecarregado, tente novamente em instantes"},
+        headers={"Retry-After": "5"}
+    )
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Iniciar o pré-aquecimento das regiões monitoradas (se configurado)"""
+    try:
+        prewarmer.set_entries(load_watchlist())
+        prewarmer.start()
+    except Exception as e:
+        logger.error(f"❌ Lista de pré-aquecimento inválida: {str(e)}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Liberar recursos ao encerrar a aplicação"""
+    await prewarmer.stop()
+    get_gee_executor().shutdown()
+    await get_job_manager().shutdown()
+    await close_cache()
+
 
 @app.get("/")
 async def root():
@@ -55,6 +153,8 @@ async def root():
 @app.get("/api/health")
 async def health_check():
     """Endpoint de health check detalhado"""
+    gee_replay = get_gee_replay()
+    await refresh_cache_stats()
     return {
         "status": "healthy",
         "services": {
@@ -62,10 +162,266 @@ async def health_check():
             "gee": "operational",
             "cache": "operational",
             "ai_model": "operational"
+        },
+        "geeExecutor": get_gee_executor().stats(),
+        "geeReplay": gee_replay.stats() if gee_replay else None,
+        "cacheStats": get_cache_stats(),
+        "jobs": get_job_manager().stats(),
+        "prewarm": prewarmer.stats(),
+        # Cada requisição ou par (tile, variável) coalescido é uma busca ao GEE a menos
+        "coalescing": {
+            "requests": fetch_flight.stats(),
+            "tiles": tile_flight.stats()
         }
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Métricas no formato de texto do Prometheus"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desativadas (METRICS_ENABLED)")
+    await refresh_cache_stats()
+    return Response(content=get_metrics_registry().render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/api/solaris/prewarm")
+async def prewarm_status():
+    """Progresso do pré-aquecimento e taxa de acerto nas regiões monitoradas"""
+    return prewarmer.stats()
+
+
+async def load_satellite_data(cache_key: str, request: Dict, refresh: bool = False,
+                              on_progress=None):
+    """
+    Buscar dados (tile a tile) e salvar no cache com TTL soft/hard
+    
+    Requisições idênticas simultâneas aguardam a mesma busca.
+    """
+    async def load():
+        data, tiles = await fetch_tiled(**request, refresh=refresh, on_progress=on_progress)
+        await set_cached_entry(cache_key, data, SATELLITE_CACHE_SOFT_TTL, SATELLITE_CACHE_HARD_TTL)
+        return data, tiles
+    
+    return await fetch_flight.do(cache_key, load)
+
+
+def parse_satellite_request(params: Dict, default_variables: Optional[List[str]] = None) -> Dict:
+    """Validar área, datas e variáveis de uma requisição de dados de satélite"""
+    # Validar coordenadas
+    coords = params.get("coords")
+    bounds = params.get("bounds")
+    
+    if not coords and not bounds:
+        raise HTTPException(status_code=400, detail="Forneça coords ou bounds")
+    
+    # Validar datas
+    start_date = params.get("startDate")
+    end_date = params.get("endDate")
+    
+    if start_date and end_date:
+        # Séries temporais (aggregation) aceitam períodos de vários anos
+        max_days = TIMESERIES_MAX_YEARS * 366 if params.get("aggregation") else 365
+        validate_date_range(start_date, end_date, max_days)
+    
+    # Áreas que não cabem em TILE_MAX_TILES tiles são recusadas antes de
+    # chegar ao GEE (ou à fila de jobs)
+    try:
+        choose_zoom(request_bbox(coords, bounds, params.get("radius")))
+    except AreaTooLarge as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Resolver datas padrão antes de montar a chave (e repassar ao GEE)
+    start_date, end_date = resolve_date_range(start_date, end_date)
+    
+    return {
+        "coords": coords,
+        "bounds": bounds,
+        "radius": params.get("radius"),  # Raio em metros (para círculos)
+        "variables": params.get("variables", default_variables or ["LST", "NDVI"]),
+        "start_date": start_date,
+        "end_date": end_date
+    }
+
+
+def parse_response_format(params: Dict) -> str:
+    """Formato dos pontos na resposta (GeoJSON só é gerado aqui, na borda)"""
+    response_format = params.get("format", "geojson").lower()
+    if response_format not in ("geojson", "columns"):
+        raise HTTPException(status_code=400, detail="Formato não suportado. Use: geojson ou columns")
+    return response_format
+
+
+async def get_satellite_results(request: Dict) -> Dict:
+    """Dados de satélite da requisição: do cache (fresco ou stale) ou do GEE"""
+    cache_key = make_cache_key("satellite", fingerprint(canonical_request(**request)))
+    data, state = await get_cached_entry(cache_key)
+    prewarmer.record_request(cache_key, state)
+    
+    if data is None:
+        data, _ = await load_satellite_data(cache_key, request)
+    elif state == "stale":
+        schedule_refresh(cache_key, lambda: load_satellite_data(cache_key, request, refresh=True))
+    return data
+
+
+def watch_request(params: Dict) -> Tuple[str, Dict]:
+    """Chave de cache e requisição de uma região monitorada (mesma forma de fetchData)"""
+    request = parse_satellite_request(params)
+    return make_cache_key("satellite", fingerprint(canonical_request(**request))), request
+
+
+async def warm_region(cache_key: str, request: Dict):
+    """Recalcular uma região monitorada pelo caminho normal (tiles -> GEE)"""
+    return await load_satellite_data(cache_key, request, refresh=True)
+
+
+prewarmer = Prewarmer([], resolve=watch_request, load=warm_region, refresh_after=PREWARM_REFRESH_AFTER)
+
+
+def register_metrics() -> None:
+    """Métricas lidas dos próprios componentes na coleta (sem contadores duplicados)"""
+    registry = get_metrics_registry()
+    
+    def executor(field):
+        return lambda: get_gee_executor().stats()[field]
+    
+    def cache(field):
+        return lambda: get_cache_stats().get(field)
+    
+    def jobs(field):
+        return lambda: get_job_manager().stats()[field]
+    
+    registry.callback("solaris_gee_executor_running", "Chamadas ao GEE em execução", executor("running"))
+    registry.callback("solaris_gee_executor_queued", "Chamadas ao GEE aguardando uma thread", executor("queued"))
+    registry.callback("solaris_gee_executor_completed_total", "Chamadas ao GEE concluídas no executor",
+                      executor("completed"), kind="counter")
+    registry.callback("solaris_gee_executor_rejected_total", "Chamadas ao GEE recusadas (executor saturado)",
+                      executor("rejected"), kind="counter")
+    
+    registry.callback("solaris_cache_hits_total", "Leituras do cache com acerto", cache("hits"), kind="counter")
+    registry.callback("solaris_cache_misses_total", "Leituras do cache sem acerto", cache("misses"), kind="counter")
+    # No Redis, evicções, bytes e entradas são do servidor (INFO/DBSIZE)
+    registry.callback("solaris_cache_evictions_total", "Entradas removidas pelo orçamento de bytes",
+                      cache("evictions"), kind="counter")
+    registry.callback("solaris_cache_bytes", "Bytes ocupados no cache", cache("bytes"))
+    registry.callback("solaris_cache_entries", "Entradas no cache", cache("entries"))
+    
+    registry.callback("solaris_jobs_running", "Jobs em execução", jobs("running"))
+    registry.callback("solaris_jobs_queued", "Jobs aguardando na fila", jobs("queued"))
+    
+    registry.callback(
+        "solaris_coalesced_total", "Buscas economizadas por coalescência",
+        lambda: {("requests",): fetch_flight.coalesced, ("tiles",): tile_flight.coalesced},
+        kind="counter", labelnames=("flight",)
+    )
+
+
+register_metrics()
+
+
+def request_work(request: Dict) -> float:
+    """Volume estimado de uma busca: área da bbox (km²) x número de variáveis"""
+    bbox = request_bbox(request["coords"], request["bounds"], request["radius"])
+    lat0 = math.radians((bbox['north'] + bbox['south']) / 2)
+    area_km2 = (
+        (bbox['north'] - bbox['south']) * 111.32
+        * (bbox['east'] - bbox['west']) * 111.32 * math.cos(lat0)
+    )
+    return abs(area_km2) * len(request["variables"])
+
+
+def series_work(request: Dict, aggregation: str) -> float:
+    """Volume estimado de uma série: volume de uma janela x número de janelas"""
+    windows = split_windows(request["start_date"], request["end_date"], aggregation)
+    return request_work(request) * len(windows)
+
+
+async def submit_job(job_type: str, handler) -> Dict:
+    """Enfileirar um job (503 se a fila estiver cheia)"""
+    try:
+        return await get_job_manager().submit(job_type, handler)
+    except JobQueueFull as e:
+        logger.warning(f"⚠️ {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Fila de jobs cheia, tente novamente em instantes",
+            headers={"Retry-After": "5"}
+        )
+
+
+def job_accepted(job: Dict) -> JSONResponse:
+    """Resposta 202 de um job enfileirado"""
+    job_id = job["jobId"]
+    return JSONResponse(status_code=202, content={
+        "status": "accepted",
+        "jobId": job_id,
+        "job": job,
+        "statusUrl": f"/api/solaris/jobs/{job_id}",
+        "resultUrl": f"/api/solaris/jobs/{job_id}/result"
+    })
+
+
+def fetch_job(request: Dict, cache_key: str, result_id: str):
+    """Job de busca: mesmo caminho de fetchData, com progresso por variável"""
+    async def run(progress):
+        data, tiles = await load_satellite_data(cache_key, request, on_progress=progress)
+        return {"resultId": result_id, "variables": request["variables"], "tiles": tiles}
+    return run
+
+
+def parse_aggregation(params: Dict) -> Optional[str]:
+    """Agregação de série temporal pedida (None sem série; 400 se inválida)"""
+    aggregation = params.get("aggregation")
+    if aggregation and aggregation not in AGGREGATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Agregação não suportada. Use: {', '.join(AGGREGATIONS)}"
+        )
+    return aggregation or None
+
+
+def series_job(request: Dict, aggregation: str):
+    """Job de série temporal: mesmo caminho de fetchData, com progresso por janela"""
+    async def run(progress):
+        series = await fetch_time_series(**request, aggregation=aggregation, on_progress=progress)
+        result_id = await save_result(series, ttl=JOB_RETENTION)
+        return {
+            "resultId": result_id,
+            "variables": request["variables"],
+            "aggregation": aggregation,
+            "stats": series["stats"]
+        }
+    return run
+
+
+async def resolve_result(params: Dict, default_variables: List[str]) -> Tuple[str, Dict, Optional[Dict]]:
+    """
+    (resultId, dados, bbox da área) a partir de um resultId ou da área pedida
+    
+    Com a área, o resultado é registrado como em fetchData; a bbox é None
+    quando os dados vêm de um resultId.
+    """
+    if params.get("resultId"):
+        return params["resultId"], await load_result_data(params["resultId"]), None
+    
+    request = parse_satellite_request(params, default_variables)
+    digest = fingerprint(canonical_request(**request))
+    await save_result_reference(digest, make_cache_key("satellite", digest), request)
+    data = await get_satellite_results(request)
+    return digest, data, request_bbox(request["coords"], request["bounds"], request["radius"])
+
+
+def variable_points(data: Dict, variable: str) -> PointSet:
+    """PointSet de uma variável do resultado (400 se ausente ou vazia)"""
+    if variable not in data:
+        raise HTTPException(status_code=400, detail=f"Variável ausente no resultado: {variable}")
+    points = as_point_set(data[variable], variable)
+    if points is None or len(points) == 0:
+        raise HTTPException(status_code=400, detail=f"Sem amostras de {variable}")
+    return points
+
+
 @app.post("/api/solaris/fetchData")
 async def fetch_satellite_data(params: Dict = Body(...)):
     """
@@ -76,163 +432,694 @@ async def fetch_satellite_data(params: Dict = Body(...)):
     - variable: Lista de variáveis (LST, NDVI, NDBI, NDWI, POP_DENS, NIGHT_LIGHTS)
     - startDate: Data inicial (YYYY-MM-DD)
     - endDate: Data final (YYYY-MM-DD)
+    - format: geojson (padrão, "features" por variável) ou columns
+      ("columns": {lat, lon, values}, mais compacto)
+    
+    - aggregation: monthly ou annual para uma série temporal (até
+      TIMESERIES_MAX_YEARS anos): a resposta traz um resumo por janela em
+      "windows" e as médias em "series", no formato de /predict; o volume
+      considerado para JOB_SYNC_MAX_WORK é o de uma janela x o número de janelas
+    
+    O campo "source" da resposta indica a origem dos dados: "cache" (entrada
+    fresca), "stale" (entrada vencida servida enquanto é atualizada em
+    segundo plano) ou "gee". Buscas fora do cache acima de JOB_SYNC_MAX_WORK
+    respondem 202 com um jobId (ver /api/solaris/jobs).
     """
     try:
-        # Validar coordenadas
-        coords = params.get("coords")
-        bounds = params.get("bounds")
+        request = parse_satellite_request(params)
+        variables = request["variables"]
         
-        if not coords and not bounds:
-            raise HTTPException(status_code=400, detail="Forneça coords ou bounds")
+        aggregation = parse_aggregation(params)
+        if aggregation:
+            # Séries longas (muitas janelas) vão para a fila de jobs como buscas grandes
+            if series_work(request, aggregation) > JOB_SYNC_MAX_WORK:
+                job = await submit_job("fetch", series_job(request, aggregation))
+                return job_accepted(job)
+            
+            # Cada janela é cacheada à parte: só as janelas novas vão para o GEE
+            series = await fetch_time_series(**request, aggregation=aggregation)
+            return JSONResponse(content={
+                "status": "ok",
+                "data": series,
+                "source": "gee" if series["stats"]["misses"] else "cache",
+                "variables": variables
+            })
         
-        # Validar datas
-        start_date = params.get("startDate")
-        end_date = params.get("endDate")
+        response_format = parse_response_format(params)
         
-        if start_date and end_date:
-            validate_date_range(start_date, end_date)
+        # Verificar cache (chave canônica: independe de ordem e ruído numérico)
+        digest = fingerprint(canonical_request(**request))
+        cache_key = make_cache_key("satellite", digest)
+        cached_data, state = await get_cached_entry(cache_key)
+        prewarmer.record_request(cache_key, state)
         
-        # Variáveis solicitadas
-        variables = params.get("variables", ["LST", "NDVI"])
+        # O resultado pode ser exportado depois pelo resultId, sem reenviar os dados
+        result_id = digest
+        await save_result_reference(result_id, cache_key, request)
         
-        # Verificar cache
-        cache_key = f"satellite_data_{coords or bounds}_{start_date}_{end_date}_{','.join(variables)}"
-        cached_data = await get_cached_data(cache_key)
+        if cached_data is not None:
+            logger.info(f"Cache hit ({state}) para: {cache_key}")
+            if state == "stale":
+                schedule_refresh(cache_key, lambda: load_satellite_data(cache_key, request, refresh=True))
+            started = time.perf_counter()
+            response = JSONResponse(content={
+                "status": "ok",
+                "data": results_to_json(cached_data, response_format),
+                "source": "cache" if state == "fresh" else "stale",
+                "resultId": result_id
+            })
+            SERIALIZATION.observe_since(started)
+            return response
         
-        if cached_data:
-            logger.info(f"Cache hit para: {cache_key}")
-            return JSONResponse(content={"status": "ok", "data": cached_data, "source": "cache"})
+        # Áreas grandes vão para a fila de jobs em vez de segurar a conexão
+        if request_work(request) > JOB_SYNC_MAX_WORK:
+            job = await submit_job("fetch", fetch_job(request, cache_key, result_id))
+            return job_accepted(job)
         
-        # Buscar dados do GEE
+        # Buscar dados tile a tile: só os tiles ainda não vistos vão para o GEE
         logger.info(f"Buscando dados do GEE para: {variables}")
-        radius = params.get("radius")  # Raio em metros (para círculos)
-        
-        data = await get_multiple_variables(
-            coords=coords,
-            bounds=bounds,
-            radius=radius,
-            start_date=start_date,
-            end_date=end_date,
-            variables=variables
-        )
         
-        # Cachear resultado
-        await set_cached_data(cache_key, data, ttl=3600)
+        data, tiles = await load_satellite_data(cache_key, request)
         
-        return JSONResponse(content={
+        started = time.perf_counter()
+        response = JSONResponse(content={
             "status": "ok",
-            "data": data,
-            "source": "gee",
-            "variables": variables
+            "data": results_to_json(data, response_format),
+            "source": "gee" if tiles["misses"] else "cache",
+            "variables": variables,
+            "tiles": tiles,
+            "resultId": result_id
         })
+        SERIALIZATION.observe_since(started)
+        return response
         
+    except (HTTPException, GEEExecutorSaturated):
+        raise
     except Exception as e:
         logger.error(f"Erro ao buscar dados: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar dados: {str(e)}")
 
 
+async def run_prediction(params: Dict) -> Dict:
+    """Vulnerabilidade atual e previsões (corpo da resposta de /predict)"""
+    data = params.get("data")
+    years = int(params.get("years", 5))
+    
+    if not data:
+        raise HTTPException(status_code=400, detail="Forneça dados históricos")
+    
+    # Calcular vulnerabilidade atual
+    vulnerability = calculate_vulnerability(data)
+    
+    response = {"status": "ok", "vulnerability": vulnerability, "years": years}
+    
+    if data.get("series"):
+        # Coeficientes ficam em cache: séries já vistas não são reajustadas
+        forecast = await forecast_heat_islands(
+            data["series"],
+            years=years,
+            weights=params.get("weights"),
+            confidence=float(params.get("confidence", 0.95))
+        )
+        response["predictions"] = forecast.pop("predictions")
+        response["forecast"] = forecast
+    else:
+        # Prever ilhas de calor futuras
+        response["predictions"] = await predict_heat_islands(data, years=years)
+    
+    return response
+
+
 @app.post("/api/solaris/predict")
 async def predict_heat_islands_endpoint(params: Dict = Body(...)):
     """
     Prever ilhas de calor futuras usando modelo de IA
     
     Parâmetros:
-    - data: Dados históricos das variáveis
+    - data: Dados históricos das variáveis; com data.series
+      ({dates, lst, ndvi, ndbi}, um valor por data ou uma linha de células
+      por data) o risco é projetado por tendência + sazonalidade, com
+      intervalos de confiança por região ou célula em "forecast"
     - years: Número de anos para prever (padrão: 5)
+    - confidence: Nível dos intervalos (padrão: 0.95)
+    - weights: Pesos por fator (opcional)
     """
     try:
-        data = params.get("data")
-        years = params.get("years", 5)
+        return JSONResponse(content=await run_prediction(params))
         
-        if not data:
-            raise HTTPException(status_code=400, detail="Forneça dados históricos")
+    except HTTPException:
+        raise
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro ao prever ilhas de calor: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro na predição: {str(e)}")
+
+
+async def load_result_data(result_id: str) -> Dict:
+    """
+    Dados de um resultado salvo no servidor (resultId)
+    
+    Resultados de fetchData apontam para o cache de satélite; se a entrada
+    já expirou, os dados são buscados de novo a partir da requisição.
+    """
+    record = await get_result(result_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Resultado não encontrado ou expirado")
+    
+    if "data" in record:
+        return record["data"]
+    
+    return await get_satellite_results(record["request"])
+
+
+@app.post("/api/solaris/vulnerability/batch")
+async def vulnerability_batch(params: Dict = Body(...)):
+    """
+    Calcular a vulnerabilidade de várias regiões (ex.: setores censitários)
+    
+    Parâmetros:
+    - variables: {lst, ndvi, ndbi, ndwi, popDens} com arrays alinhados do
+      valor médio de cada região (null quando a região não tem a variável)
+    - ids: Identificadores das regiões, na mesma ordem (opcional)
+    - weights: Pesos por fator (opcional; normalizados para somar 1)
+    
+    Resposta colunar: columns.{id, currentRisk, level, <fator>} com um
+    elemento por região.
+    """
+    try:
+        variables = params.get("variables")
+        ids = params.get("ids")
         
-        # Calcular vulnerabilidade atual
-        vulnerability = calculate_vulnerability(data)
+        if not isinstance(variables, dict) or not variables:
+            raise HTTPException(status_code=400, detail="Forneça as variáveis das regiões")
         
-        # Prever ilhas de calor futuras
-        predictions = await predict_heat_islands(data, years=years)
+        # Tamanhos validados antes do cálculo: o limite protege o servidor
+        if not all(isinstance(values, list) for values in variables.values()):
+            raise HTTPException(status_code=400, detail="Cada variável deve ser uma lista de valores por região")
+        lengths = {len(values) for values in variables.values()}
+        if len(lengths) > 1:
+            raise HTTPException(status_code=400, detail="Todas as variáveis devem ter o mesmo número de regiões")
+        count = lengths.pop()
+        
+        if count > VULNERABILITY_BATCH_MAX_REGIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Máximo de {VULNERABILITY_BATCH_MAX_REGIONS} regiões por chamada"
+            )
+        if ids is not None and (not isinstance(ids, list) or len(ids) != count):
+            raise HTTPException(status_code=400, detail="ids deve ser uma lista com um elemento por região")
+        
+        result = calculate_vulnerability_batch(variables, params.get("weights"))
+        
+        columns = {"id": ids if ids is not None else list(range(result["count"]))}
+        columns["currentRisk"] = result["currentRisk"]
+        columns["level"] = result["level"]
+        columns.update(result["factors"])
         
         return JSONResponse(content={
             "status": "ok",
-            "vulnerability": vulnerability,
-            "predictions": predictions,
-            "years": years
+            "count": result["count"],
+            "weights": resolve_weights(params.get("weights")),
+            "columns": columns
         })
         
+    except HTTPException:
+        raise
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Erro ao prever ilhas de calor: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erro na predição: {str(e)}")
+        logger.error(f"Erro ao calcular vulnerabilidade em lote: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro no cálculo: {str(e)}")
+
+
+@app.post("/api/solaris/vulnerability/map")
+async def vulnerability_map(params: Dict = Body(...)):
+    """
+    Camada de risco de calor por ponto
+    
+    As amostras das variáveis (tiradas em pontos diferentes) são alinhadas
+    por vizinho mais próximo e a vulnerabilidade é calculada ponto a ponto.
+    
+    Parâmetros:
+    - resultId: Resultado de fetchData, ou a mesma área/datas/variáveis de
+      fetchData (variáveis padrão: LST, NDVI, NDBI)
+    - tolerance: Distância máxima em metros para parear amostras
+    - baseVariable: Variável cujos pontos formam a camada (padrão: LST)
+    - weights: Pesos por fator (opcional)
+    - format: geojson ou columns
+    
+    A camada também fica salva no servidor: o resultId da resposta pode ser
+    usado na exportação.
+    """
+    try:
+        response_format = parse_response_format(params)
+        tolerance = float(params.get("tolerance", SPATIAL_JOIN_TOLERANCE_M))
+        if tolerance <= 0:
+            raise HTTPException(status_code=400, detail="tolerance deve ser positivo")
+        
+        _, data, _ = await resolve_result(params, ["LST", "NDVI", "NDBI"])
+        
+        # Junção e cálculo são CPU-bound: fora do event loop
+        points, matched = await asyncio.to_thread(
+            vulnerability_layer,
+            data,
+            weights=params.get("weights"),
+            base_variable=params.get("baseVariable"),
+            tolerance_m=tolerance
+        )
+        layer = {
+            "RISK": {
+                "variable": "RISK",
+                "unit": "0-100",
+                "source": f"spatial join ({points.meta.get('base')})",
+                "points": points,
+                "count": len(points)
+            }
+        }
+        try:
+            result_id = await save_result(layer)
+        except ResultNotStored as e:
+            # A camada é respondida mesmo assim, só não pode ser exportada por ID
+            logger.warning(f"⚠️ {str(e)}")
+            result_id = None
+        
+        return JSONResponse(content={
+            "status": "ok",
+            "data": results_to_json(layer, response_format),
+            "matched": matched,
+            "toleranceM": tolerance,
+            "resultId": result_id
+        })
+        
+    except (HTTPException, GEEExecutorSaturated):
+        raise
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro ao montar camada de risco: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro na camada de risco: {str(e)}")
+
+
+@app.post("/api/solaris/interpolate")
+async def interpolate_surface(params: Dict = Body(...)):
+    """
+    Superfície contínua de uma variável em grade regular
+    
+    Parâmetros:
+    - resultId: Resultado de fetchData, ou a mesma área/datas de fetchData
+    - variable: Variável a interpolar (padrão: LST)
+    - method: idw (padrão) ou kriging (krigagem ordinária, mais lenta)
+    - resolution: Metros por célula, ou width/height em células
+    - neighbors: Amostras usadas por célula; power: expoente do IDW
+    - format: array (float32 em base64), png ou geotiff
+    - vmin/vmax: Faixa de valores da rampa de cores do PNG (opcional)
+    
+    A grade cobre a área pedida (ou a extensão das amostras, com resultId);
+    a linha 0 é a borda norte.
+    """
+    try:
+        variable = params.get("variable", "LST")
+        output_format = params.get("format", "array").lower()
+        if output_format not in ("array", "png", "geotiff"):
+            raise HTTPException(status_code=400, detail="Formato não suportado. Use: array, png ou geotiff")
+        
+        _, data, bounds = await resolve_result(params, [variable])
+        points = variable_points(data, variable)
+        bounds = bounds or points_bounds(points)
+        shape = grid_shape(bounds, params.get("resolution"), params.get("width"), params.get("height"))
+        
+        # Interpolação e codificação são CPU-bound: fora do event loop
+        grid, meta = await asyncio.to_thread(
+            interpolate, points, variable, bounds, shape,
+            method=params.get("method", "idw"),
+            **{k: params[k] for k in ("neighbors", "power") if params.get(k) is not None}
+        )
+        
+        height, width = shape
+        headers = {
+            "X-Grid-Bounds": f"{bounds['west']},{bounds['south']},{bounds['east']},{bounds['north']}",
+            "X-Grid-Size": f"{width}x{height}",
+            "Access-Control-Expose-Headers": "X-Grid-Bounds, X-Grid-Size, Content-Disposition"
+        }
+        
+        if output_format == "png":
+            content = await asyncio.to_thread(encode_png, grid, params.get("vmin"), params.get("vmax"))
+            return Response(content=content, media_type="image/png", headers=headers)
+        
+        if output_format == "geotiff":
+            content = await asyncio.to_thread(encode_geotiff, grid, bounds)
+            headers["Content-Disposition"] = f"attachment; filename=solaris_{variable.lower()}.tif"
+            return Response(content=content, media_type="image/tiff", headers=headers)
+        
+        return JSONResponse(content={
+            "status": "ok",
+            "variable": variable,
+            "width": width,
+            "height": height,
+            "bounds": bounds,
+            "dtype": "float32",
+            "data": base64.b64encode(grid.astype("<f4").tobytes()).decode("ascii"),
+            **meta
+        })
+        
+    except (HTTPException, GEEExecutorSaturated):
+        raise
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro na interpolação: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro na interpolação: {str(e)}")
+
+
+@app.post("/api/solaris/hotspots")
+async def hotspots(params: Dict = Body(...)):
+    """
+    Hotspots estatísticos (Getis-Ord Gi* e Moran local) de uma variável
+    
+    Parâmetros:
+    - resultId: Resultado de fetchData, ou a mesma área/datas de fetchData
+    - variable: Variável analisada (padrão: LST)
+    - source: points (amostras, padrão) ou grid (grade interpolada; aceita
+      resolution/width/height como em /interpolate)
+    - distance: Banda de distância em metros para os pesos espaciais; sem
+      ela, os `neighbors` vizinhos mais próximos (padrão: 8)
+    - alpha: Nível de significância das classes de Moran (padrão: 0.05)
+    - format: geojson ou columns
+    
+    Cada ponto recebe GI_Z, GI_CLASS, MORAN_I, MORAN_Z e MORAN_CLASS (os
+    códigos das classes estão em "classes"). O resultado fica em cache junto
+    ao resultado de origem.
+    """
+    try:
+        variable = params.get("variable", "LST")
+        source = params.get("source", "points")
+        response_format = parse_response_format(params)
+        if source not in ("points", "grid"):
+            raise HTTPException(status_code=400, detail="source deve ser points ou grid")
+        
+        options = {
+            "distance_m": float(params["distance"]) if params.get("distance") is not None else None,
+            "neighbors": int(params.get("neighbors", HOTSPOT_NEIGHBORS)),
+            "alpha": float(params.get("alpha", HOTSPOT_ALPHA))
+        }
+        if options["distance_m"] is not None and options["distance_m"] <= 0:
+            raise HTTPException(status_code=400, detail="distance deve ser positivo")
+        if options["neighbors"] < 1:
+            raise HTTPException(status_code=400, detail="neighbors deve ser positivo")
+        
+        result_id, data, bounds = await resolve_result(params, [variable])
+        
+        grid_params = {k: params.get(k) for k in ("resolution", "width", "height", "method")} if source == "grid" else {}
+        cache_key = make_cache_key("hotspots", fingerprint({
+            "resultId": result_id, "variable": variable, "source": source, **options, **grid_params
+        }))
+        cached = await get_cached_data(cache_key)
+        
+        if cached is not None:
+            points, summary = cached["points"], cached["summary"]
+        else:
+            points = variable_points(data, variable)
+            
+            if source == "grid":
+                bounds = bounds or points_bounds(points)
+                shape = grid_shape(bounds, params.get("resolution"), params.get("width"), params.get("height"))
+                if shape[0] * shape[1] > HOTSPOT_MAX_POINTS:
+                    raise HTTPException(status_code=400, detail=f"Máximo de {HOTSPOT_MAX_POINTS} células")
+                grid, _ = await asyncio.to_thread(
+                    interpolate, points, variable, bounds, shape, method=params.get("method", "idw")
+                )
+                points = grid_to_point_set(grid, bounds, variable)
+            elif len(points) > HOTSPOT_MAX_POINTS:
+                raise HTTPException(status_code=400, detail=f"Máximo de {HOTSPOT_MAX_POINTS} pontos")
+            
+            # Pesos e estatísticas são CPU-bound: fora do event loop
+            points, summary = await asyncio.to_thread(detect_hotspots, points, variable, **options)
+            await set_cached_data(cache_key, {"points": points, "summary": summary}, ttl=HOTSPOT_CACHE_TTL)
+        
+        layer = {
+            "HOTSPOTS": {
+                "variable": variable,
+                "source": source,
+                "points": points,
+                "count": len(points)
+            }
+        }
+        
+        return JSONResponse(content={
+            "status": "ok",
+            "data": results_to_json(layer, response_format),
+            "summary": summary,
+            "classes": {
+                "gi": {str(code): name for code, name in GI_CLASSES.items()},
+                "moran": {str(code): name for code, name in MORAN_CLASSES.items()}
+            },
+            "cached": cached is not None,
+            "resultId": result_id
+        })
+        
+    except (HTTPException, GEEExecutorSaturated):
+        raise
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro na detecção de hotspots: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro nos hotspots: {str(e)}")
+
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "json": "application/json", "pdf": "application/pdf", **COLUMNAR_FORMATS}
+
+
+def count_export_bytes(chunks, export_format: str):
+    """Repassar os blocos somando o tamanho do arquivo (métrica ao terminar)"""
+    size = 0
+    try:
+        for chunk in chunks:
+            # Texto ASCII (quase sempre): tamanho sem codificar de novo
+            if isinstance(chunk, str) and not chunk.isascii():
+                size += len(chunk.encode("utf-8"))
+            else:
+                size += len(chunk)
+            yield chunk
+    finally:
+        EXPORT_BYTES.labels(export_format).observe(size)
+
+
+def export_stream(data: Dict, export_format: str, filename: str):
+    """(gerador de blocos, media type) do arquivo exportado"""
+    if export_format == "csv":
+        chunks = iter_csv(data)
+    
+    elif export_format == "json":
+        chunks = iter_json(data)
+    
+    elif export_format in COLUMNAR_FORMATS:
+        # Colunas (variable, latitude, longitude, value); geoparquet
+        # acrescenta a geometria em WKB. Gerado um row group por vez
+        chunks = iter_columnar(data, export_format)
+    
+    elif export_format == "pdf":
+        chunks = iter([export_to_pdf(data, filename)])
+    
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Formato não suportado. Use: csv, json, parquet, geoparquet, arrow ou pdf"
+        )
+    
+    return count_export_bytes(chunks, export_format), EXPORT_MEDIA_TYPES[export_format]
+
+
+def attachment_headers(filename: str) -> Dict:
+    return {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Access-Control-Expose-Headers": "Content-Disposition"
+    }
+
+
+def export_job(data: Optional[Dict], result_id: Optional[str], export_format: str, filename: str):
+    """Job de exportação: grava o arquivo em blocos no spool e o registra como resultado"""
+    async def run(progress):
+        source = await load_result_data(result_id) if result_id else data
+        if not source:
+            raise HTTPException(status_code=400, detail="Forneça resultId ou dados para exportar")
+        chunks, media_type = export_stream(source, export_format, filename)
+        stored = await save_file_result(chunks, media_type, filename, ttl=JOB_RETENTION)
+        return {**stored, "filename": filename, "mediaType": media_type}
+    return run
 
 
 @app.post("/api/solaris/export")
 async def export_data(params: Dict = Body(...)):
     """
-    Exportar dados em diferentes formatos (CSV, JSON, PDF)
+    Exportar dados em diferentes formatos
     
     Parâmetros:
-    - data: Dados para exportar
-    - format: csv, json ou pdf
+    - resultId: ID de um resultado do servidor (retornado por fetchData)
+    - data: Dados para exportar (alternativa ao resultId)
+    - format: csv, json, parquet, geoparquet, arrow ou pdf
     - filename: Nome do arquivo (opcional)
     """
     try:
         data = params.get("data")
+        result_id = params.get("resultId")
         export_format = params.get("format", "csv").lower()
         filename = params.get("filename", f"solaris_export.{export_format}")
         
+        if result_id:
+            data = await load_result_data(result_id)
+        
         if not data:
-            raise HTTPException(status_code=400, detail="Forneça dados para exportar")
+            raise HTTPException(status_code=400, detail="Forneça resultId ou dados para exportar")
         
         logger.info(f"📥 Exportando dados no formato: {export_format}")
         
-        if export_format == "csv":
-            content = export_to_csv(data, filename)
-            media_type = "text/csv"
-            
-            # Retornar como download de arquivo
-            return StreamingResponse(
-                io.StringIO(content),
-                media_type=media_type,
-                headers={
-                    "Content-Disposition": f"attachment; filename={filename}",
-                    "Access-Control-Expose-Headers": "Content-Disposition"
-                }
-            )
-            
-        elif export_format == "json":
-            content = export_to_json(data, filename)
-            media_type = "application/json"
-            
-            return StreamingResponse(
-                io.StringIO(content),
-                media_type=media_type,
-                headers={
-                    "Content-Disposition": f"attachment; filename={filename}",
-                    "Access-Control-Expose-Headers": "Content-Disposition"
-                }
-            )
-            
-        elif export_format == "pdf":
-            content = export_to_pdf(data, filename)
-            media_type = "application/pdf"
-            
-            return StreamingResponse(
-                io.BytesIO(content),
-                media_type=media_type,
-                headers={
-                    "Content-Disposition": f"attachment; filename={filename}",
-                    "Access-Control-Expose-Headers": "Content-Disposition"
-                }
-            )
-            
-        else:
-            raise HTTPException(status_code=400, detail="Formato não suportado. Use: csv, json ou pdf")
+        # Retornar como download de arquivo, gerado em blocos
+        chunks, media_type = export_stream(data, export_format, filename)
+        return StreamingResponse(chunks, media_type=media_type, headers=attachment_headers(filename))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Erro ao exportar dados: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro na exportação: {str(e)}")
 
 
+@app.post("/api/solaris/jobs")
+async def create_job(params: Dict = Body(...)):
+    """
+    Enfileirar uma análise longa
+    
+    Parâmetros:
+    - type: fetch, predict ou export
+    - params: Mesmos parâmetros do endpoint síncrono correspondente
+    
+    Responde 202 com o jobId; o estado fica em /api/solaris/jobs/{jobId} e o
+    resultado em /api/solaris/jobs/{jobId}/result, por JOB_RETENTION segundos.
+    """
+    try:
+        job_type = params.get("type")
+        job_params = params.get("params") or {}
+        
+        if job_type not in JOB_TYPES:
+            raise HTTPException(status_code=400, detail=f"Tipo de job não suportado. Use: {', '.join(JOB_TYPES)}")
+        
+        if job_type == "fetch":
+            request = parse_satellite_request(job_params)
+            aggregation = parse_aggregation(job_params)
+            if aggregation:
+                handler = series_job(request, aggregation)
+            else:
+                digest = fingerprint(canonical_request(**request))
+                cache_key = make_cache_key("satellite", digest)
+                await save_result_reference(digest, cache_key, request)
+                handler = fetch_job(request, cache_key, digest)
+        
+        elif job_type == "predict":
+            if not job_params.get("data"):
+                raise HTTPException(status_code=400, detail="Forneça dados históricos")
+            
+            async def handler(progress):
+                return {"resultId": await save_result(await run_prediction(job_params), ttl=JOB_RETENTION)}
+        
+        else:
+            export_format = job_params.get("format", "csv").lower()
+            if export_format not in EXPORT_MEDIA_TYPES:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Formato não suportado. Use: csv, json, parquet, geoparquet, arrow ou pdf"
+                )
+            if not job_params.get("resultId") and not job_params.get("data"):
+                raise HTTPException(status_code=400, detail="Forneça resultId ou dados para exportar")
+            handler = export_job(
+                job_params.get("data"),
+                job_params.get("resultId"),
+                export_format,
+                job_params.get("filename", f"solaris_export.{export_format}")
+            )
+        
+        return job_accepted(await submit_job(job_type, handler))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro ao criar job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao criar job: {str(e)}")
+
+
+@app.get("/api/solaris/jobs/{job_id}")
+async def get_job_status(job_id: str, wait: float = 0):
+    """
+    Estado de um job: queued, running, done ou failed
+    
+    "progress" traz os tiles prontos por variável (jobs de busca). Com
+    wait (segundos, até JOB_LONG_POLL_MAX) a resposta aguarda o job terminar.
+    """
+    job = await get_job_manager().get(job_id, wait=wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado ou expirado")
+    return job
+
+
+@app.get("/api/solaris/jobs/{job_id}/result")
+async def get_job_result(job_id: str, format: str = "geojson"):
+    """
+    Resultado de um job concluído
+    
+    fetch: mesma resposta de fetchData (format: geojson ou columns);
+    predict: mesma resposta de /predict; export: o arquivo gerado.
+    """
+    try:
+        job = await get_job_manager().get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job não encontrado ou expirado")
+        if job["status"] == "failed":
+            raise HTTPException(status_code=409, detail=f"Job falhou: {job['error']}")
+        if job["status"] != "done":
+            raise HTTPException(status_code=409, detail="Job ainda em andamento")
+        
+        result_id = job["result"]["resultId"]
+        
+        if job["type"] == "fetch" and job["result"].get("aggregation"):
+            # Série temporal: mesma resposta de fetchData com aggregation
+            return JSONResponse(content={
+                "status": "ok",
+                "data": await load_result_data(result_id),
+                "source": "job",
+                "variables": job["result"]["variables"]
+            })
+        
+        if job["type"] == "fetch":
+            response_format = parse_response_format({"format": format})
+            data = await load_result_data(result_id)
+            return JSONResponse(content={
+                "status": "ok",
+                "data": results_to_json(data, response_format),
+                "source": "job",
+                "variables": job["result"]["variables"],
+                "tiles": job["result"]["tiles"],
+                "resultId": result_id
+            })
+        
+        record = await load_result_data(result_id)
+        if job["type"] == "predict":
+            return JSONResponse(content=record)
+        
+        if not os.path.exists(record["file"]):
+            raise HTTPException(status_code=404, detail="Arquivo exportado não encontrado ou expirado")
+        return FileResponse(
+            record["file"],
+            media_type=record["mediaType"],
+            headers=attachment_headers(record["filename"])
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro ao ler resultado do job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao ler resultado do job: {str(e)}")
+
+
 @app.get("/api/solaris/variables")
 async def get_available_variables():
     """Retornar lista de variáveis disponíveis"""
@@ -2,10 +2,70 @@
 Modelo de IA para previsão de ilhas de calor
 """
 import numpy as np
-from typing import Dict, List
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
 
+from app.services.forecasting import get_models, parse_series, project
+from app.utils.point_set import values_of
 
-def calculate_vulnerability(data: Dict) -> Dict:
+
+# Pesos padrão de cada fator no risco total (somam 1)
+VULNERABILITY_WEIGHTS = {
+    'temperature': 0.30,
+    'vegetation': 0.25,
+    'construction': 0.20,
+    'water': 0.15,
+    'population': 0.10
+}
+
+# Chave de entrada -> (fator, nome da variável, transformação da média em 0-100)
+# As transformações operam tanto sobre escalares quanto sobre arrays
+VULNERABILITY_FACTORS = {
+    # LST: temperatura alta = maior risco
+    'lst': ('temperature', 'LST', lambda v: np.minimum(100, (v / 45) * 100)),
+    # NDVI: vegetação baixa = maior risco
+    'ndvi': ('vegetation', 'NDVI', lambda v: (1 - v) * 100),
+    # NDBI: construção alta = maior risco
+    'ndbi': ('construction', 'NDBI', lambda v: (v + 0.2) / 1.0 * 100),
+    # NDWI: água baixa = maior risco
+    'ndwi': ('water', 'NDWI', lambda v: (1 - ((v + 0.5) / 1.0)) * 100),
+    # População: densidade alta = maior risco
+    'popDens': ('population', 'POP_DENS', lambda v: np.minimum(100, (v / 10000) * 100)),
+}
+
+
+def resolve_weights(weights: Optional[Dict] = None) -> Dict[str, float]:
+    """
+    Pesos a usar no risco total
+    
+    Pesos informados substituem os padrões fator a fator e o conjunto é
+    normalizado para somar 1. ValueError para fator desconhecido ou peso
+    negativo.
+    """
+    resolved = dict(VULNERABILITY_WEIGHTS)
+    if not weights:
+        return resolved
+    
+    for factor, weight in (weights or {}).items():
+        if factor not in resolved:
+            raise ValueError(f"Fator desconhecido: {factor}")
+        weight = float(weight)
+        if not weight >= 0:
+            raise ValueError(f"Peso inválido para {factor}: {weight}")
+        resolved[factor] = weight
+    
+    total = sum(resolved.values())
+    if total <= 0:
+        raise ValueError("A soma dos pesos deve ser positiva")
+    return {factor: weight / total for factor, weight in resolved.items()}
+
+
+def risk_level(risk):
+    """Nível de risco: high (> 70), medium (> 40) ou low"""
+    return np.where(risk > 70, 'high', np.where(risk > 40, 'medium', 'low'))
+
+
+def calculate_vulnerability(data: Dict, weights: Optional[Dict] = None) -> Dict:
     """
     Calcular vulnerabilidade atual a ilhas de calor
     
@@ -15,57 +75,198 @@ def calculate_vulnerability(data: Dict) -> Dict:
     - Alta construção (NDBI)
     - Baixa água (NDWI)
     - Alta densidade populacional
+    
+    Cada variável pode vir como PointSet, array ou lista [{'value': ...}].
     """
     factors = {}
     
-    # LST: temperatura alta = maior risco
-    if 'lst' in data:
-        lst_values = [p['value'] for p in data['lst']]
-        lst_avg = np.mean(lst_values)
-        factors['temperature'] = min(100, (lst_avg / 45) * 100)
-    
-    # NDVI: vegetação baixa = maior risco
-    if 'ndvi' in data:
-        ndvi_values = [p['value'] for p in data['ndvi']]
-        ndvi_avg = np.mean(ndvi_values)
-        factors['vegetation'] = (1 - ndvi_avg) * 100
-    
-    # NDBI: construção alta = maior risco
-    if 'ndbi' in data:
-        ndbi_values = [p['value'] for p in data['ndbi']]
-        ndbi_avg = np.mean(ndbi_values)
-        factors['construction'] = (ndbi_avg + 0.2) / 1.0 * 100
-    
-    # NDWI: água baixa = maior risco
-    if 'ndwi' in data:
-        ndwi_values = [p['value'] for p in data['ndwi']]
-        ndwi_avg = np.mean(ndwi_values)
-        factors['water'] = (1 - ((ndwi_avg + 0.5) / 1.0)) * 100
-    
-    # População: densidade alta = maior risco
-    if 'popDens' in data:
-        pop_values = [p['value'] for p in data['popDens']]
-        pop_avg = np.mean(pop_values)
-        factors['population'] = min(100, (pop_avg / 10000) * 100)
+    for key, (factor, variable, transform) in VULNERABILITY_FACTORS.items():
+        if key in data:
+            average = float(np.nanmean(values_of(data[key], variable)))
+            factors[factor] = float(transform(average))
     
     # Calcular risco total (média ponderada)
-    weights = {
-        'temperature': 0.30,
-        'vegetation': 0.25,
-        'construction': 0.20,
-        'water': 0.15,
-        'population': 0.10
-    }
-    
     current_risk = sum(
         factors.get(key, 0) * weight
-        for key, weight in weights.items()
+        for key, weight in resolve_weights(weights).items()
     )
     
     return {
         'currentRisk': round(current_risk, 2),
         'factors': {k: round(v, 2) for k, v in factors.items()},
-        'level': 'high' if current_risk > 70 else 'medium' if current_risk > 40 else 'low'
+        'level': str(risk_level(current_risk))
+    }
+
+
+def score_vulnerability(columns: Dict[str, np.ndarray], count: int,
+                        weights: Optional[Dict] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Risco e fatores (arrays) a partir de colunas alinhadas por chave de entrada
+    
+    Base vetorizada do cálculo em lote e da camada de risco por ponto.
+    """
+    resolved = resolve_weights(weights)
+    risk = np.zeros(count)
+    factors = {}
+    
+    for key, column in columns.items():
+        factor, _, transform = VULNERABILITY_FACTORS[key]
+        values = transform(column)
+        factors[factor] = values
+        risk += np.nan_to_num(values, nan=0.0) * resolved[factor]
+    
+    return risk, factors
+
+
+def calculate_vulnerability_batch(variables: Dict[str, Any],
+                                  weights: Optional[Dict] = None) -> Dict:
+    """
+    Calcular a vulnerabilidade de N regiões de uma vez
+    
+    variables mapeia as mesmas chaves de calculate_vulnerability ('lst',
+    'ndvi', ...) para arrays alinhados com o valor médio de cada região
+    (NaN/None quando a região não tem a variável). Fatores e risco são
+    calculados com operações vetorizadas sobre as colunas.
+    
+    Retorna uma tabela colunar: currentRisk, level e uma coluna por fator
+    (None onde faltou o dado, que então não soma ao risco, como no cálculo
+    individual).
+    """
+    unknown = [key for key in variables if key not in VULNERABILITY_FACTORS]
+    if unknown:
+        raise ValueError(f"Variáveis desconhecidas: {', '.join(unknown)}")
+    
+    columns = {
+        key: np.asarray(
+            [np.nan if v is None else v for v in values] if isinstance(values, list) else values,
+            dtype=np.float64
+        )
+        for key, values in variables.items()
+    }
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("Todas as variáveis devem ter o mesmo número de regiões")
+    count = lengths.pop() if lengths else 0
+    
+    risk, factors = score_vulnerability(columns, count, weights)
+    
+    return {
+        'count': count,
+        'currentRisk': np.round(risk, 2).tolist(),
+        'level': risk_level(risk).tolist(),
+        'factors': {
+            factor: [None if v != v else v for v in np.round(values, 2).tolist()]
+            for factor, values in factors.items()
+        }
+    }
+
+
+def _rounded(array: np.ndarray, decimals: int = 2) -> List:
+    """Array -> lista JSON (arredondada, NaN vira None)"""
+    values = np.round(np.asarray(array, dtype=np.float64), decimals).tolist()
+    if values and isinstance(values[0], list):
+        return [[None if v != v else v for v in row] for row in values]
+    return [None if v != v else v for v in values]
+
+
+def _series_key(name: str) -> Optional[str]:
+    """Chave de entrada ('lst', 'ndvi', ...) de uma série, pela chave ou pela banda"""
+    for key, (_, variable, _) in VULNERABILITY_FACTORS.items():
+        if name == key or name.upper() == variable:
+            return key
+    return None
+
+
+async def forecast_heat_islands(series: Dict, years: int = 5, weights: Optional[Dict] = None,
+                                confidence: float = 0.95) -> Dict:
+    """
+    Projetar variáveis e risco a partir de séries históricas
+    
+    series: {"dates": [...], "lst": [...], "ndvi": [...], "ndbi": [...]}
+    com um valor por data (região) ou uma linha de células por data (grade).
+    Cada série recebe tendência robusta + sazonalidade anual
+    (app.services.forecasting); o risco de cada ano projetado usa as mesmas
+    fórmulas de calculate_vulnerability, e o intervalo do risco combina os
+    extremos dos intervalos das variáveis no sentido de cada fator.
+    
+    Retorna anos, projeções por variável e risco (média, inferior, superior)
+    por célula, além da lista "predictions" (média das células).
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("confidence deve estar entre 0 e 1")
+    if years < 1:
+        raise ValueError("years deve ser positivo")
+    
+    dates, arrays = parse_series(series)
+    inputs = {}
+    for name, values in arrays.items():
+        key = _series_key(name)
+        if key is None:
+            raise ValueError(f"Variável desconhecida na série: {name}")
+        inputs[key] = values if values.ndim == 2 else values[:, None]
+    
+    cells = {values.shape[1] for values in inputs.values()}
+    if len(cells) > 1:
+        raise ValueError("Todas as variáveis devem ter o mesmo número de células")
+    cells = cells.pop()
+    
+    models = await get_models(dates, inputs)
+    last_year = max(model["lastYear"] for model in models.values())
+    future = list(range(last_year + 1, last_year + 1 + years))
+    projections = {key: project(model, future, confidence) for key, model in models.items()}
+    
+    # Risco: média e extremos (cada fator no sentido que aumenta/diminui o risco)
+    risk = {}
+    for bound in ("mean", "lower", "upper"):
+        risk[bound] = np.empty((len(future), cells))
+        for i in range(len(future)):
+            columns = {}
+            for key, projection in projections.items():
+                transform = VULNERABILITY_FACTORS[key][2]
+                increasing = transform(1.0) >= transform(0.0)
+                if bound == "mean":
+                    side = "mean"
+                elif bound == "lower":
+                    side = "lower" if increasing else "upper"
+                else:
+                    side = "upper" if increasing else "lower"
+                columns[key] = projection[side][i]
+            risk[bound][i], _ = score_vulnerability(columns, cells, weights)
+    
+    with np.errstate(all="ignore"):
+        average = {bound: np.nanmean(values, axis=1) for bound, values in risk.items()}
+    predictions = [
+        {
+            'year': year,
+            'risk': round(float(average['mean'][i]), 2),
+            'lower': round(float(average['lower'][i]), 2),
+            'upper': round(float(average['upper'][i]), 2),
+            'timeframe': f'Ano {year}',
+            'value': round(float(average['mean'][i]), 2)
+        }
+        for i, year in enumerate(future)
+    ]
+    
+    return {
+        'years': future,
+        'cells': cells,
+        'confidence': confidence,
+        'variables': {
+            VULNERABILITY_FACTORS[key][1]: {
+                bound: _rounded(values[bound], 4) for bound in ("mean", "lower", "upper")
+            }
+            for key, values in projections.items()
+        },
+        'risk': {bound: _rounded(values) for bound, values in risk.items()},
+        'models': {
+            VULNERABILITY_FACTORS[key][1]: {
+                'harmonics': model['harmonics'],
+                # Tendência anual por célula
+                'trend': _rounded(model['coefficients'][:, 1], 4)
+            }
+            for key, model in models.items()
+        },
+        'predictions': predictions
     }
 
 
@@ -73,16 +274,20 @@ async def predict_heat_islands(data: Dict, years: int = 5) -> List[Dict]:
     """
     Prever ilhas de calor futuras
     
-    Modelo simplificado que considera tendências de:
-    - Aumento de temperatura (LST)
-    - Redução de vegetação (NDVI)
-    - Aumento de construção (NDBI)
+    Com séries históricas em data["series"], usa o modelo de tendência e
+    sazonalidade (forecast_heat_islands). Sem elas, projeta o risco atual
+    com uma tendência fixa de ~2% ao ano a partir do ano corrente.
     """
+    if data.get('series'):
+        forecast = await forecast_heat_islands(data['series'], years=years)
+        return forecast['predictions']
+    
     predictions = []
     
     # Calcular vulnerabilidade atual
     current = calculate_vulnerability(data)
     base_risk = current['currentRisk']
+    base_year = date.today().year
     
     # Projetar anos futuros
     for i in range(1, years + 1):
@@ -93,9 +298,9 @@ async def predict_heat_islands(data: Dict, years: int = 5) -> List[Dict]:
         future_risk = min(100, future_risk)
         
         predictions.append({
-            'year': 2024 + i,
+            'year': base_year + i,
             'risk': round(future_risk, 2),
-            'timeframe': f'Ano {2024 + i}',
+            'timeframe': f'Ano {base_year + i}',
             'value': round(future_risk, 2)
         })
     
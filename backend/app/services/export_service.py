@@ -1,42 +1,291 @@
 """
-Serviço de exportação de dados (CSV, JSON, PDF)
+Serviço de exportação de dados (CSV, JSON, Parquet, Arrow, GeoParquet, PDF)
 """
 import json
 import csv
 import io
-from typing import Dict
+import os
+import numpy as np
+from typing import Any, Dict, Iterator
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 
+from app.utils.point_set import VALUE_DECIMALS, PointSet, as_point_set
 
-def export_to_csv(data: Dict, filename: str) -> str:
-    """Exportar dados para CSV"""
-    output = io.StringIO()
-    writer = csv.writer(output)
+# Linhas por bloco nas exportações em streaming
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "10000"))
+# Formatos colunares: linhas por row group / record batch e compressão
+EXPORT_ROW_GROUP_ROWS = int(os.getenv("EXPORT_ROW_GROUP_ROWS", "131072"))
+EXPORT_PARQUET_COMPRESSION = os.getenv("EXPORT_PARQUET_COMPRESSION", "zstd")
+EXPORT_ARROW_COMPRESSION = os.getenv("EXPORT_ARROW_COMPRESSION", "zstd")
+
+# Formatos colunares suportados -> media type
+COLUMNAR_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "geoparquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream"
+}
+
+
+def iter_csv(data: Dict, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[str]:
+    """
+    Gerar o CSV em blocos de até chunk_rows linhas
     
+    A memória fica limitada ao bloco atual, qualquer que seja o número de
+    pontos, e o primeiro byte sai antes do fim da serialização.
+    """
     # Header
-    writer.writerow(['Variable', 'Latitude', 'Longitude', 'Value'])
+    yield 'Variable,Latitude,Longitude,Value\r\n'
     
     # Data
     for variable, points in data.items():
-        if isinstance(points, list):
-            for point in points:
-                writer.writerow([
-                    variable.upper(),
-                    point.get('lat', ''),
-                    point.get('lon', ''),
-                    point.get('value', '')
-                ])
+        point_set = as_point_set(points, variable)
+        if point_set is None:
+            continue
+        
+        name = _csv_field(variable.upper())
+        column = point_set.column(variable)
+        
+        for start in range(0, len(point_set), chunk_rows):
+            end = start + chunk_rows
+            values = np.round(column[start:end].astype(np.float64), VALUE_DECIMALS)
+            # Só números nas linhas: dispensa o escape do módulo csv
+            yield "".join(
+                f"{name},{lat!r},{lon!r},{'' if value != value else repr(value)}\r\n"
+                for lat, lon, value in zip(
+                    point_set.lat[start:end].tolist(),
+                    point_set.lon[start:end].tolist(),
+                    values.tolist()
+                )
+            )
+
+
+def _csv_field(value: str) -> str:
+    output = io.StringIO()
+    csv.writer(output).writerow([value])
+    return output.getvalue().rstrip('\r\n')
+
+
+def export_to_csv(data: Dict, filename: str) -> str:
+    """Exportar dados para CSV"""
+    return "".join(iter_csv(data))
+
+
+def _json_default(obj):
+    # PointSet sai no formato de lista usado pelo cliente
+    if isinstance(obj, PointSet):
+        return obj.to_points()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+def _iter_point_set_json(point_set: PointSet, variable: str, indent: str,
+                         chunk_rows: int) -> Iterator[str]:
+    """Lista [{lat, lon, value}] de um PointSet, em blocos"""
+    if len(point_set) == 0:
+        yield "[]"
+        return
+    
+    column = point_set.column(variable)
+    pad = indent + "  "
+    yield "[\n"
+    
+    for start in range(0, len(point_set), chunk_rows):
+        end = start + chunk_rows
+        values = np.round(column[start:end].astype(np.float64), VALUE_DECIMALS)
+        rows = ",\n".join(
+            f'{pad}{{"lat": {lat!r}, "lon": {lon!r}, "value": {"null" if value != value else repr(value)}}}'
+            for lat, lon, value in zip(
+                point_set.lat[start:end].tolist(),
+                point_set.lon[start:end].tolist(),
+                values.tolist()
+            )
+        )
+        yield rows + (",\n" if end < len(point_set) else "\n")
+    
+    yield indent + "]"
+
+
+def _iter_json_value(value: Any, key: str, indent: str, chunk_rows: int) -> Iterator[str]:
+    if isinstance(value, PointSet):
+        yield from _iter_point_set_json(value, key, indent, chunk_rows)
+    elif isinstance(value, dict) and value:
+        pad = indent + "  "
+        yield "{\n"
+        items = list(value.items())
+        for i, (child_key, child) in enumerate(items):
+            yield f"{pad}{json.dumps(str(child_key), ensure_ascii=False)}: "
+            yield from _iter_json_value(child, key if child_key == "points" else str(child_key), pad, chunk_rows)
+            yield ",\n" if i < len(items) - 1 else "\n"
+        yield indent + "}"
+    else:
+        encoded = json.dumps(value, indent=2, ensure_ascii=False, default=_json_default)
+        yield encoded.replace("\n", "\n" + indent)
+
+
+def iter_json(data: Dict, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[str]:
+    """
+    Gerar o JSON em fragmentos
     
-    return output.getvalue()
+    PointSets são escritos ponto a ponto em blocos de chunk_rows; o resto da
+    estrutura sai com json.dumps (indentado).
+    """
+    yield from _iter_json_value(data, "", "", chunk_rows)
+    yield "\n"
 
 
 def export_to_json(data: Dict, filename: str) -> str:
     """Exportar dados para JSON"""
-    return json.dumps(data, indent=2, ensure_ascii=False)
+    return "".join(iter_json(data))
+
+
+class _ChunkSink:
+    """Destino de escrita do pyarrow que acumula os bytes até serem drenados"""
+    
+    closed = False
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _wkb_points(lon: np.ndarray, lat: np.ndarray, pa):
+    """Coluna WKB (Point, little-endian) montada direto dos arrays"""
+    n = len(lon)
+    records = np.empty(n, dtype=[("order", "u1"), ("type", "<u4"), ("x", "<f8"), ("y", "<f8")])
+    records["order"] = 1
+    records["type"] = 1
+    records["x"] = lon
+    records["y"] = lat
+    offsets = np.arange(0, (n + 1) * records.itemsize, records.itemsize, dtype=np.int32)
+    return pa.Array.from_buffers(
+        pa.binary(), n, [None, pa.py_buffer(offsets), pa.py_buffer(records.tobytes())]
+    )
+
+
+def _columnar_schema(point_sets: Dict[str, PointSet], geometry: bool, pa):
+    fields = [
+        pa.field("variable", pa.dictionary(pa.int32(), pa.string())),
+        pa.field("latitude", pa.float64()),
+        pa.field("longitude", pa.float64()),
+        pa.field("value", pa.float32())
+    ]
+    metadata = None
+    
+    if geometry:
+        fields.append(pa.field("geometry", pa.binary()))
+        column = {"encoding": "WKB", "geometry_types": ["Point"]}
+        non_empty = [ps for ps in point_sets.values() if len(ps)]
+        if non_empty:
+            column["bbox"] = [
+                float(min(ps.lon.min() for ps in non_empty)),
+                float(min(ps.lat.min() for ps in non_empty)),
+                float(max(ps.lon.max() for ps in non_empty)),
+                float(max(ps.lat.max() for ps in non_empty))
+            ]
+        metadata = {"geo": json.dumps({
+            "version": "1.0.0",
+            "primary_column": "geometry",
+            "columns": {"geometry": column}
+        })}
+    
+    return pa.schema(fields, metadata=metadata)
+
+
+def _iter_record_batches(point_sets: Dict[str, PointSet], schema, rows: int, pa):
+    """Record batches em formato longo (variable, latitude, longitude, value)"""
+    names = list(point_sets)
+    dictionary = pa.array([name.upper() for name in names], type=pa.string())
+    geometry = "geometry" in schema.names
+    
+    for code, (variable, point_set) in enumerate(point_sets.items()):
+        column = point_set.column(variable)
+        for start in range(0, len(point_set), rows):
+            end = min(start + rows, len(point_set))
+            lat = point_set.lat[start:end]
+            lon = point_set.lon[start:end]
+            arrays = [
+                pa.DictionaryArray.from_arrays(
+                    pa.array(np.full(end - start, code, dtype=np.int32)), dictionary
+                ),
+                pa.array(lat),
+                pa.array(lon),
+                # NaN vira nulo, como no CSV/JSON
+                pa.array(column[start:end], mask=np.isnan(column[start:end]))
+            ]
+            if geometry:
+                arrays.append(_wkb_points(lon, lat, pa))
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_columnar(data: Dict, export_format: str,
+                  row_group_rows: int = EXPORT_ROW_GROUP_ROWS) -> Iterator[bytes]:
+    """
+    Gerar uma exportação colunar (parquet, geoparquet ou arrow) em blocos
+    
+    Escrita direto das colunas dos PointSets, um row group (ou record batch)
+    por vez: a memória fica limitada a um bloco. O Arrow IPC sai no formato
+    de stream; o Parquet é gerado sequencialmente com o rodapé no fim.
+    
+    pyarrow é importado aqui (dependência só das exportações colunares);
+    a importação e a validação acontecem antes do primeiro byte.
+    """
+    if export_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Formato colunar desconhecido: {export_format}")
+    
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    point_sets = {}
+    for variable, points in data.items():
+        point_set = as_point_set(points, variable)
+        if point_set is not None:
+            point_sets[variable] = point_set
+    
+    schema = _columnar_schema(point_sets, export_format == "geoparquet", pa)
+    
+    def generate():
+        sink = _ChunkSink()
+        batches = _iter_record_batches(point_sets, schema, row_group_rows, pa)
+        
+        if export_format == "arrow":
+            compression = None if EXPORT_ARROW_COMPRESSION == "none" else EXPORT_ARROW_COMPRESSION
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            with pa.ipc.new_stream(sink, schema, options=options) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+                    yield sink.drain()
+        else:
+            compression = None if EXPORT_PARQUET_COMPRESSION == "none" else EXPORT_PARQUET_COMPRESSION
+            with pq.ParquetWriter(sink, schema, compression=compression) as writer:
+                for batch in batches:
+                    writer.write_batch(batch, row_group_size=row_group_rows)
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+        
+        # Rodapé do Parquet / marcador de fim do stream Arrow
+        yield sink.drain()
+    
+    return generate()
 
 
 def export_to_pdf(data: Dict, filename: str) -> bytes:
@@ -74,16 +323,17 @@ def export_to_pdf(data: Dict, filename: str) -> bytes:
     # Tabela de variáveis
     if data:
         for variable, points in data.items():
-            if isinstance(points, list) and len(points) > 0:
+            point_set = as_point_set(points, variable)
+            if point_set is not None and len(point_set) > 0:
                 # Título da variável
                 var_title = Paragraph(f"<b>{variable.upper()}</b>", styles['Heading2'])
                 elements.append(var_title)
                 elements.append(Spacer(1, 0.2 * inch))
                 
                 # Estatísticas
-                values = [p['value'] for p in points if 'value' in p]
-                if values:
-                    import numpy as np
+                values = point_set.column(variable).astype(np.float64)
+                values = values[~np.isnan(values)]
+                if values.size:
                     stats_data = [
                         ['Métrica', 'Valor'],
                         ['Mínimo', f"{np.min(values):.2f}"],
@@ -0,0 +1,222 @@
+"""
+SOLARIS - Previsão de séries temporais (tendência robusta + sazonalidade)
+Ajusta, para cada série (região ou célula de grade), uma tendência linear
+mais harmônicos anuais por mínimos quadrados reponderados (Huber). Todas as
+séries de uma variável são ajustadas de uma vez, em lote, e os coeficientes
+ficam em cache: previsões repetidas não refazem o ajuste.
+"""
+import hashlib
+import logging
+import os
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy.stats import t as student_t
+
+from app.utils.cache import get_cached_data, set_cached_data
+from app.utils.cache_keys import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Harmônicos anuais do modelo sazonal e iterações da regressão robusta
+FORECAST_HARMONICS = int(os.getenv("FORECAST_HARMONICS", "2"))
+FORECAST_ROBUST_ITERATIONS = int(os.getenv("FORECAST_ROBUST_ITERATIONS", "5"))
+# TTL dos coeficientes ajustados no cache (segundos)
+FORECAST_CACHE_TTL = int(os.getenv("FORECAST_CACHE_TTL", "86400"))
+
+# Constante de Huber (95% de eficiência sob normalidade)
+HUBER_K = 1.345
+DAYS_PER_YEAR = 365.25
+# Versão do modelo na chave de cache: muda quando o ajuste muda
+MODEL_VERSION = 1
+
+
+def to_decimal_years(dates: Sequence) -> np.ndarray:
+    """Datas (YYYY-MM-DD, date ou datetime) em anos decimais"""
+    years = np.empty(len(dates))
+    for i, value in enumerate(dates):
+        if isinstance(value, str):
+            value = datetime.strptime(value[:10], "%Y-%m-%d").date()
+        if isinstance(value, datetime):
+            value = value.date()
+        if not isinstance(value, date):
+            raise ValueError(f"Data inválida: {value}")
+        start = date(value.year, 1, 1)
+        length = (date(value.year + 1, 1, 1) - start).days
+        years[i] = value.year + (value - start).days / length
+    return years
+
+
+def design_matrix(t: np.ndarray, origin: float, harmonics: int) -> np.ndarray:
+    """Colunas [1, t - origem, cos(2πht), sin(2πht) para h = 1..harmonics]"""
+    columns = [np.ones_like(t), t - origin]
+    for h in range(1, harmonics + 1):
+        columns.append(np.cos(2 * np.pi * h * t))
+        columns.append(np.sin(2 * np.pi * h * t))
+    return np.column_stack(columns)
+
+
+def _weighted_fit(X: np.ndarray, Y: np.ndarray, W: np.ndarray):
+    """
+    Mínimos quadrados ponderados de todas as séries em lote
+
+    X (T, p) é comum; Y e W são (T, C). Retorna coeficientes (C, p) e a
+    inversa de XᵀWX (C, p, p).
+    """
+    T, p = X.shape
+    # Produtos externos das linhas de X: XᵀWX de todas as séries em um matmul
+    outer = (X[:, :, None] * X[:, None, :]).reshape(T, p * p)
+    normal = (W.T @ outer).reshape(-1, p, p)
+    # Regularização mínima: séries com poucas observações não quebram o lote
+    normal += np.eye(p) * 1e-9 * np.trace(normal, axis1=1, axis2=2)[:, None, None]
+    rhs = (W * Y).T @ X
+    inverse = np.linalg.inv(normal)
+    return np.einsum("cij,cj->ci", inverse, rhs), inverse
+
+
+def fit_series(dates: Sequence, values, harmonics: int = FORECAST_HARMONICS,
+               iterations: int = FORECAST_ROBUST_ITERATIONS) -> Dict:
+    """
+    Ajustar tendência + sazonalidade a uma ou várias séries
+
+    values: (T,) para uma série ou (T, C) para C séries com as mesmas datas
+    (ex.: células de uma grade); NaN marca observações ausentes. A regressão
+    é reponderada com pesos de Huber para que anos atípicos não dominem a
+    tendência. Retorna o modelo (arrays) usado por project().
+    """
+    t = to_decimal_years(dates)
+    Y = np.asarray(values, dtype=np.float64)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    if Y.shape[0] != len(t):
+        raise ValueError("Número de valores diferente do número de datas")
+
+    origin = float(np.floor(t.min())) if len(t) else 0.0
+
+    # Sem cobertura sazonal suficiente (ex.: uma amostra por ano) os
+    # harmônicos ficam colineares: reduzir até a matriz ter posto completo
+    while harmonics > 0:
+        X = design_matrix(t, origin, harmonics)
+        if len(t) > X.shape[1] and np.linalg.matrix_rank(X) == X.shape[1]:
+            break
+        harmonics -= 1
+    X = design_matrix(t, origin, harmonics)
+    p = X.shape[1]
+
+    observed = ~np.isnan(Y)
+    Y_filled = np.where(observed, Y, 0.0)
+    mask = observed.astype(np.float64)
+    weights = mask.copy()
+
+    for _ in range(max(1, iterations)):
+        coefficients, inverse = _weighted_fit(X, Y_filled, weights)
+        residuals = (Y_filled - X @ coefficients.T) * mask
+        # Escala robusta por série (MAD dos resíduos observados)
+        masked = np.where(observed, np.abs(residuals), np.nan)
+        with np.errstate(all="ignore"):
+            scale = 1.4826 * np.nanmedian(masked, axis=0)
+        scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+        u = np.abs(residuals) / (HUBER_K * scale)
+        weights = mask * np.where(u <= 1, 1.0, 1.0 / np.maximum(u, 1e-12))
+
+    coefficients, inverse = _weighted_fit(X, Y_filled, weights)
+    residuals = (Y_filled - X @ coefficients.T) * mask
+    dof = observed.sum(axis=0) - p
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma2 = (weights * residuals ** 2).sum(axis=0) / dof
+
+    # Séries sem observações suficientes não têm previsão
+    insufficient = dof <= 0
+    coefficients[insufficient] = np.nan
+    sigma2[insufficient] = np.nan
+
+    return {
+        "origin": origin,
+        "harmonics": harmonics,
+        "coefficients": coefficients,
+        "covariance": inverse,
+        "sigma2": sigma2,
+        "dof": dof,
+        "lastYear": int(np.floor(t.max())) if len(t) else None
+    }
+
+
+def project(model: Dict, years: Sequence[int], confidence: float = 0.95) -> Dict:
+    """
+    Média anual projetada de cada série, com intervalo de confiança
+
+    A média de um ano inteiro cancela os harmônicos, então a projeção é a
+    tendência no meio do ano; o intervalo vem da covariância dos
+    coeficientes (t de Student com os graus de liberdade de cada série).
+    Retorna arrays (anos, séries): mean, lower, upper.
+    """
+    coefficients = model["coefficients"]
+    p = coefficients.shape[1]
+
+    rows = np.zeros((len(years), p))
+    rows[:, 0] = 1.0
+    rows[:, 1] = np.asarray(years, dtype=np.float64) + 0.5 - model["origin"]
+
+    mean = rows @ coefficients.T
+    variance = np.einsum("yi,cij,yj->yc", rows, model["covariance"], rows) * model["sigma2"][None, :]
+    with np.errstate(invalid="ignore"):
+        critical = student_t.ppf(0.5 + confidence / 2, np.maximum(model["dof"], 1))
+    margin = critical[None, :] * np.sqrt(np.maximum(variance, 0.0))
+
+    return {"mean": mean, "lower": mean - margin, "upper": mean + margin}
+
+
+def series_digest(dates: Sequence, series: Dict[str, np.ndarray], harmonics: int) -> str:
+    """Impressão digital das séries e dos parâmetros do modelo (chave do cache)"""
+    digest = hashlib.sha256()
+    digest.update(f"v{MODEL_VERSION}:h{harmonics}:i{FORECAST_ROBUST_ITERATIONS}".encode())
+    digest.update("|".join(str(d)[:10] for d in dates).encode())
+    for variable in sorted(series):
+        values = np.ascontiguousarray(series[variable], dtype=np.float64)
+        digest.update(variable.encode())
+        digest.update(str(values.shape).encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()[:32]
+
+
+async def get_models(dates: Sequence, series: Dict[str, np.ndarray],
+                     harmonics: int = FORECAST_HARMONICS) -> Dict[str, Dict]:
+    """
+    Modelos ajustados por variável, do cache quando as séries já foram vistas
+
+    A chave é o conteúdo das séries (datas, valores) e os parâmetros do
+    modelo: a mesma região pedida de novo reaproveita os coeficientes.
+    """
+    cache_key = make_cache_key("forecast", series_digest(dates, series, harmonics))
+    models = await get_cached_data(cache_key)
+    if models is not None:
+        return models
+
+    models = {variable: fit_series(dates, values, harmonics) for variable, values in series.items()}
+    await set_cached_data(cache_key, models, ttl=FORECAST_CACHE_TTL)
+    return models
+
+
+def parse_series(series: Dict, variables: Optional[List[str]] = None):
+    """
+    Separar {dates, <variável>: valores} em (datas, {variável: array})
+
+    Cada variável é uma lista com um valor por data (região) ou uma lista de
+    listas (data x célula); None vira NaN.
+    """
+    dates = series.get("dates")
+    if not dates:
+        raise ValueError("A série precisa de 'dates'")
+
+    arrays = {}
+    for variable, values in series.items():
+        if variable == "dates" or (variables is not None and variable not in variables):
+            continue
+        array = np.array(values, dtype=np.float64)
+        if array.shape[0] != len(dates):
+            raise ValueError(f"{variable}: um valor (ou linha de células) por data")
+        arrays[variable] = array
+    if not arrays:
+        raise ValueError("Nenhuma variável na série")
+    return dates, arrays
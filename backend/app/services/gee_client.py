@@ -3,49 +3,119 @@ SOLARIS - Google Earth Engine Client
 Serviço para buscar dados de satélite do GEE
 """
 import ee
+import asyncio
 import logging
-from typing import Dict, List, Optional, Union
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 import json
 
+from app.services.gee_executor import GEEExecutorSaturated, get_gee_executor
+from app.services.gee_replay import get_gee_replay
+from app.services.synthetic import MOCK_POINTS, generate_field, synthetic_region
+from app.utils.cache_keys import canonical_geometry
+from app.utils.metrics import GEE_CALL_SECONDS, GEE_ERRORS, STAGE_SECONDS
+from app.utils.point_set import PointSet
+
 logger = logging.getLogger(__name__)
 
 # Estado de inicialização do GEE
 _gee_initialized = False
+_gee_init_lock = threading.Lock()
+_gee_init_failed_at = None
+
+# Forçar o modo mock (dados sintéticos, sem tentar autenticar no GEE)
+GEE_MOCK_MODE = os.getenv("GEE_MOCK_MODE", "false").lower() == "true"
+# Após uma falha de autenticação, segundos até tentar de novo (cada
+# tentativa custa segundos de rede; sem isso todo tile tentaria)
+GEE_INIT_RETRY = int(os.getenv("GEE_INIT_RETRY", "300"))
+
+# Máximo de variáveis buscadas em paralelo por requisição
+GEE_MAX_CONCURRENT_VARIABLES = int(os.getenv("GEE_MAX_CONCURRENT_VARIABLES", "4"))
+
+# Raio do buffer em torno de coords (metros): padrão e máximo para evitar timeout
+DEFAULT_BUFFER_RADIUS = 5000
+MAX_BUFFER_RADIUS = 50000
+
+# MODIS Terra LST/Emissivity 8-Day L3 Global 1km
+MODIS_LST_COLLECTION = 'MODIS/006/MOD11A2'
+
+# Landsat 8 Collection 2 Tier 1 Level 2 (reflectância de superfície)
+LANDSAT_COLLECTION = 'LANDSAT/LC08/C02/T1_L2'
+
+# Rótulo "dataset" das métricas para os dados sintéticos
+MOCK_DATASET = 'mock'
+
+# Série de métrica da conversão FeatureCollection -> PointSet
+CONVERSION = STAGE_SECONDS.labels("conversion")
+
+# Índices espectrais calculados sobre o Landsat: índice -> bandas (a, b) da
+# diferença normalizada (a - b) / (a + b). Todo índice registrado aqui entra
+# na mesma composição multibanda de get_landsat_indices.
+LANDSAT_SPECTRAL_INDICES = {
+    # NDVI = (NIR - RED) / (NIR + RED)
+    "NDVI": {"bands": ("SR_B5", "SR_B4"), "unit": "0-1"},
+    # NDBI = (SWIR - NIR) / (SWIR + NIR)
+    "NDBI": {"bands": ("SR_B6", "SR_B5"), "unit": "0-1"},
+    # NDWI = (GREEN - NIR) / (GREEN + NIR)
+    "NDWI": {"bands": ("SR_B3", "SR_B5"), "unit": "0-1"},
+}
 
 
 def initialize_gee():
     """Inicializar Google Earth Engine"""
-    global _gee_initialized
+    global _gee_initialized, _gee_init_failed_at
     
     if _gee_initialized:
         logger.info("GEE já inicializado")
         return True
     
-    try:
-        # Tentar autenticação (modo servidor)
-        ee.Initialize()
-        _gee_initialized = True
-        logger.info("✅ Google Earth Engine inicializado com sucesso!")
-        return True
-    except Exception as e:
-        logger.warning(f"⚠️ Falha na inicialização do GEE: {str(e)}")
-        logger.info("💡 Usando dados mockados (mock mode)")
+    if GEE_MOCK_MODE:
         return False
+    
+    # Várias variáveis podem ser buscadas ao mesmo tempo em threads diferentes
+    with _gee_init_lock:
+        if _gee_initialized:
+            return True
+        
+        if _gee_init_failed_at is not None and time.monotonic() - _gee_init_failed_at < GEE_INIT_RETRY:
+            return False
+        
+        try:
+            # Gravação/reprodução (GEE_REPLAY_MODE) é instalada antes do
+            # Initialize: a lista de algoritmos também é gravada
+            replay = get_gee_replay()
+            if replay is not None and replay.mode == "replay":
+                replay.initialize_offline()
+            else:
+                # Tentar autenticação (modo servidor)
+                ee.Initialize()
+            _gee_initialized = True
+            logger.info("✅ Google Earth Engine inicializado com sucesso!")
+            return True
+        except Exception as e:
+            _gee_init_failed_at = time.monotonic()
+            logger.warning(f"⚠️ Falha na inicialização do GEE: {str(e)}")
+            logger.info("💡 Usando dados mockados (mock mode)")
+            return False
 
 
-def get_modis_lst(geometry, start_date: str, end_date: str) -> Dict:
+def get_modis_lst(geometry, start_date: str, end_date: str,
+                  region: Optional[Dict] = None) -> Dict:
     """
     Buscar dados de Land Surface Temperature (LST) do MODIS
     
     Dataset: MODIS/006/MOD11A2 (8-day composite)
+    region (synthetic_region) define os dados mockados se o GEE falhar.
     """
     try:
         if not _gee_initialized:
-            return generate_mock_data("LST", geometry)
+            return generate_mock_data("LST", region)
         
         # MODIS Terra LST/Emissivity 8-Day L3 Global 1km
-        dataset = ee.ImageCollection('MODIS/006/MOD11A2') \
+        dataset = ee.ImageCollection(MODIS_LST_COLLECTION) \
             .select('LST_Day_1km') \
             .filterDate(start_date, end_date) \
             .filterBounds(geometry)
@@ -54,7 +124,7 @@ def get_modis_lst(geometry, start_date: str, end_date: str) -> Dict:
         lst_mean = dataset.mean()
         
         # Converter Kelvin para Celsius (MODIS LST vem em Kelvin * 0.02)
-        lst_celsius = lst_mean.multiply(0.02).subtract(273.15)
+        lst_celsius = lst_mean.multiply(0.02).subtract(273.15).rename('LST')
         
         # Amostrar dados
         sample = lst_celsius.sample(
@@ -64,222 +134,182 @@ def get_modis_lst(geometry, start_date: str, end_date: str) -> Dict:
             geometries=True
         )
         
-        # Converter para feature collection
-        features = sample.getInfo()
+        started = time.perf_counter()
+        collection = sample.getInfo()
+        GEE_CALL_SECONDS.labels(MODIS_LST_COLLECTION, "LST").observe_since(started)
+        
+        # Converter para arrays colunares
+        started = time.perf_counter()
+        points = PointSet.from_feature_collection(collection, ["LST"])
+        CONVERSION.observe_since(started)
         
         return {
             "variable": "LST",
             "unit": "°C",
             "source": "MODIS",
-            "features": features,
-            "count": len(features.get('features', []))
+            "points": points,
+            "count": len(points)
         }
         
     except Exception as e:
+        GEE_ERRORS.labels(MODIS_LST_COLLECTION, "LST").inc()
         logger.error(f"Erro ao buscar LST: {str(e)}")
-        return generate_mock_data("LST", geometry)
+        return generate_mock_data("LST", region)
 
 
-def get_landsat_ndvi(geometry, start_date: str, end_date: str) -> Dict:
+def get_landsat_indices(geometry, start_date: str, end_date: str,
+                        indices: List[str], region: Optional[Dict] = None) -> Dict:
     """
-    Buscar dados de NDVI do Landsat 8
+    Buscar vários índices espectrais do Landsat 8 em uma única composição
+    
+    Cada índice vira uma banda da mesma imagem média, amostrada com um único
+    sample().getInfo(): cada pixel amostrado traz todos os índices pedidos
+    (uma coluna do PointSet por índice).
     
     Dataset: LANDSAT/LC08/C02/T1_L2
     """
+    indices = [i for i in dict.fromkeys(indices) if i in LANDSAT_SPECTRAL_INDICES]
+    
     try:
         if not _gee_initialized:
-            return generate_mock_data("NDVI", geometry)
+            return generate_mock_indices(indices, region)
         
         # Landsat 8 Collection 2 Tier 1 Level 2
-        dataset = ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
+        dataset = ee.ImageCollection(LANDSAT_COLLECTION) \
             .filterDate(start_date, end_date) \
             .filterBounds(geometry)
         
-        # Função para calcular NDVI
-        def calculate_ndvi(image):
-            ndvi = image.normalizedDifference(['SR_B5', 'SR_B4']).rename('NDVI')
-            return image.addBands(ndvi)
-        
-        # Calcular NDVI para todas as imagens
-        ndvi_collection = dataset.map(calculate_ndvi)
+        # Uma banda por índice: (a - b) / (a + b)
+        def calculate_indices(image):
+            return ee.Image.cat([
+                image.normalizedDifference(list(LANDSAT_SPECTRAL_INDICES[index]["bands"])).rename(index)
+                for index in indices
+            ])
         
-        # Média do NDVI
-        ndvi_mean = ndvi_collection.select('NDVI').mean()
+        composite = dataset.map(calculate_indices).mean()
         
         # Amostrar dados
-        sample = ndvi_mean.sample(
+        sample = composite.sample(
             region=geometry,
             scale=30,  # 30m resolution
             numPixels=100,
             geometries=True
         )
         
-        features = sample.getInfo()
+        # Uma chamada para todos os índices: rotulada com a lista
+        started = time.perf_counter()
+        collection = sample.getInfo()
+        GEE_CALL_SECONDS.labels(LANDSAT_COLLECTION, ",".join(indices)).observe_since(started)
+        
+        started = time.perf_counter()
+        points = PointSet.from_feature_collection(collection, indices)
+        CONVERSION.observe_since(started)
         
         return {
-            "variable": "NDVI",
-            "unit": "0-1",
+            "variables": indices,
             "source": "Landsat 8",
-            "features": features,
-            "count": len(features.get('features', []))
+            "points": points,
+            "count": len(points)
         }
         
     except Exception as e:
-        logger.error(f"Erro ao buscar NDVI: {str(e)}")
-        return generate_mock_data("NDVI", geometry)
+        GEE_ERRORS.labels(LANDSAT_COLLECTION, ",".join(indices)).inc()
+        logger.error(f"Erro ao buscar {', '.join(indices)}: {str(e)}")
+        return generate_mock_indices(indices, region)
 
 
-def get_landsat_ndbi(geometry, start_date: str, end_date: str) -> Dict:
+def split_landsat_indices(result: Dict) -> Dict[str, Dict]:
     """
-    Buscar dados de NDBI (Normalized Difference Built-up Index) do Landsat 8
+    Separar o resultado de get_landsat_indices no formato por variável
+    
+    As variáveis compartilham os arrays de coordenadas do mesmo PointSet.
     """
-    try:
-        if not _gee_initialized:
-            return generate_mock_data("NDBI", geometry)
-        
-        dataset = ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
-            .filterDate(start_date, end_date) \
-            .filterBounds(geometry)
-        
-        # NDBI = (SWIR - NIR) / (SWIR + NIR)
-        def calculate_ndbi(image):
-            ndbi = image.normalizedDifference(['SR_B6', 'SR_B5']).rename('NDBI')
-            return image.addBands(ndbi)
-        
-        ndbi_collection = dataset.map(calculate_ndbi)
-        ndbi_mean = ndbi_collection.select('NDBI').mean()
-        
-        sample = ndbi_mean.sample(
-            region=geometry,
-            scale=30,
-            numPixels=100,
-            geometries=True
-        )
-        
-        features = sample.getInfo()
-        
-        return {
-            "variable": "NDBI",
-            "unit": "0-1",
-            "source": "Landsat 8",
-            "features": features,
-            "count": len(features.get('features', []))
+    split = {}
+    
+    for index in result["variables"]:
+        data = {
+            "variable": index,
+            "unit": LANDSAT_SPECTRAL_INDICES[index]["unit"],
+            "source": result["source"],
+            "points": result["points"].select([index]),
+            "count": result["count"]
         }
-        
-    except Exception as e:
-        logger.error(f"Erro ao buscar NDBI: {str(e)}")
-        return generate_mock_data("NDBI", geometry)
+        if result.get("mock"):
+            data["mock"] = True
+        split[index] = data
+    
+    return split
+
+
+def get_landsat_ndvi(geometry, start_date: str, end_date: str,
+                     region: Optional[Dict] = None) -> Dict:
+    """
+    Buscar dados de NDVI do Landsat 8
+    
+    Dataset: LANDSAT/LC08/C02/T1_L2
+    """
+    return split_landsat_indices(
+        get_landsat_indices(geometry, start_date, end_date, ["NDVI"], region)
+    )["NDVI"]
+
 
+def get_landsat_ndbi(geometry, start_date: str, end_date: str,
+                     region: Optional[Dict] = None) -> Dict:
+    """
+    Buscar dados de NDBI (Normalized Difference Built-up Index) do Landsat 8
+    """
+    return split_landsat_indices(
+        get_landsat_indices(geometry, start_date, end_date, ["NDBI"], region)
+    )["NDBI"]
 
-def get_landsat_ndwi(geometry, start_date: str, end_date: str) -> Dict:
+
+def get_landsat_ndwi(geometry, start_date: str, end_date: str,
+                     region: Optional[Dict] = None) -> Dict:
     """
     Buscar dados de NDWI (Normalized Difference Water Index) do Landsat 8
     """
-    try:
-        if not _gee_initialized:
-            return generate_mock_data("NDWI", geometry)
-        
-        dataset = ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
-            .filterDate(start_date, end_date) \
-            .filterBounds(geometry)
-        
-        # NDWI = (GREEN - NIR) / (GREEN + NIR)
-        def calculate_ndwi(image):
-            ndwi = image.normalizedDifference(['SR_B3', 'SR_B5']).rename('NDWI')
-            return image.addBands(ndwi)
-        
-        ndwi_collection = dataset.map(calculate_ndwi)
-        ndwi_mean = ndwi_collection.select('NDWI').mean()
-        
-        sample = ndwi_mean.sample(
-            region=geometry,
-            scale=30,
-            numPixels=100,
-            geometries=True
-        )
-        
-        features = sample.getInfo()
-        
-        return {
-            "variable": "NDWI",
-            "unit": "0-1",
-            "source": "Landsat 8",
-            "features": features,
-            "count": len(features.get('features', []))
-        }
-        
-    except Exception as e:
-        logger.error(f"Erro ao buscar NDWI: {str(e)}")
-        return generate_mock_data("NDWI", geometry)
+    return split_landsat_indices(
+        get_landsat_indices(geometry, start_date, end_date, ["NDWI"], region)
+    )["NDWI"]
 
 
-def generate_mock_data(variable: str, geometry) -> Dict:
+def generate_mock_data(variable: str, region: Optional[Dict] = None) -> Dict:
     """
     Gerar dados mockados para testes (quando GEE não estiver disponível)
-    """
-    import random
-    
-    # Valores típicos para cada variável
-    ranges = {
-        "LST": (25, 45),  # °C
-        "NDVI": (0.1, 0.8),
-        "NDBI": (-0.5, 0.5),
-        "NDWI": (-0.3, 0.3),
-        "POP_DENS": (100, 5000),  # pessoas/km²
-        "NIGHT_LIGHTS": (0, 100)  # nW/cm²/sr
-    }
     
-    min_val, max_val = ranges.get(variable, (0, 100))
+    Campo sintético determinístico (synthetic.generate_field): a mesma
+    região gera os mesmos pontos, sem nenhuma chamada ao GEE.
+    """
+    started = time.perf_counter()
+    region = region or synthetic_region()
+    points = generate_field(region, [variable], MOCK_POINTS, stream=variable)
+    GEE_CALL_SECONDS.labels(MOCK_DATASET, variable).observe_since(started)
     
-    # Obter bounds da geometria para gerar pontos dentro dela
-    try:
-        bounds = geometry.bounds().getInfo()
-        coordinates = bounds['coordinates'][0]
-        
-        # Calcular centro e tamanho aproximado
-        lngs = [coord[0] for coord in coordinates]
-        lats = [coord[1] for coord in coordinates]
-        
-        center_lat = sum(lats) / len(lats)
-        center_lng = sum(lngs) / len(lngs)
-        
-        # Raio máximo (metade da distância entre pontos extremos)
-        delta_lat = (max(lats) - min(lats)) / 2
-        delta_lng = (max(lngs) - min(lngs)) / 2
-        
-    except:
-        # Fallback: usar coordenadas de Brasília
-        center_lat = -15.7801
-        center_lng = -47.9292
-        delta_lat = 0.05
-        delta_lng = 0.05
-    
-    # Gerar 50 pontos mockados dentro da geometria
-    features = []
-    for i in range(50):
-        lat = center_lat + (random.random() - 0.5) * delta_lat * 2
-        lng = center_lng + (random.random() - 0.5) * delta_lng * 2
-        value = random.uniform(min_val, max_val)
-        
-        features.append({
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [lng, lat]
-            },
-            "properties": {
-                variable: round(value, 2)
-            }
-        })
-    
-    logger.info(f"📊 Gerando {len(features)} pontos mockados para {variable} em ({center_lat:.4f}, {center_lng:.4f})")
+    center_lat, center_lng = region["center"]
+    logger.info(f"📊 Gerando {len(points)} pontos mockados para {variable} em ({center_lat:.4f}, {center_lng:.4f})")
     
     return {
         "variable": variable,
         "unit": get_unit(variable),
         "source": "Mock Data (GEE não disponível)",
-        "features": {"type": "FeatureCollection", "features": features},
-        "count": len(features),
+        "points": points,
+        "count": len(points),
+        "mock": True
+    }
+
+
+def generate_mock_indices(indices: List[str], region: Optional[Dict] = None) -> Dict:
+    """Gerar dados mockados para vários índices com os mesmos pontos (uma composição)"""
+    started = time.perf_counter()
+    region = region or synthetic_region()
+    points = generate_field(region, indices, MOCK_POINTS, stream="landsat")
+    GEE_CALL_SECONDS.labels(MOCK_DATASET, ",".join(indices)).observe_since(started)
+    
+    return {
+        "variables": indices,
+        "source": "Mock Data (GEE não disponível)",
+        "points": points,
+        "count": len(points),
         "mock": True
     }
 
@@ -297,30 +327,60 @@ def get_unit(variable: str) -> str:
     return units.get(variable, "")
 
 
-async def get_satellite_data(coords: Optional[Dict] = None, 
-                             bounds: Optional[Dict] = None,
-                             radius: Optional[float] = None,
-                             variable: str = "LST",
-                             start_date: Optional[str] = None,
-                             end_date: Optional[str] = None) -> Dict:
-    """
-    Buscar dados de uma variável específica
-    """
-    # Inicializar GEE se necessário
-    initialize_gee()
-    
-    # Definir datas padrão (últimos 30 dias)
+def resolve_date_range(start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> Tuple[str, str]:
+    """Aplicar datas padrão (últimos 30 dias)"""
     if not start_date:
         start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
     if not end_date:
         end_date = datetime.now().strftime('%Y-%m-%d')
     
-    # Criar geometria
+    return start_date, end_date
+
+
+def resolve_radius(radius: Optional[float] = None) -> float:
+    """Aplicar raio padrão (5km) e limite máximo (50km)"""
+    return min(radius if radius else DEFAULT_BUFFER_RADIUS, MAX_BUFFER_RADIUS)
+
+
+def canonical_request(coords: Optional[Dict] = None,
+                      bounds: Optional[Dict] = None,
+                      radius: Optional[float] = None,
+                      variables: Optional[List[str]] = None,
+                      start_date: Optional[str] = None,
+                      end_date: Optional[str] = None) -> Dict:
+    """
+    Forma canônica de uma requisição de dados (base das chaves de cache)
+    
+    Geometria quantizada, variáveis ordenadas, datas e raio padrão resolvidos:
+    requisições equivalentes produzem o mesmo dict.
+    """
+    start_date, end_date = resolve_date_range(start_date, end_date)
+    
+    return {
+        "geometry": canonical_geometry(coords, bounds, resolve_radius(radius) if coords else None),
+        "variables": sorted(set(variables or [])),
+        "startDate": start_date,
+        "endDate": end_date
+    }
+
+
+def mock_region(coords: Optional[Dict] = None,
+                bounds: Optional[Dict] = None,
+                radius: Optional[float] = None,
+                start_date: Optional[str] = None,
+                end_date: Optional[str] = None) -> Dict:
+    """Região dos dados mockados, calculada localmente a partir da requisição"""
+    return synthetic_region(coords, bounds, resolve_radius(radius) if coords else None, start_date, end_date)
+
+
+def build_geometry(coords: Optional[Dict] = None,
+                   bounds: Optional[Dict] = None,
+                   radius: Optional[float] = None):
+    """Criar a geometria ee (círculo ou retângulo) da requisição"""
     if coords:
         # Ponto ou círculo com raio especificado
-        buffer_radius = radius if radius else 5000  # Default 5km
-        # Limitar raio máximo para evitar timeout
-        buffer_radius = min(buffer_radius, 50000)  # Max 50km
+        buffer_radius = resolve_radius(radius)
         geometry = ee.Geometry.Point([coords['lng'], coords['lat']]).buffer(buffer_radius)
         logger.info(f"Geometria: Ponto com buffer de {buffer_radius}m")
     elif bounds:
@@ -333,17 +393,105 @@ async def get_satellite_data(coords: Optional[Dict] = None,
     else:
         raise ValueError("Forneça coords ou bounds")
     
+    return geometry
+
+
+async def get_satellite_data(coords: Optional[Dict] = None, 
+                             bounds: Optional[Dict] = None,
+                             radius: Optional[float] = None,
+                             variable: str = "LST",
+                             start_date: Optional[str] = None,
+                             end_date: Optional[str] = None) -> Dict:
+    """
+    Buscar dados de uma variável específica
+    
+    As chamadas ao GEE são bloqueantes (getInfo), então rodam no executor
+    dedicado do GEE; o event loop apenas aguarda o resultado.
+    """
+    return await get_gee_executor().run(
+        _fetch_satellite_data,
+        coords=coords,
+        bounds=bounds,
+        radius=radius,
+        variable=variable,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+
+def _fetch_satellite_data(coords: Optional[Dict] = None,
+                          bounds: Optional[Dict] = None,
+                          radius: Optional[float] = None,
+                          variable: str = "LST",
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> Dict:
+    """Versão síncrona de get_satellite_data (executada em thread)"""
+    # Inicializar GEE se necessário
+    initialize_gee()
+    
+    start_date, end_date = resolve_date_range(start_date, end_date)
+    region = mock_region(coords, bounds, radius, start_date, end_date)
+    
+    # Modo mock: nenhuma geometria ee é criada (nem chamada de rede)
+    if not _gee_initialized:
+        return generate_mock_data(variable, region)
+    
+    geometry = build_geometry(coords, bounds, radius)
+    
     # Buscar dados conforme a variável
     if variable == "LST":
-        return get_modis_lst(geometry, start_date, end_date)
+        return get_modis_lst(geometry, start_date, end_date, region)
     elif variable == "NDVI":
-        return get_landsat_ndvi(geometry, start_date, end_date)
+        return get_landsat_ndvi(geometry, start_date, end_date, region)
     elif variable == "NDBI":
-        return get_landsat_ndbi(geometry, start_date, end_date)
+        return get_landsat_ndbi(geometry, start_date, end_date, region)
     elif variable == "NDWI":
-        return get_landsat_ndwi(geometry, start_date, end_date)
+        return get_landsat_ndwi(geometry, start_date, end_date, region)
     else:
-        return generate_mock_data(variable, geometry)
+        return generate_mock_data(variable, region)
+
+
+async def get_landsat_indices_data(coords: Optional[Dict] = None,
+                                   bounds: Optional[Dict] = None,
+                                   radius: Optional[float] = None,
+                                   indices: List[str] = None,
+                                   start_date: Optional[str] = None,
+                                   end_date: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Buscar vários índices Landsat em uma única chamada ao GEE
+    
+    Retorna um dict por índice, no mesmo formato de get_satellite_data.
+    """
+    return await get_gee_executor().run(
+        _fetch_landsat_indices_data,
+        coords=coords,
+        bounds=bounds,
+        radius=radius,
+        indices=indices,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+
+def _fetch_landsat_indices_data(coords: Optional[Dict] = None,
+                                bounds: Optional[Dict] = None,
+                                radius: Optional[float] = None,
+                                indices: List[str] = None,
+                                start_date: Optional[str] = None,
+                                end_date: Optional[str] = None) -> Dict[str, Dict]:
+    """Versão síncrona de get_landsat_indices_data (executada em thread)"""
+    initialize_gee()
+    
+    start_date, end_date = resolve_date_range(start_date, end_date)
+    region = mock_region(coords, bounds, radius, start_date, end_date)
+    
+    if not _gee_initialized:
+        indices = [i for i in dict.fromkeys(indices) if i in LANDSAT_SPECTRAL_INDICES]
+        return split_landsat_indices(generate_mock_indices(indices, region))
+    
+    geometry = build_geometry(coords, bounds, radius)
+    
+    return split_landsat_indices(get_landsat_indices(geometry, start_date, end_date, indices, region))
 
 
 async def get_multiple_variables(coords: Optional[Dict] = None,
@@ -351,25 +499,86 @@ async def get_multiple_variables(coords: Optional[Dict] = None,
                                  radius: Optional[float] = None,
                                  start_date: Optional[str] = None,
                                  end_date: Optional[str] = None,
-                                 variables: List[str] = None) -> Dict:
+                                 variables: List[str] = None,
+                                 max_concurrency: Optional[int] = None) -> Dict:
     """
     Buscar dados de múltiplas variáveis
+    
+    Todas as variáveis são disparadas ao mesmo tempo (limitadas por
+    max_concurrency / GEE_MAX_CONCURRENT_VARIABLES), então a latência total
+    fica próxima à da variável mais lenta. Índices Landsat pedidos juntos
+    (LANDSAT_SPECTRAL_INDICES) saem de uma única composição e um único getInfo.
+    Uma falha em uma variável não derruba as demais: ela volta com o campo
+    "error" preenchido. A exceção é o executor GEE saturado, que aborta a
+    requisição inteira.
     """
     if not variables:
         variables = ["LST", "NDVI"]
     
+    if not coords and not bounds:
+        raise ValueError("Forneça coords ou bounds")
+    
+    # Remover duplicadas mantendo a ordem pedida
+    variables = list(dict.fromkeys(variables))
+    
+    # Agrupar os índices Landsat em uma única busca
+    landsat_indices = [v for v in variables if v in LANDSAT_SPECTRAL_INDICES]
+    groups = [[v] for v in variables if v not in LANDSAT_SPECTRAL_INDICES]
+    if len(landsat_indices) > 1:
+        groups.append(landsat_indices)
+    else:
+        groups.extend([v] for v in landsat_indices)
+    
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or GEE_MAX_CONCURRENT_VARIABLES))
+    
+    async def fetch_group(group: List[str]):
+        async with semaphore:
+            logger.info(f"Buscando dados para: {', '.join(group)}")
+            try:
+                if len(group) > 1:
+                    return await get_landsat_indices_data(
+                        coords=coords,
+                        bounds=bounds,
+                        radius=radius,
+                        indices=group,
+                        start_date=start_date,
+                        end_date=end_date
+                    )
+                
+                data = await get_satellite_data(
+                    coords=coords,
+                    bounds=bounds,
+                    radius=radius,
+                    variable=group[0],
+                    start_date=start_date,
+                    end_date=end_date
+                )
+                return {group[0]: data}
+            except GEEExecutorSaturated:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erro ao buscar {', '.join(group)}: {str(e)}")
+                return {
+                    variable: {
+                        "variable": variable,
+                        "unit": get_unit(variable),
+                        "error": str(e),
+                        "points": PointSet.empty([variable]),
+                        "count": 0
+                    }
+                    for variable in group
+                }
+    
     results = {}
+    tasks = [asyncio.ensure_future(fetch_group(group)) for group in groups]
     
-    for variable in variables:
-        logger.info(f"Buscando dados para: {variable}")
-        data = await get_satellite_data(
-            coords=coords,
-            bounds=bounds,
-            radius=radius,
-            variable=variable,
-            start_date=start_date,
-            end_date=end_date
-        )
-        results[variable] = data
+    try:
+        for completed in asyncio.as_completed(tasks):
+            results.update(await completed)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
     
-    return results
+    # Manter a ordem das variáveis solicitadas
+    return {variable: results[variable] for variable in variables}
@@ -0,0 +1,96 @@
+"""
+SOLARIS - Executor dedicado para o Google Earth Engine
+Toda chamada bloqueante ao SDK do GEE (getInfo, ee.Initialize) roda aqui,
+para que o event loop do uvicorn apenas aguarde futures.
+"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Threads dedicadas ao GEE e limite de tarefas aguardando na fila
+GEE_EXECUTOR_WORKERS = int(os.getenv("GEE_EXECUTOR_WORKERS", "8"))
+GEE_EXECUTOR_MAX_QUEUE = int(os.getenv("GEE_EXECUTOR_MAX_QUEUE", "64"))
+
+
+class GEEExecutorSaturated(Exception):
+    """Fila do executor GEE cheia: a requisição deve ser recusada (503)"""
+
+
+class GEEExecutor:
+    """Pool de threads com limite de profundidade de fila"""
+
+    def __init__(self, max_workers: int = GEE_EXECUTOR_WORKERS,
+                 max_queue: int = GEE_EXECUTOR_MAX_QUEUE):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="gee"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0  # Na fila + em execução
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Executar fn(*args, **kwargs) no pool e aguardar o resultado"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise GEEExecutorSaturated(
+                    f"Executor GEE saturado ({self._pending} tarefas pendentes)"
+                )
+            self._pending += 1
+
+        def task():
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        future = self._executor.submit(task)
+        # O callback também roda se a tarefa for cancelada antes de iniciar
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def stats(self) -> Dict:
+        """Estado atual do executor (barato: usado pelo health check)"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "maxQueue": self.max_queue,
+                "completed": self._completed,
+                "rejected": self._rejected
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Encerrar o pool (chamado no shutdown da aplicação)"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info("🛑 Executor GEE encerrado")
+
+
+# Singleton
+_gee_executor = None
+
+def get_gee_executor() -> GEEExecutor:
+    """Obter instância única do executor GEE"""
+    global _gee_executor
+    if _gee_executor is None:
+        _gee_executor = GEEExecutor()
+    return _gee_executor
@@ -0,0 +1,196 @@
+"""
+SOLARIS - Gravação e reprodução das chamadas ao Google Earth Engine
+Em modo "record" cada getInfo (e a lista de algoritmos carregada no
+ee.Initialize) é executado no GEE de verdade e gravado em um SQLite,
+indexado pela expressão ee serializada. Em modo "replay" as respostas saem
+do arquivo, sem rede, com a latência gravada (ou fixa) e jitter opcional:
+benchmarks e testes do pipeline rodam offline com payloads reais.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+import ee
+
+logger = logging.getLogger(__name__)
+
+# off, record ou replay
+GEE_REPLAY_MODE = os.getenv("GEE_REPLAY_MODE", "off").lower()
+# Arquivo SQLite das gravações
+GEE_REPLAY_STORE = os.getenv("GEE_REPLAY_STORE", "gee_replay.sqlite")
+# Latência na reprodução: "recorded" (a medida na gravação) ou milissegundos
+GEE_REPLAY_LATENCY = os.getenv("GEE_REPLAY_LATENCY", "recorded")
+# Jitter uniforme (± milissegundos) somado à latência
+GEE_REPLAY_JITTER_MS = float(os.getenv("GEE_REPLAY_JITTER_MS", "0"))
+
+MODES = ("off", "record", "replay")
+
+# Chave da lista de algoritmos (não é uma expressão)
+ALGORITHMS_KEY = "algorithms"
+
+
+class ReplayMiss(ee.EEException):
+    """Expressão sem gravação no modo replay (tratada como falha do GEE)"""
+
+
+def expression_key(obj: Any) -> str:
+    """Chave de uma expressão ee: sha256 da serialização (determinística)"""
+    return hashlib.sha256(obj.serialize().encode("utf-8")).hexdigest()
+
+
+class ReplayStore:
+    """Respostas gravadas em SQLite (JSON comprimido com zlib), seguro entre threads"""
+
+    def __init__(self, path: str = GEE_REPLAY_STORE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS calls ("
+            "key TEXT PRIMARY KEY, kind TEXT NOT NULL, response BLOB NOT NULL, "
+            "duration_ms REAL NOT NULL, recorded_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(resposta, duração em ms) ou None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, duration_ms FROM calls WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0])), row[1]
+
+    def put(self, key: str, kind: str, response: Any, duration_ms: float) -> None:
+        blob = zlib.compress(json.dumps(response, separators=(",", ":")).encode("utf-8"), 6)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO calls VALUES (?, ?, ?, ?, ?)",
+                (key, kind, blob, duration_ms, time.time())
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(response)), 0) FROM calls"
+            ).fetchone()
+        return {"path": self.path, "entries": count, "bytes": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class GEEReplay:
+    """Intercepta ee.data.computeValue (usado por getInfo) e ee.data.getAlgorithms"""
+
+    def __init__(self, mode: str, store: ReplayStore, latency: str = GEE_REPLAY_LATENCY,
+                 jitter_ms: float = GEE_REPLAY_JITTER_MS):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Modo inválido: {mode}. Use: record ou replay")
+        self.mode = mode
+        self.store = store
+        self.latency = latency
+        self.jitter_ms = jitter_ms
+        self._original = {}
+        self._lock = threading.Lock()
+        self._counts = {"recorded": 0, "replayed": 0, "misses": 0}
+
+    def install(self) -> None:
+        """Substituir as funções do ee.data (idempotente)"""
+        if self._original:
+            return
+        self._original = {
+            "computeValue": ee.data.computeValue,
+            "getAlgorithms": ee.data.getAlgorithms
+        }
+        ee.data.computeValue = self._compute_value
+        ee.data.getAlgorithms = self._get_algorithms
+        logger.info(f"📼 GEE em modo {self.mode}: {self.store.path}")
+
+    def uninstall(self) -> None:
+        for name, fn in self._original.items():
+            setattr(ee.data, name, fn)
+        self._original = {}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def _call(self, key: str, kind: str, fn, *args) -> Any:
+        if self.mode == "record":
+            started = time.perf_counter()
+            response = fn(*args)
+            self.store.put(key, kind, response, (time.perf_counter() - started) * 1000)
+            self._count("recorded")
+            return response
+
+        recorded = self.store.get(key)
+        if recorded is None:
+            self._count("misses")
+            raise ReplayMiss(f"Sem gravação para a chamada ao GEE ({kind} {key[:12]})")
+
+        response, duration_ms = recorded
+        delay = duration_ms if self.latency == "recorded" else float(self.latency)
+        if self.jitter_ms:
+            delay += random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        self._count("replayed")
+        return response
+
+    def _compute_value(self, obj) -> Any:
+        return self._call(expression_key(obj), "computeValue", self._original["computeValue"], obj)
+
+    def _get_algorithms(self) -> Any:
+        return self._call(ALGORITHMS_KEY, "getAlgorithms", self._original["getAlgorithms"])
+
+    def initialize_offline(self) -> None:
+        """
+        ee.Initialize sem rede (modo replay)
+
+        Pula a configuração do cliente HTTP; os construtores dinâmicos vêm
+        da lista de algoritmos gravada.
+        """
+        original_initialize = ee.data.initialize
+        ee.data.initialize = lambda **kwargs: None
+        try:
+            ee.Initialize(credentials=None, project="replay")
+        finally:
+            ee.data.initialize = original_initialize
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+        return {"mode": self.mode, **counts, "store": self.store.stats()}
+
+
+# Singleton
+_gee_replay = None
+_gee_replay_lock = threading.Lock()
+
+def get_gee_replay() -> Optional[GEEReplay]:
+    """
+    Instância de gravação/reprodução conforme GEE_REPLAY_MODE (None em "off")
+
+    Instalada na primeira chamada, antes do ee.Initialize.
+    """
+    global _gee_replay
+    if GEE_REPLAY_MODE == "off":
+        return None
+    if GEE_REPLAY_MODE not in MODES:
+        raise ValueError(f"GEE_REPLAY_MODE inválido: {GEE_REPLAY_MODE}. Use: {', '.join(MODES)}")
+    with _gee_replay_lock:
+        if _gee_replay is None:
+            _gee_replay = GEEReplay(GEE_REPLAY_MODE, ReplayStore())
+            _gee_replay.install()
+    return _gee_replay
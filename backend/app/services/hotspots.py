@@ -0,0 +1,192 @@
+"""
+SOLARIS - Detecção estatística de hotspots (Getis-Ord Gi* e Moran local)
+Substitui o limiar sobre a média regional por estatísticas locais: cada
+ponto recebe z-scores e uma classe (hotspot, coldspot, cluster, outlier).
+Os pesos espaciais são esparsos, montados a partir de uma KD-tree.
+"""
+import math
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.spatial import cKDTree
+from scipy.stats import norm
+
+from app.utils.point_set import PointSet
+
+# Vizinhos por ponto quando não há banda de distância
+HOTSPOT_NEIGHBORS = int(os.getenv("HOTSPOT_NEIGHBORS", "8"))
+# Nível de significância padrão das classes
+HOTSPOT_ALPHA = float(os.getenv("HOTSPOT_ALPHA", "0.05"))
+
+METERS_PER_DEGREE = 111320.0
+
+# Códigos das classes (colunas float32 do PointSet)
+GI_CLASSES = {
+    3: "hot_99", 2: "hot_95", 1: "hot_90", 0: "not_significant",
+    -1: "cold_90", -2: "cold_95", -3: "cold_99"
+}
+MORAN_CLASSES = {0: "not_significant", 1: "high_high", 2: "low_low", 3: "high_low", 4: "low_high"}
+
+
+def _project(points: PointSet) -> np.ndarray:
+    """Coordenadas planas em metros (equiretangular local)"""
+    lat0 = float(np.mean(points.lat)) if len(points) else 0.0
+    kx = METERS_PER_DEGREE * math.cos(math.radians(lat0))
+    return np.column_stack((points.lon * kx, points.lat * METERS_PER_DEGREE))
+
+
+def spatial_weights(xy: np.ndarray, distance_m: Optional[float] = None,
+                    neighbors: int = HOTSPOT_NEIGHBORS) -> sparse.csr_matrix:
+    """
+    Pesos espaciais binários esparsos (sem a diagonal)
+
+    Com distance_m: todos os pares a até essa distância (banda fixa); sem
+    ela: os `neighbors` vizinhos mais próximos. Os pares vêm da KD-tree,
+    sem matriz de distâncias O(n²).
+    """
+    n = len(xy)
+    tree = cKDTree(xy)
+
+    if distance_m is not None:
+        pairs = tree.query_pairs(distance_m, output_type="ndarray")
+        rows = np.concatenate((pairs[:, 0], pairs[:, 1]))
+        cols = np.concatenate((pairs[:, 1], pairs[:, 0]))
+    else:
+        k = min(neighbors, n - 1)
+        if k < 1:
+            return sparse.csr_matrix((n, n))
+        # k + 1: o primeiro vizinho é o próprio ponto
+        _, index = tree.query(xy, k=k + 1)
+        rows = np.repeat(np.arange(n), k)
+        cols = index[:, 1:].ravel()
+        keep = rows != cols
+        rows, cols = rows[keep], cols[keep]
+
+    weights = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+    weights.sum_duplicates()
+    weights.data[:] = 1.0
+    return weights
+
+
+def getis_ord_gi_star(values: np.ndarray, weights: sparse.csr_matrix) -> np.ndarray:
+    """
+    z-score Gi* de cada ponto (vizinhança incluindo o próprio ponto)
+
+    Gi* = (Σ w_ij x_j - x̄ W_i) / (S √((n S1_i - W_i²) / (n - 1)))
+    """
+    n = len(values)
+    weights = weights + sparse.identity(n, format="csr")
+    mean = values.mean()
+    std = math.sqrt(max((values ** 2).mean() - mean ** 2, 0.0))
+
+    w_sum = np.asarray(weights.sum(axis=1)).ravel()
+    w_sq = np.asarray(weights.multiply(weights).sum(axis=1)).ravel()
+    lag = weights @ values
+
+    denominator = std * np.sqrt(np.maximum(n * w_sq - w_sum ** 2, 0.0) / (n - 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (lag - mean * w_sum) / denominator
+    return np.where(np.isfinite(z), z, 0.0)
+
+
+def local_morans_i(values: np.ndarray, weights: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Moran local (Anselin, 1995) com pesos padronizados na linha
+
+    Retorna (I_i, z-score analítico sob aleatorização).
+    """
+    n = len(values)
+    w_sum = np.asarray(weights.sum(axis=1)).ravel()
+    with np.errstate(divide="ignore"):
+        row_scale = np.where(w_sum > 0, 1.0 / w_sum, 0.0)
+    standardized = sparse.diags(row_scale) @ weights
+
+    deviations = values - values.mean()
+    m2 = (deviations ** 2).sum() / n
+    if m2 == 0:
+        zeros = np.zeros(n)
+        return zeros, zeros
+
+    local_i = deviations / m2 * (standardized @ deviations)
+
+    b2 = (deviations ** 4).sum() / n / m2 ** 2
+    w_i = np.asarray(standardized.sum(axis=1)).ravel()
+    w_i2 = np.asarray(standardized.multiply(standardized).sum(axis=1)).ravel()
+    # Σ_{k≠h} w_ik w_ih
+    w_ikh = w_i ** 2 - w_i2
+    expected = -w_i / (n - 1)
+    variance = (
+        w_i2 * (n - b2) / (n - 1)
+        + w_ikh * (2 * b2 - n) / ((n - 1) * (n - 2))
+        - expected ** 2
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (local_i - expected) / np.sqrt(variance)
+    return local_i, np.where(np.isfinite(z), z, 0.0)
+
+
+def detect_hotspots(points: PointSet, variable: str, distance_m: Optional[float] = None,
+                    neighbors: int = HOTSPOT_NEIGHBORS,
+                    alpha: float = HOTSPOT_ALPHA) -> Tuple[PointSet, Dict]:
+    """
+    Gi* e Moran local sobre os pontos válidos de uma variável
+
+    Retorna um PointSet com as colunas da variável, GI_Z, GI_CLASS,
+    MORAN_I, MORAN_Z e MORAN_CLASS (classes codificadas como em
+    GI_CLASSES / MORAN_CLASSES) e um resumo com as contagens por classe.
+    """
+    column = points.column(variable).astype(np.float64)
+    valid = ~np.isnan(column)
+    points = points.filter(valid)
+    values = column[valid]
+    n = len(values)
+    if n < 3:
+        raise ValueError("São necessárias ao menos 3 amostras válidas")
+    if not 0 < alpha < 1:
+        raise ValueError("alpha deve estar entre 0 e 1")
+
+    weights = spatial_weights(_project(points), distance_m, neighbors)
+    gi_z = getis_ord_gi_star(values, weights)
+    moran_i, moran_z = local_morans_i(values, weights)
+
+    # Gi*: níveis de confiança fixos (90/95/99%)
+    gi_class = np.zeros(n)
+    for level, confidence in ((1, 0.90), (2, 0.95), (3, 0.99)):
+        critical = norm.ppf(1 - (1 - confidence) / 2)
+        gi_class[gi_z >= critical] = level
+        gi_class[gi_z <= -critical] = -level
+
+    # Moran: quadrante (valor x média dos vizinhos) dos pontos significativos
+    deviations = values - values.mean()
+    lag = weights @ deviations
+    significant = np.abs(moran_z) >= norm.ppf(1 - alpha / 2)
+    moran_class = np.select(
+        [deviations > 0, deviations <= 0],
+        [np.where(lag > 0, 1, 3), np.where(lag <= 0, 2, 4)]
+    )
+    moran_class = np.where(significant, moran_class, 0)
+
+    result = PointSet(
+        points.lat,
+        points.lon,
+        {
+            variable: values,
+            "GI_Z": gi_z,
+            "GI_CLASS": gi_class,
+            "MORAN_I": moran_i,
+            "MORAN_Z": moran_z,
+            "MORAN_CLASS": moran_class
+        },
+        points.meta
+    )
+    summary = {
+        "points": n,
+        "neighbors": round(float(weights.nnz) / n, 2),
+        "weights": "distance" if distance_m is not None else "knn",
+        "alpha": alpha,
+        "gi": {GI_CLASSES[c]: int((gi_class == c).sum()) for c in GI_CLASSES},
+        "moran": {MORAN_CLASSES[c]: int((moran_class == c).sum()) for c in MORAN_CLASSES}
+    }
+    return result, summary
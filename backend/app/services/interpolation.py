@@ -0,0 +1,243 @@
+"""
+SOLARIS - Interpolação espacial das amostras em grade regular
+Transforma os pontos amostrados de uma variável em uma superfície contínua
+(IDW ou krigagem ordinária) sobre uma grade de resolução pedida.
+"""
+import math
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from app.utils.point_set import PointSet
+
+# Vizinhos usados por célula e expoente padrão do IDW
+INTERPOLATION_NEIGHBORS = int(os.getenv("INTERPOLATION_NEIGHBORS", "8"))
+IDW_POWER = float(os.getenv("IDW_POWER", "2"))
+# Limite de células por grade (largura x altura)
+INTERPOLATION_MAX_CELLS = int(os.getenv("INTERPOLATION_MAX_CELLS", "4000000"))
+
+METHODS = ("idw", "kriging")
+
+METERS_PER_DEGREE = 111320.0
+
+# Threads da busca de vizinhos (-1 = todos os núcleos)
+INTERPOLATION_WORKERS = int(os.getenv("INTERPOLATION_WORKERS", "-1"))
+
+# Elementos por lote na krigagem (limita a memória dos sistemas em lote)
+_CHUNK_ELEMENTS = 4_000_000
+# Pontos usados para ajustar o variograma (pares crescem com o quadrado)
+_VARIOGRAM_SAMPLE = 1500
+
+
+class _Projection:
+    """Equiretangular local em metros: distâncias planas válidas na escala urbana"""
+
+    def __init__(self, bounds: Dict):
+        lat0 = (bounds['north'] + bounds['south']) / 2
+        self.kx = METERS_PER_DEGREE * math.cos(math.radians(lat0))
+        self.ky = METERS_PER_DEGREE
+
+    def __call__(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        return np.column_stack((np.asarray(lon) * self.kx, np.asarray(lat) * self.ky))
+
+
+def grid_shape(bounds: Dict, resolution_m: Optional[float] = None,
+               width: Optional[int] = None, height: Optional[int] = None) -> Tuple[int, int]:
+    """
+    (altura, largura) da grade
+
+    Usa width/height se informados (o que faltar segue a proporção da área)
+    ou a resolução em metros por célula.
+    """
+    projection = _Projection(bounds)
+    span_x = (bounds['east'] - bounds['west']) * projection.kx
+    span_y = (bounds['north'] - bounds['south']) * projection.ky
+    if span_x <= 0 or span_y <= 0:
+        raise ValueError("Área da grade vazia")
+
+    if width or height:
+        if not width:
+            width = max(1, round(height * span_x / span_y))
+        if not height:
+            height = max(1, round(width * span_y / span_x))
+    elif resolution_m:
+        width = max(1, math.ceil(span_x / resolution_m))
+        height = max(1, math.ceil(span_y / resolution_m))
+    else:
+        raise ValueError("Informe a resolução ou as dimensões da grade")
+
+    width, height = int(width), int(height)
+    if width <= 0 or height <= 0:
+        raise ValueError("Dimensões da grade devem ser positivas")
+    if width * height > INTERPOLATION_MAX_CELLS:
+        raise ValueError(f"Grade grande demais: máximo de {INTERPOLATION_MAX_CELLS} células")
+    return height, width
+
+
+def points_bounds(points: PointSet) -> Dict:
+    """Extensão {north, south, east, west} das amostras"""
+    return {
+        "north": float(points.lat.max()), "south": float(points.lat.min()),
+        "east": float(points.lon.max()), "west": float(points.lon.min())
+    }
+
+
+def cell_centers(bounds: Dict, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitudes (norte -> sul) e longitudes dos centros das células"""
+    height, width = shape
+    cell_lat = bounds['north'] - (np.arange(height) + 0.5) * (bounds['north'] - bounds['south']) / height
+    cell_lon = bounds['west'] + (np.arange(width) + 0.5) * (bounds['east'] - bounds['west']) / width
+    return cell_lat, cell_lon
+
+
+def grid_to_point_set(grid: np.ndarray, bounds: Dict, variable: str) -> PointSet:
+    """Centros das células da grade como pontos (células NaN ficam de fora)"""
+    cell_lat, cell_lon = cell_centers(bounds, grid.shape)
+    lon, lat = np.meshgrid(cell_lon, cell_lat)
+    values = grid.ravel()
+    valid = ~np.isnan(values)
+    return PointSet(lat.ravel()[valid], lon.ravel()[valid], {variable: values[valid]})
+
+
+def _idw(distances: np.ndarray, index: np.ndarray, values: np.ndarray, power: float) -> np.ndarray:
+    """Média ponderada pelo inverso da distância (exata sobre as amostras)"""
+    with np.errstate(divide="ignore"):
+        weights = 1.0 / distances ** power
+    neighbor_values = values[index]
+
+    exact = np.isinf(weights)
+    with np.errstate(invalid="ignore"):
+        grid = (weights * neighbor_values).sum(axis=-1) / weights.sum(axis=-1)
+    hit = exact.any(axis=-1)
+    if hit.any():
+        # Célula sobre uma amostra: o valor dela (a primeira, se houver
+        # amostras repetidas na mesma coordenada)
+        grid[hit] = neighbor_values[hit, np.argmax(exact[hit], axis=1)]
+    return grid
+
+
+def fit_variogram(points: np.ndarray, values: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Ajustar um variograma exponencial (pepita, patamar, alcance em metros)
+
+    Semivariograma empírico por classes de distância sobre uma amostra dos
+    pontos; o alcance é o que minimiza o erro quadrático com patamar igual à
+    variância e pepita estimada na primeira classe.
+    """
+    if len(points) > _VARIOGRAM_SAMPLE:
+        chosen = np.random.default_rng(0).choice(len(points), _VARIOGRAM_SAMPLE, replace=False)
+        points, values = points[chosen], values[chosen]
+
+    sill = float(np.var(values)) or 1e-12
+    i, j = np.triu_indices(len(points), k=1)
+    if len(i) == 0:
+        return 0.0, sill, 1.0
+
+    distances = np.hypot(points[i, 0] - points[j, 0], points[i, 1] - points[j, 1])
+    semivariances = 0.5 * (values[i] - values[j]) ** 2
+
+    max_distance = float(distances.max()) / 2 or 1.0
+    edges = np.linspace(0, max_distance, 16)
+    bins = np.digitize(distances, edges) - 1
+    used = (bins >= 0) & (bins < len(edges) - 1)
+    counts = np.bincount(bins[used], minlength=len(edges) - 1)
+    sums = np.bincount(bins[used], weights=semivariances[used], minlength=len(edges) - 1)
+    populated = counts > 0
+    lags = ((edges[:-1] + edges[1:]) / 2)[populated]
+    gammas = sums[populated] / counts[populated]
+
+    nugget = float(min(max(gammas[0], 0.0), sill)) if len(gammas) else 0.0
+    ranges = np.geomspace(max_distance / 100, max_distance * 4, 64)
+    model = nugget + (sill - nugget) * (1 - np.exp(-3 * lags[None, :] / ranges[:, None]))
+    best = ranges[np.argmin(((model - gammas[None, :]) ** 2).sum(axis=1))]
+    return nugget, sill, float(best)
+
+
+def _kriging(distances: np.ndarray, index: np.ndarray, points: np.ndarray, values: np.ndarray,
+             variogram: Tuple[float, float, float]) -> np.ndarray:
+    """Krigagem ordinária com vizinhança local (um sistema (k+1)² por célula, em lote)"""
+    nugget, sill, range_m = variogram
+    shape = distances.shape[:-1]
+    k = distances.shape[-1]
+    distances = distances.reshape(-1, k)
+    index = index.reshape(-1, k)
+
+    def covariance(distance):
+        return (sill - nugget) * np.exp(-3 * distance / range_m)
+
+    grid = np.empty(len(index))
+    step = max(1, _CHUNK_ELEMENTS // (4 * (k + 1) ** 2))
+
+    for start in range(0, len(index), step):
+        end = min(start + step, len(index))
+        neighbors = points[index[start:end]]
+        pairwise = np.sqrt(((neighbors[:, :, None, :] - neighbors[:, None, :, :]) ** 2).sum(axis=-1))
+
+        system = np.ones((end - start, k + 1, k + 1))
+        system[:, :k, :k] = covariance(pairwise)
+        # Pepita (mais um mínimo) na diagonal: amostras repetidas não tornam o sistema singular
+        system[:, np.arange(k), np.arange(k)] += nugget + 1e-9 * sill
+        system[:, k, k] = 0.0
+
+        rhs = np.ones((end - start, k + 1, 1))
+        rhs[:, :k, 0] = covariance(distances[start:end])
+
+        weights = np.linalg.solve(system, rhs)[:, :k, 0]
+        grid[start:end] = (weights * values[index[start:end]]).sum(axis=1)
+
+    return grid.reshape(shape)
+
+
+def interpolate(points: PointSet, variable: str, bounds: Dict, shape: Tuple[int, int],
+                method: str = "idw", neighbors: int = INTERPOLATION_NEIGHBORS,
+                power: float = IDW_POWER) -> Tuple[np.ndarray, Dict]:
+    """
+    Interpolar uma variável em grade regular sobre bounds
+
+    Retorna (grade float32 (altura, largura) com a linha 0 ao norte,
+    metadados). Os valores de cada célula vêm dos `neighbors` pontos mais
+    próximos do seu centro.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método desconhecido: {method}. Use: {', '.join(METHODS)}")
+
+    column = points.column(variable).astype(np.float64)
+    valid = ~np.isnan(column)
+    if not valid.any():
+        raise ValueError(f"Sem amostras válidas de {variable}")
+
+    projection = _Projection(bounds)
+    sample_points = projection(points.lat[valid], points.lon[valid])
+    values = column[valid]
+    k = max(1, min(int(neighbors), len(values)))
+
+    height, width = shape
+    cell_lat, cell_lon = cell_centers(bounds, shape)
+
+    # Uma consulta k-NN vetorizada para todos os centros de célula
+    cell_x, cell_y = np.meshgrid(cell_lon * projection.kx, cell_lat * projection.ky)
+    distances, index = cKDTree(sample_points).query(
+        np.column_stack((cell_x.ravel(), cell_y.ravel())), k=k, workers=INTERPOLATION_WORKERS
+    )
+    distances = distances.reshape(height, width, k)
+    index = index.reshape(height, width, k)
+
+    meta = {"method": method, "neighbors": k, "samples": int(len(values))}
+    if method == "kriging":
+        variogram = fit_variogram(sample_points, values)
+        grid = _kriging(distances, index, sample_points, values, variogram)
+        meta["variogram"] = {
+            "model": "exponential",
+            "nugget": variogram[0],
+            "sill": variogram[1],
+            "rangeM": variogram[2]
+        }
+    else:
+        grid = _idw(distances, index, values, power)
+        meta["power"] = power
+
+    grid = grid.astype(np.float32)
+    meta["range"] = [float(np.nanmin(grid)), float(np.nanmax(grid))]
+    return grid, meta
@@ -0,0 +1,203 @@
+"""
+SOLARIS - Jobs assíncronos para análises longas
+Buscas, previsões e exportações pesadas entram em uma fila limitada e rodam
+em workers do próprio processo; o cliente recebe um jobId e acompanha o
+estado (com progresso por variável) em vez de manter a conexão aberta.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.utils.cache import get_cached_data, set_cached_data
+
+logger = logging.getLogger(__name__)
+
+# Workers simultâneos e limite de jobs aguardando na fila
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "32"))
+# Por quanto tempo o estado e o resultado de um job ficam disponíveis (segundos)
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "86400"))
+# Espera máxima de um long-poll (segundos)
+JOB_LONG_POLL_MAX = int(os.getenv("JOB_LONG_POLL_MAX", "30"))
+
+FINISHED = ("done", "failed")
+
+# Assinatura de um job: recebe o callback de progresso e retorna o resumo do resultado
+JobHandler = Callable[[Callable[[str, int, int], None]], Awaitable[Dict]]
+
+
+class JobQueueFull(Exception):
+    """Fila de jobs cheia: o job deve ser recusado (503)"""
+
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+class JobManager:
+    """Fila limitada de jobs com workers asyncio no event loop da aplicação"""
+
+    def __init__(self, workers: int = JOB_WORKERS, max_queue: int = JOB_MAX_QUEUE,
+                 retention: int = JOB_RETENTION):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.retention = retention
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._jobs: Dict[str, Dict] = {}
+        self._handlers: Dict[str, JobHandler] = {}
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def _start(self) -> None:
+        """Criar a fila e os workers no loop em execução (na primeira submissão)"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._tasks = [
+                asyncio.ensure_future(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def submit(self, job_type: str, handler: JobHandler) -> Dict:
+        """Enfileirar um job; levanta JobQueueFull se a fila estiver cheia"""
+        self._start()
+        self._prune()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "jobId": job_id,
+            "type": job_type,
+            "status": "queued",
+            "progress": {},
+            "createdAt": time.time(),
+            "startedAt": None,
+            "finishedAt": None,
+            "result": None,
+            "error": None
+        }
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise JobQueueFull(f"Fila de jobs cheia ({self._queue.qsize()} aguardando)")
+
+        self._jobs[job_id] = job
+        self._handlers[job_id] = handler
+        self._finished[job_id] = asyncio.Event()
+        await self._persist(job)
+        logger.info(f"🗂️ Job {job_type} enfileirado: {job_id}")
+        return self._public(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = self._jobs.get(job_id)
+        handler = self._handlers.pop(job_id, None)
+        if job is None or handler is None:
+            return
+
+        def progress(variable: str, done: int, total: int) -> None:
+            job["progress"][variable] = {"done": done, "total": total}
+
+        job["status"] = "running"
+        job["startedAt"] = time.time()
+        await self._persist(job)
+        try:
+            job["result"] = await handler(progress)
+            job["status"] = "done"
+            self._completed += 1
+        except asyncio.CancelledError:
+            job["status"] = "failed"
+            job["error"] = "Job cancelado"
+            raise
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} falhou: {str(e)}")
+            job["status"] = "failed"
+            job["error"] = getattr(e, "detail", None) or str(e)
+            self._failed += 1
+        finally:
+            job["finishedAt"] = time.time()
+            await self._persist(job)
+            self._finished[job_id].set()
+
+    async def _persist(self, job: Dict) -> None:
+        """Espelhar o estado no cache (visível a outras instâncias com Redis)"""
+        await set_cached_data(job_key(job["jobId"]), self._public(job), ttl=self.retention)
+
+    def _prune(self) -> None:
+        """Esquecer jobs terminados há mais tempo que a retenção"""
+        limit = time.time() - self.retention
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in FINISHED and job["finishedAt"] < limit
+        ]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            self._finished.pop(job_id, None)
+
+    @staticmethod
+    def _public(job: Dict) -> Dict:
+        return {**job, "progress": dict(job["progress"])}
+
+    async def get(self, job_id: str, wait: float = 0) -> Optional[Dict]:
+        """
+        Estado do job; com wait > 0 aguarda até ele terminar (long-poll)
+
+        Jobs de outra instância (ou anteriores a um reinício) vêm do cache.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await get_cached_data(job_key(job_id))
+
+        if wait > 0 and job["status"] not in FINISHED:
+            try:
+                await asyncio.wait_for(
+                    self._finished[job_id].wait(),
+                    timeout=min(wait, JOB_LONG_POLL_MAX)
+                )
+            except asyncio.TimeoutError:
+                pass
+        return self._public(job)
+
+    def stats(self) -> Dict:
+        """Estado atual da fila (usado pelo health check)"""
+        running = sum(1 for job in self._jobs.values() if job["status"] == "running")
+        return {
+            "workers": self.workers,
+            "running": running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "maxQueue": self.max_queue,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected
+        }
+
+    async def shutdown(self) -> None:
+        """Cancelar os workers (chamado no shutdown da aplicação)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        logger.info("🛑 Fila de jobs encerrada")
+
+
+# Singleton
+_job_manager = None
+
+def get_job_manager() -> JobManager:
+    """Obter instância única da fila de jobs"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager()
+    return _job_manager
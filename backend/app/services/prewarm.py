@@ -0,0 +1,219 @@
+"""
+SOLARIS - Pré-aquecimento do cache para uma lista de regiões monitoradas
+Um agendador em segundo plano recalcula as regiões mais acessadas antes
+que a entrada do cache vença, então o primeiro visitante do dia não paga a
+busca ao GEE.
+
+A lista (PREWARM_WATCHLIST) é um arquivo JSON com entradas no formato de
+fetchData, mais um nome e, opcionalmente, a janela relativa em dias:
+
+    [{"name": "São Paulo", "coords": {"lat": -23.55, "lng": -46.63},
+      "radius": 10000, "variables": ["LST", "NDVI"], "days": 30}]
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.utils.cache import get_cache_backend
+
+logger = logging.getLogger(__name__)
+
+# Arquivo JSON com a lista de regiões (vazio = pré-aquecimento desligado)
+PREWARM_WATCHLIST = os.getenv("PREWARM_WATCHLIST", "")
+# Regiões aquecidas ao mesmo tempo (orçamento de concorrência no GEE)
+PREWARM_MAX_CONCURRENT = int(os.getenv("PREWARM_MAX_CONCURRENT", "2"))
+# Intervalo entre verificações e nova tentativa após falha (segundos)
+PREWARM_TICK = int(os.getenv("PREWARM_TICK", "60"))
+PREWARM_RETRY = int(os.getenv("PREWARM_RETRY", "300"))
+
+# (entrada) -> (chave de cache, requisição canônica)
+Resolver = Callable[[Dict], Tuple[str, Dict]]
+# (chave, requisição) -> busca e grava no cache
+Loader = Callable[[str, Dict], Awaitable[object]]
+
+
+def load_watchlist(path: str = PREWARM_WATCHLIST) -> List[Dict]:
+    """Ler a lista de regiões (lista vazia se não configurada)"""
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError("A lista de pré-aquecimento deve ser uma lista JSON")
+    for i, entry in enumerate(entries):
+        entry.setdefault("name", f"region-{i}")
+    return entries
+
+
+def lease_key(cache_key: str) -> str:
+    return f"lock:prewarm:{cache_key}"
+
+
+def entry_params(entry: Dict, today: Optional[datetime] = None) -> Dict:
+    """Parâmetros de fetchData da entrada, com a janela relativa resolvida para hoje"""
+    params = {key: value for key, value in entry.items() if key not in ("name", "days")}
+    if entry.get("days"):
+        today = today or datetime.now()
+        params["startDate"] = (today - timedelta(days=int(entry["days"]))).strftime('%Y-%m-%d')
+        params["endDate"] = today.strftime('%Y-%m-%d')
+    return params
+
+
+class Prewarmer:
+    """
+    Agendador de pré-aquecimento
+
+    A cada PREWARM_TICK segundos, aquece as entradas vencidas: as que nunca
+    foram aquecidas, as cuja chave mudou (a janela relativa virou o dia) e as
+    aquecidas há mais de refresh_after segundos, que deve ficar abaixo do
+    TTL soft do cache.
+
+    Com vários workers (Redis compartilhado) cada região é aquecida por um
+    só deles por ciclo: quem consegue a concessão lock:prewarm:<chave>
+    (add/SET NX com TTL refresh_after) busca; os outros só passam a
+    monitorar a chave.
+    """
+
+    def __init__(self, entries: List[Dict], resolve: Resolver, load: Loader,
+                 refresh_after: float, max_concurrent: int = PREWARM_MAX_CONCURRENT):
+        self.resolve = resolve
+        self.load = load
+        self.refresh_after = refresh_after
+        self.max_concurrent = max(1, max_concurrent)
+        self._watched: Dict[str, str] = {}
+        self.set_entries(entries)
+        self._task: Optional[asyncio.Task] = None
+        self._cycles = 0
+        self._warmed = 0
+        self._failed = 0
+        self._leased_elsewhere = 0
+        # Requisições de usuários às chaves monitoradas, por estado do cache
+        self._requests = {"fresh": 0, "stale": 0, "miss": 0}
+
+    def _watch(self, entry: Dict, cache_key: str) -> None:
+        # A chave anterior (janela de ontem) deixa de ser monitorada
+        for key in [k for k, name in self._watched.items() if name == entry["name"]]:
+            del self._watched[key]
+        self._watched[cache_key] = entry["name"]
+
+    def set_entries(self, entries: List[Dict]) -> None:
+        """Trocar a lista de regiões (todas voltam a ficar pendentes)"""
+        self.entries = entries
+        self._watched.clear()
+        self._state: Dict[str, Dict] = {
+            entry["name"]: {
+                "status": "pending", "cacheKey": None, "lastWarmed": None,
+                "nextDue": 0.0, "durationMs": None, "error": None
+            }
+            for entry in entries
+        }
+
+    def start(self) -> None:
+        """Iniciar o laço em segundo plano (no event loop da aplicação)"""
+        if self._task is None and self.entries:
+            self._task = asyncio.ensure_future(self._loop())
+            logger.info(f"🔥 Pré-aquecimento ativo: {len(self.entries)} regiões")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Erro no pré-aquecimento: {str(e)}")
+            await asyncio.sleep(PREWARM_TICK)
+
+    async def run_once(self) -> int:
+        """Aquecer as entradas vencidas agora; retorna quantas foram aquecidas"""
+        now = time.time()
+        due = []
+        for entry in self.entries:
+            state = self._state[entry["name"]]
+            try:
+                cache_key, request = self.resolve(entry_params(entry))
+            except Exception as e:
+                state.update(status="invalid", error=getattr(e, "detail", None) or str(e))
+                continue
+            if cache_key != state["cacheKey"] or now >= state["nextDue"]:
+                due.append((entry, cache_key, request))
+
+        if not due:
+            return 0
+
+        self._cycles += 1
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def warm(entry, cache_key, request):
+            state = self._state[entry["name"]]
+            async with semaphore:
+                # Outro worker já aquece esta região neste ciclo
+                if not await get_cache_backend().add(lease_key(cache_key), 1, int(self.refresh_after)):
+                    self._watch(entry, cache_key)
+                    state.update(
+                        status="leased", cacheKey=cache_key, error=None,
+                        nextDue=time.time() + self.refresh_after
+                    )
+                    self._leased_elsewhere += 1
+                    return False
+
+                state["status"] = "warming"
+                started = time.perf_counter()
+                try:
+                    await self.load(cache_key, request)
+                except Exception as e:
+                    logger.warning(f"⚠️ Falha ao aquecer {entry['name']}: {str(e)}")
+                    # Liberar a concessão: outro worker pode tentar antes do PREWARM_RETRY
+                    await get_cache_backend().delete(lease_key(cache_key))
+                    state.update(
+                        status="failed", cacheKey=cache_key, error=str(e),
+                        nextDue=time.time() + PREWARM_RETRY
+                    )
+                    self._failed += 1
+                    return False
+
+            self._watch(entry, cache_key)
+            state.update(
+                status="warm",
+                cacheKey=cache_key,
+                lastWarmed=time.time(),
+                nextDue=time.time() + self.refresh_after,
+                durationMs=round((time.perf_counter() - started) * 1000, 1),
+                error=None
+            )
+            self._warmed += 1
+            return True
+
+        results = await asyncio.gather(*[warm(*item) for item in due])
+        warmed = sum(results)
+        logger.info(f"🔥 Pré-aquecimento: {warmed}/{len(due)} regiões atualizadas")
+        return warmed
+
+    def record_request(self, cache_key: str, state: Optional[str]) -> None:
+        """Registrar uma requisição de usuário (estado do cache: fresh, stale ou None)"""
+        if cache_key in self._watched:
+            self._requests[state if state in ("fresh", "stale") else "miss"] += 1
+
+    def stats(self) -> Dict:
+        """Progresso do aquecimento e efeito nas requisições das regiões monitoradas"""
+        total = sum(self._requests.values())
+        return {
+            "enabled": self._task is not None,
+            "regions": len(self.entries),
+            "warm": sum(1 for s in self._state.values() if s["status"] == "warm"),
+            "cycles": self._cycles,
+            "warmed": self._warmed,
+            "failed": self._failed,
+            "leasedElsewhere": self._leased_elsewhere,
+            "requests": dict(self._requests),
+            "hitRate": round(self._requests["fresh"] / total, 4) if total else None,
+            "entries": {name: dict(state) for name, state in self._state.items()}
+        }
@@ -0,0 +1,126 @@
+"""
+SOLARIS - Resultados referenciáveis por ID
+Resultados de fetchData (e de jobs) recebem um resultId no servidor; a
+exportação lê o resultado daqui em vez de o cliente reenviar os dados.
+Arquivos exportados por jobs ficam em disco (spool) e só a referência vai
+para o cache.
+"""
+import asyncio
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Iterable, Optional, Union
+
+from app.utils.cache import get_cached_data, set_cached_data
+
+# Por quanto tempo um resultId continua válido (segundos)
+RESULT_TTL = int(os.getenv("RESULT_TTL", "86400"))
+
+# Diretório dos arquivos exportados por jobs; deve ser compartilhado entre
+# as instâncias quando o cache (e portanto o resultId) também é
+EXPORT_SPOOL_DIR = os.getenv("EXPORT_SPOOL_DIR") or os.path.join(tempfile.gettempdir(), "solaris_exports")
+
+RESULT_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+logger = logging.getLogger(__name__)
+
+
+class ResultNotStored(Exception):
+    """O cache recusou o resultado (acima do orçamento ou do limite do backend)"""
+
+
+def result_key(result_id: str) -> str:
+    return f"result:{result_id}"
+
+
+def is_valid_result_id(result_id: Any) -> bool:
+    return isinstance(result_id, str) and bool(RESULT_ID_PATTERN.match(result_id))
+
+
+async def save_result(data: Any, ttl: int = RESULT_TTL) -> str:
+    """Guardar um resultado completo (ex.: saída de job); retorna o resultId"""
+    result_id = uuid.uuid4().hex
+    if not await set_cached_data(result_key(result_id), {"data": data}, ttl=ttl):
+        raise ResultNotStored("Resultado grande demais para ser guardado no servidor")
+    return result_id
+
+
+def _spool_path(result_id: str) -> str:
+    return os.path.join(EXPORT_SPOOL_DIR, f"{result_id}.bin")
+
+
+def _purge_spool(ttl: int) -> None:
+    """Remover arquivos mais antigos que o TTL (o resultId já expirou)"""
+    limit = time.time() - ttl
+    for entry in os.scandir(EXPORT_SPOOL_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < limit:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _write_spool(path: str, chunks: Iterable[Union[str, bytes]], ttl: int) -> int:
+    os.makedirs(EXPORT_SPOOL_DIR, exist_ok=True)
+    _purge_spool(ttl)
+    size = 0
+    try:
+        with open(path, "wb") as f:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                f.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return size
+
+
+async def save_file_result(chunks: Iterable[Union[str, bytes]], media_type: str, filename: str,
+                           ttl: int = RESULT_TTL) -> Dict:
+    """
+    Gravar um arquivo gerado em blocos no spool e registrá-lo por resultId
+
+    Os blocos são gravados em uma thread, sem montar o arquivo na memória.
+    Retorna {resultId, bytes}.
+    """
+    result_id = uuid.uuid4().hex
+    path = _spool_path(result_id)
+    size = await asyncio.to_thread(_write_spool, path, chunks, ttl)
+    record = {"file": path, "mediaType": media_type, "filename": filename, "bytes": size}
+    if not await set_cached_data(result_key(result_id), {"data": record}, ttl=ttl):
+        os.remove(path)
+        raise ResultNotStored("Não foi possível registrar o arquivo exportado")
+    logger.info(f"📦 Exportação gravada em disco: {size} bytes ({result_id})")
+    return {"resultId": result_id, "bytes": size}
+
+
+async def save_result_reference(result_id: str, cache_key: str, request: Dict,
+                                ttl: int = RESULT_TTL) -> bool:
+    """
+    Registrar um resultado que já está no cache de satélite
+
+    Só a chave e a requisição canônica são guardadas: os dados não são
+    duplicados e podem ser buscados de novo se a entrada expirar.
+    """
+    return await set_cached_data(
+        result_key(result_id),
+        {"cacheKey": cache_key, "request": request},
+        ttl=ttl
+    )
+
+
+async def get_result(result_id: str) -> Optional[Dict]:
+    """
+    Registro do resultado: {"data": ...} ou {"cacheKey", "request"}
+
+    None se o ID for inválido ou tiver expirado.
+    """
+    if not is_valid_result_id(result_id):
+        return None
+    return await get_cached_data(result_key(result_id))
@@ -0,0 +1,128 @@
+"""
+SOLARIS - Junção espacial das amostras e camada de risco por ponto
+Cada variável é amostrada em pontos diferentes; aqui as amostras são
+alinhadas por vizinho mais próximo (KD-tree) para calcular a
+vulnerabilidade ponto a ponto em vez de uma média regional.
+"""
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from app.services.ai_model import VULNERABILITY_FACTORS, score_vulnerability
+from app.utils.point_set import EARTH_RADIUS_M, PointSet, as_point_set
+
+# Distância máxima (metros) entre um ponto e a amostra de outra variável
+SPATIAL_JOIN_TOLERANCE_M = float(os.getenv("SPATIAL_JOIN_TOLERANCE_M", "1000"))
+
+# Variável (nome da banda) -> chave de entrada do cálculo de vulnerabilidade
+VARIABLE_KEYS = {variable: key for key, (_, variable, _) in VULNERABILITY_FACTORS.items()}
+
+
+def to_unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Coordenadas na esfera unitária (x, y, z): distância euclidiana ~ distância real"""
+    phi = np.radians(lat)
+    lam = np.radians(lon)
+    cos_phi = np.cos(phi)
+    return np.column_stack((cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)))
+
+
+def chord_length(distance_m: float) -> float:
+    """Corda na esfera unitária correspondente a uma distância na superfície"""
+    return 2 * np.sin(min(distance_m / EARTH_RADIUS_M, np.pi) / 2)
+
+
+def join_nearest(base: PointSet, other: PointSet, variable: str,
+                 tolerance_m: float = SPATIAL_JOIN_TOLERANCE_M) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Valor de `variable` da amostra de `other` mais próxima de cada ponto de base
+
+    Constrói a KD-tree sobre other (O(m log m)) e consulta os n pontos de
+    base (O(n log m)). Retorna (valores, distâncias em metros); pontos sem
+    amostra a até tolerance_m recebem NaN.
+    """
+    values = np.full(len(base), np.nan, dtype=np.float32)
+    distances = np.full(len(base), np.inf)
+
+    # Só amostras com valor: um vizinho NaN não pode esconder outro válido
+    column = other.column(variable)
+    valid = ~np.isnan(column)
+    if len(base) == 0 or not valid.any():
+        return values, distances
+
+    tree = cKDTree(to_unit_vectors(other.lat[valid], other.lon[valid]), balanced_tree=False)
+    chords, indices = tree.query(
+        to_unit_vectors(base.lat, base.lon),
+        k=1,
+        distance_upper_bound=chord_length(tolerance_m)
+    )
+
+    matched = np.isfinite(chords)
+    values[matched] = column[valid][indices[matched]]
+    distances[matched] = 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(chords[matched] / 2, 1.0))
+    return values, distances
+
+
+def join_variables(results: Dict, base_variable: Optional[str] = None,
+                   tolerance_m: float = SPATIAL_JOIN_TOLERANCE_M) -> Tuple[PointSet, Dict]:
+    """
+    Alinhar as amostras de várias variáveis nos pontos de uma delas
+
+    results segue o formato do gee_client ({variável: {"points": PointSet}}).
+    A base é base_variable, ou LST se presente (o sinal de calor), ou a
+    variável com mais amostras. Retorna o PointSet alinhado (uma coluna por
+    variável) e a fração de pontos com par encontrado por variável.
+    """
+    point_sets = {}
+    for variable, data in results.items():
+        point_set = as_point_set(data, variable)
+        if point_set is not None:
+            point_sets[variable] = point_set
+
+    if not point_sets:
+        return PointSet.empty(), {}
+
+    if base_variable is None:
+        base_variable = "LST" if "LST" in point_sets else max(point_sets, key=lambda v: len(point_sets[v]))
+    if base_variable not in point_sets:
+        raise ValueError(f"Variável base ausente: {base_variable}")
+
+    base = point_sets[base_variable]
+    columns = {base_variable: base.column(base_variable)}
+    matched = {base_variable: 1.0}
+
+    for variable, point_set in point_sets.items():
+        if variable == base_variable:
+            continue
+        values, _ = join_nearest(base, point_set, variable, tolerance_m)
+        columns[variable] = values
+        matched[variable] = float(np.mean(~np.isnan(values))) if len(values) else 0.0
+
+    joined = PointSet(base.lat, base.lon, columns, {"base": base_variable, "toleranceM": tolerance_m})
+    return joined, matched
+
+
+def vulnerability_layer(results: Dict, weights: Optional[Dict] = None,
+                        base_variable: Optional[str] = None,
+                        tolerance_m: float = SPATIAL_JOIN_TOLERANCE_M) -> Tuple[PointSet, Dict]:
+    """
+    Camada de risco de calor por ponto
+
+    Junta as variáveis e calcula a vulnerabilidade de cada ponto com as
+    mesmas fórmulas e pesos de calculate_vulnerability. O PointSet
+    retornado tem as colunas das variáveis e a coluna "RISK" (0-100).
+    """
+    joined, matched = join_variables(results, base_variable, tolerance_m)
+
+    inputs = {
+        VARIABLE_KEYS[variable]: column.astype(np.float64)
+        for variable, column in joined.values.items()
+        if variable in VARIABLE_KEYS
+    }
+    if not inputs:
+        raise ValueError("Nenhuma variável usada no cálculo de vulnerabilidade")
+
+    risk, _ = score_vulnerability(inputs, len(joined), weights)
+    joined.values["RISK"] = risk.astype(np.float32)
+    return joined, matched
@@ -0,0 +1,226 @@
+"""
+SOLARIS - Campos sintéticos determinísticos para o modo mock
+Gera amostras plausíveis sem o GEE: a mesma requisição sempre produz os
+mesmos pontos, e os valores vêm de um campo espacial contínuo (núcleos
+urbanos quentes, vegetação onde a urbanização é baixa), calculado em NumPy
+para milhões de pontos. Serve também de backend rápido para benchmarks.
+"""
+import math
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.utils.cache_keys import canonical_geometry, fingerprint
+from app.utils.point_set import PointSet
+
+# Pontos por variável em cada requisição mockada
+MOCK_POINTS = int(os.getenv("MOCK_POINTS", "50"))
+
+METERS_PER_DEGREE = 111320.0
+
+# Região padrão quando a requisição não tem geometria (Brasília)
+DEFAULT_CENTER = (-15.7801, -47.9292)
+DEFAULT_DELTA = 0.05
+
+# Escalas do campo urbano: (tamanho da célula em graus, probabilidade de um
+# núcleo na célula, faixa do desvio do núcleo em graus, faixa de amplitude).
+# Os núcleos dependem só da célula, não da requisição: tiles vizinhos veem o
+# mesmo campo.
+URBAN_SCALES = (
+    (0.25, 0.7, (0.04, 0.09), (0.8, 1.6)),     # metrópole
+    (0.03, 0.5, (0.004, 0.01), (0.2, 0.6)),    # bairros
+)
+WATER_SCALE = (0.05, 0.25, (0.003, 0.008), (1.0, 2.0))
+
+_U64 = np.uint64
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """Finalizador splitmix64 (vetorizado, uint64 com overflow intencional)"""
+    with np.errstate(over="ignore"):
+        h = (h ^ (h >> _U64(30))) * _U64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> _U64(27))) * _U64(0x94D049BB133111EB)
+        return h ^ (h >> _U64(31))
+
+
+def _cell_uniform(ix: np.ndarray, iy: np.ndarray, salt: int) -> np.ndarray:
+    """Número em [0, 1) fixo por célula (ix, iy) e salt"""
+    with np.errstate(over="ignore"):
+        h = (
+            ix.astype(np.int64).view(np.uint64) * _U64(0x9E3779B97F4A7C15)
+            ^ iy.astype(np.int64).view(np.uint64) * _U64(0xC2B2AE3D27D4EB4F)
+            ^ _U64(salt)
+        )
+    return (_mix(h) >> _U64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def _blob_field(lat: np.ndarray, lon: np.ndarray, scale, salt: int) -> np.ndarray:
+    """
+    Soma de núcleos gaussianos das 3x3 células em volta de cada ponto
+
+    Os parâmetros dos núcleos são calculados uma vez por célula da área
+    (poucas) e indexados por ponto.
+    """
+    cell, probability, (sigma_min, sigma_max), (amp_min, amp_max) = scale
+    field = np.zeros(len(lat))
+    if len(lat) == 0:
+        return field
+
+    cx = np.floor(lon / cell).astype(np.int64)
+    cy = np.floor(lat / cell).astype(np.int64)
+    x0, y0 = cx.min() - 1, cy.min() - 1
+    ix, iy = np.meshgrid(np.arange(x0, cx.max() + 2), np.arange(y0, cy.max() + 2), indexing="ij")
+
+    # Célula sem núcleo: amplitude zero
+    amplitude = np.where(
+        _cell_uniform(ix, iy, salt) < probability,
+        amp_min + (amp_max - amp_min) * _cell_uniform(ix, iy, salt + 4),
+        0.0
+    )
+    core_lon = (ix + _cell_uniform(ix, iy, salt + 1)) * cell
+    core_lat = (iy + _cell_uniform(ix, iy, salt + 2)) * cell
+    sigma = sigma_min + (sigma_max - sigma_min) * _cell_uniform(ix, iy, salt + 3)
+    inv_two_sigma2 = 1.0 / (2 * sigma ** 2)
+
+    # Índice linear da célula de cada ponto: vizinha (dx, dy) = base + dx * ny + dy
+    ny = ix.shape[1]
+    base = (cx - x0) * ny + (cy - y0)
+    amplitude, core_lon, core_lat = amplitude.ravel(), core_lon.ravel(), core_lat.ravel()
+    inv_two_sigma2 = inv_two_sigma2.ravel()
+
+    kx = np.cos(np.radians(lat))
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            index = base + (dx * ny + dy)
+            d2 = ((lon - core_lon.take(index)) * kx) ** 2 + (lat - core_lat.take(index)) ** 2
+            d2 *= inv_two_sigma2.take(index)
+            field += amplitude.take(index) * np.exp(-d2)
+    return field
+
+
+def urban_intensity(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Intensidade urbana em [0, 1) (núcleos quentes, bordas vegetadas)"""
+    total = sum(_blob_field(lat, lon, scale, 101 + 10 * i) for i, scale in enumerate(URBAN_SCALES))
+    return 1.0 - np.exp(-total)
+
+
+def water_fraction(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Presença de água em [0, 1) (lagos e rios esparsos)"""
+    return 1.0 - np.exp(-_blob_field(lat, lon, WATER_SCALE, 301))
+
+
+def _decimal_year(start_date: Optional[str], end_date: Optional[str]) -> float:
+    """Meio da janela de datas em anos decimais (hoje se ausente)"""
+    dates = [datetime.strptime(d[:10], '%Y-%m-%d') for d in (start_date, end_date) if d]
+    middle = dates[0] + (dates[-1] - dates[0]) / 2 if dates else datetime.now()
+    start = datetime(middle.year, 1, 1)
+    return middle.year + (middle - start).days / 365.25
+
+
+def synthetic_region(coords: Optional[Dict] = None, bounds: Optional[Dict] = None,
+                     radius_m: Optional[float] = None, start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> Dict:
+    """
+    Região da requisição calculada localmente (sem getInfo no GEE)
+
+    A semente vem da geometria canônica e das datas: requisições
+    equivalentes geram os mesmos pontos.
+    """
+    if coords:
+        lat, lng = coords['lat'], coords['lng']
+        delta_lat = radius_m / METERS_PER_DEGREE
+        delta_lng = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        bbox = {"north": lat + delta_lat, "south": lat - delta_lat,
+                "east": lng + delta_lng, "west": lng - delta_lng}
+    elif bounds:
+        bbox = dict(bounds)
+        radius_m = None
+    else:
+        lat, lng = DEFAULT_CENTER
+        bbox = {"north": lat + DEFAULT_DELTA, "south": lat - DEFAULT_DELTA,
+                "east": lng + DEFAULT_DELTA, "west": lng - DEFAULT_DELTA}
+        radius_m = None
+
+    geometry = canonical_geometry(coords, bounds, radius_m) if coords or bounds else None
+    seed = fingerprint({"geometry": geometry, "startDate": start_date, "endDate": end_date})
+    return {
+        "bbox": bbox,
+        "center": ((bbox['north'] + bbox['south']) / 2, (bbox['east'] + bbox['west']) / 2),
+        "radiusM": radius_m,
+        "year": _decimal_year(start_date, end_date),
+        "seed": seed
+    }
+
+
+def sample_points(region: Dict, n: int, rng: np.random.Generator):
+    """Pontos uniformes dentro do círculo (coords + raio) ou do retângulo"""
+    bbox = region["bbox"]
+    if region["radiusM"]:
+        lat0, lng0 = region["center"]
+        r = region["radiusM"] * np.sqrt(rng.random(n))
+        theta = 2 * np.pi * rng.random(n)
+        lat = lat0 + r * np.sin(theta) / METERS_PER_DEGREE
+        lon = lng0 + r * np.cos(theta) / (METERS_PER_DEGREE * max(math.cos(math.radians(lat0)), 1e-6))
+        return lat, lon
+    lat = bbox['south'] + (bbox['north'] - bbox['south']) * rng.random(n)
+    lon = bbox['west'] + (bbox['east'] - bbox['west']) * rng.random(n)
+    return lat, lon
+
+
+def synthetic_values(variable: str, lat: np.ndarray, lon: np.ndarray, urban: np.ndarray,
+                     water: np.ndarray, year: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Valores de uma variável a partir dos campos urbano e de água
+
+    LST sobe com a urbanização (ilha de calor), a latitude, a estação e um
+    aquecimento lento ao longo dos anos; NDVI cai com a urbanização, então
+    LST e NDVI saem negativamente correlacionados como nos dados reais.
+    """
+    n = len(lat)
+    # Verão no hemisfério da amostra: pico em julho ao norte, em janeiro ao sul
+    season = np.cos(2 * np.pi * (year % 1 - 0.55)) * np.sign(lat)
+
+    if variable == "LST":
+        values = (
+            31 - 0.25 * np.abs(lat) + 12 * urban - 6 * water + 4 * season
+            + 0.04 * (year - 2000) + rng.normal(0, 1.0, n)
+        )
+    elif variable == "NDVI":
+        values = np.clip(0.75 - 0.6 * urban - 0.5 * water + 0.05 * season + rng.normal(0, 0.05, n), -0.2, 0.9)
+    elif variable == "NDBI":
+        values = np.clip(-0.3 + 0.6 * urban - 0.2 * water + rng.normal(0, 0.05, n), -0.5, 0.5)
+    elif variable == "NDWI":
+        values = np.clip(-0.25 - 0.1 * urban + 0.7 * water + rng.normal(0, 0.04, n), -0.5, 0.6)
+    elif variable == "POP_DENS":
+        values = (100 + 8000 * urban ** 1.5) * (1 - water) * rng.lognormal(0, 0.25, n)
+    elif variable == "NIGHT_LIGHTS":
+        values = np.clip(2 + 90 * urban ** 1.2 * (1 - water) + rng.normal(0, 3, n), 0, 100)
+    else:
+        values = 100 * urban + rng.normal(0, 5, n)
+    return values
+
+
+def generate_field(region: Dict, variables: List[str], n_points: int = MOCK_POINTS,
+                   stream: str = "") -> PointSet:
+    """
+    PointSet sintético com as variáveis pedidas nos mesmos pontos
+
+    stream separa fontes diferentes (ex.: MODIS e Landsat amostram pontos
+    diferentes); o campo de fundo é o mesmo para todas.
+    """
+    def rng(*key) -> np.random.Generator:
+        return np.random.default_rng(int(fingerprint([region["seed"], stream, *key]), 16))
+
+    lat, lon = sample_points(region, n_points, rng())
+    urban = urban_intensity(lat, lon)
+    water = water_fraction(lat, lon)
+
+    # Ruído com semente própria por variável: independe da ordem pedida
+    values = {}
+    for variable in variables:
+        values[variable] = np.round(
+            synthetic_values(variable, lat, lon, urban, water, region["year"], rng(variable)), 4
+        )
+    return PointSet(lat, lon, values)
@@ -0,0 +1,333 @@
+"""
+SOLARIS - Cache espacial por tiles
+Decompõe a área pedida em tiles XYZ fixos: cada tile é buscado e cacheado por
+variável e janela de datas, então viewports que se sobrepõem reaproveitam o
+trabalho já feito e só os tiles inéditos vão para o GEE.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.gee_client import get_multiple_variables, get_unit, resolve_radius
+from app.utils.cache import get_many_cached_data, set_many_cached_data
+from app.utils.metrics import STAGE_SECONDS
+from app.utils.point_set import PointSet
+from app.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Faixa de zoom da grade e limite de tiles por requisição
+TILE_MIN_ZOOM = int(os.getenv("TILE_MIN_ZOOM", "6"))
+TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", "14"))
+TILE_MAX_TILES = int(os.getenv("TILE_MAX_TILES", "12"))
+# Tiles buscados em paralelo no GEE por requisição
+TILE_MAX_CONCURRENT = int(os.getenv("TILE_MAX_CONCURRENT", "4"))
+# TTL dos tiles no cache (segundos)
+TILE_CACHE_TTL = int(os.getenv("TILE_CACHE_TTL", "3600"))
+
+# Buscas (tile, variável) em andamento: requisições concorrentes que se
+# sobrepõem aguardam a mesma busca em vez de repetir a chamada ao GEE
+tile_flight = SingleFlight("tile")
+
+# Série de métrica da montagem da resposta a partir dos tiles
+TILE_MERGE = STAGE_SECONDS.labels("tile_merge")
+
+METERS_PER_DEGREE = 111320.0
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def lng_to_tile_x(lng: float, zoom: int) -> int:
+    """Coluna do tile XYZ que contém a longitude"""
+    n = 2 ** zoom
+    return min(n - 1, max(0, int((lng + 180.0) / 360.0 * n)))
+
+
+def lat_to_tile_y(lat: float, zoom: int) -> int:
+    """Linha do tile XYZ (Web Mercator) que contém a latitude"""
+    n = 2 ** zoom
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    lat_rad = math.radians(lat)
+    y = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return min(n - 1, max(0, int(y)))
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Dict:
+    """Bounds {north, south, east, west} de um tile XYZ"""
+    n = 2 ** zoom
+
+    def tile_lat(ty: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return {
+        "north": tile_lat(y),
+        "south": tile_lat(y + 1),
+        "west": x / n * 360.0 - 180.0,
+        "east": (x + 1) / n * 360.0 - 180.0
+    }
+
+
+def quadkey(zoom: int, x: int, y: int) -> str:
+    """Quadkey (estilo Bing) do tile: identificador compacto e hierárquico"""
+    digits = []
+    for i in range(zoom, 0, -1):
+        mask = 1 << (i - 1)
+        digit = 0
+        if x & mask:
+            digit += 1
+        if y & mask:
+            digit += 2
+        digits.append(str(digit))
+    return "".join(digits)
+
+
+def request_bbox(coords: Optional[Dict] = None,
+                 bounds: Optional[Dict] = None,
+                 radius: Optional[float] = None) -> Dict:
+    """Retângulo envolvente da geometria pedida (círculo ou retângulo)"""
+    if coords:
+        radius_m = resolve_radius(radius)
+        delta_lat = radius_m / METERS_PER_DEGREE
+        delta_lng = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(coords['lat'])), 1e-6))
+        return {
+            "north": coords['lat'] + delta_lat,
+            "south": coords['lat'] - delta_lat,
+            "east": coords['lng'] + delta_lng,
+            "west": coords['lng'] - delta_lng
+        }
+    if bounds:
+        return dict(bounds)
+    raise ValueError("Forneça coords ou bounds")
+
+
+class AreaTooLarge(ValueError):
+    """Área que não cabe em TILE_MAX_TILES tiles nem no menor zoom (400)"""
+
+
+def tile_range(bbox: Dict, zoom: int) -> Tuple[int, int, int, int]:
+    """(x_min, x_max, y_min, y_max) dos tiles XYZ que cobrem o retângulo"""
+    return (
+        lng_to_tile_x(bbox['west'], zoom),
+        lng_to_tile_x(bbox['east'], zoom),
+        lat_to_tile_y(bbox['north'], zoom),
+        lat_to_tile_y(bbox['south'], zoom)
+    )
+
+
+def tile_count(bbox: Dict, zoom: int) -> int:
+    """Número de tiles que cobrem o retângulo (sem montar a lista)"""
+    x_min, x_max, y_min, y_max = tile_range(bbox, zoom)
+    return (x_max - x_min + 1) * (y_max - y_min + 1)
+
+
+def tiles_for_bbox(bbox: Dict, zoom: int) -> List[Tuple[int, int, int]]:
+    """Tiles XYZ que cobrem o retângulo"""
+    x_min, x_max, y_min, y_max = tile_range(bbox, zoom)
+
+    return [
+        (zoom, x, y)
+        for x in range(x_min, x_max + 1)
+        for y in range(y_min, y_max + 1)
+    ]
+
+
+def choose_zoom(bbox: Dict, max_tiles: int = TILE_MAX_TILES) -> int:
+    """
+    Maior zoom da faixa configurada em que a área cabe em max_tiles tiles
+
+    Levanta AreaTooLarge se nem TILE_MIN_ZOOM basta: a busca não se
+    espalha em um número arbitrário de chamadas ao GEE.
+    """
+    for zoom in range(TILE_MAX_ZOOM, TILE_MIN_ZOOM - 1, -1):
+        if tile_count(bbox, zoom) <= max_tiles:
+            return zoom
+    raise AreaTooLarge(
+        f"Área grande demais: precisa de {tile_count(bbox, TILE_MIN_ZOOM)} tiles "
+        f"no zoom {TILE_MIN_ZOOM} (máximo {max_tiles}). Reduza a área"
+    )
+
+
+def tile_cache_key(tile: Tuple[int, int, int], variable: str,
+                   start_date: str, end_date: str) -> str:
+    """Chave de cache de uma variável em um tile e janela de datas"""
+    return f"tile:{quadkey(*tile)}:{variable}:{start_date}:{end_date}"
+
+
+def _select_variable(data: Dict, variable: str) -> Dict:
+    """Manter só a coluna da variável (índices Landsat vêm juntos)"""
+    points = data["points"].select([variable])
+    return {**data, "points": points, "count": len(points)}
+
+
+async def fetch_tiled(coords: Optional[Dict] = None,
+                      bounds: Optional[Dict] = None,
+                      radius: Optional[float] = None,
+                      variables: List[str] = None,
+                      start_date: str = None,
+                      end_date: str = None,
+                      refresh: bool = False,
+                      on_progress: Optional[Callable[[str, int, int], None]] = None) -> Tuple[Dict, Dict]:
+    """
+    Buscar variáveis montando a resposta a partir de tiles cacheados
+
+    Retorna (dados por variável, estatísticas dos tiles). Só os pares
+    (tile, variável) ausentes do cache vão para o GEE; com refresh=True
+    todos os tiles são buscados de novo (atualização de entradas stale).
+    on_progress(variável, tiles prontos, total) é chamado a cada tile.
+    """
+    variables = list(dict.fromkeys(variables or ["LST", "NDVI"]))
+    bbox = request_bbox(coords, bounds, radius)
+    zoom = choose_zoom(bbox)
+    tiles = tiles_for_bbox(bbox, zoom)
+
+    keys = {
+        (tile, variable): tile_cache_key(tile, variable, start_date, end_date)
+        for tile in tiles
+        for variable in variables
+    }
+    cached = {} if refresh else await get_many_cached_data(list(keys.values()))
+
+    tile_data = {pair: cached[key] for pair, key in keys.items() if key in cached}
+    missing = {}
+    for tile, variable in keys:
+        if (tile, variable) not in tile_data:
+            missing.setdefault(tile, []).append(variable)
+
+    done = {variable: 0 for variable in variables}
+
+    def report(variable: str) -> None:
+        done[variable] += 1
+        if on_progress is not None:
+            on_progress(variable, done[variable], len(tiles))
+
+    for _, variable in tile_data:
+        done[variable] += 1
+    if on_progress is not None:
+        for variable in variables:
+            on_progress(variable, done[variable], len(tiles))
+
+    logger.info(
+        f"🧩 Tiles z{zoom}: {len(tiles)} no total, {len(tiles) - len(missing)} em cache, "
+        f"{len(missing)} a buscar"
+    )
+
+    # Reservar os pares ausentes; os já em andamento em outra requisição
+    # são apenas aguardados
+    owned = {}
+    waiting = {}
+    for tile, tile_variables in missing.items():
+        for variable in tile_variables:
+            future = tile_flight.claim(keys[(tile, variable)])
+            if future is None:
+                owned.setdefault(tile, []).append(variable)
+            else:
+                waiting[(tile, variable)] = future
+
+    semaphore = asyncio.Semaphore(max(1, TILE_MAX_CONCURRENT))
+
+    async def fetch_tile(tile, tile_variables):
+        try:
+            async with semaphore:
+                data = await get_multiple_variables(
+                    bounds=tile_bounds(*tile),
+                    start_date=start_date,
+                    end_date=end_date,
+                    variables=tile_variables
+                )
+        except BaseException as e:
+            for variable in tile_variables:
+                tile_flight.fail(keys[(tile, variable)], e)
+            raise
+
+        fetched = {}
+        for variable in tile_variables:
+            fetched[variable] = _select_variable(data[variable], variable)
+            tile_flight.resolve(keys[(tile, variable)], fetched[variable])
+            report(variable)
+        return tile, fetched
+
+    async def wait_tile(pair, future):
+        try:
+            return pair, await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Só a busca da outra requisição foi cancelada, não esta
+            if not future.cancelled():
+                raise
+            error = "Busca do tile cancelada"
+        except Exception as e:
+            error = str(e)
+
+        tile, variable = pair
+        return pair, {
+            "variable": variable,
+            "unit": get_unit(variable),
+            "error": error,
+            "points": PointSet.empty([variable]),
+            "count": 0
+        }
+
+    tasks = [asyncio.ensure_future(fetch_tile(tile, v)) for tile, v in owned.items()]
+    try:
+        fetched = await asyncio.gather(*tasks)
+    except BaseException as e:
+        # Liberar as chaves das tarefas ainda pendentes
+        for task in tasks:
+            task.cancel()
+        for tile, tile_variables in owned.items():
+            for variable in tile_variables:
+                tile_flight.fail(keys[(tile, variable)], e)
+        raise
+
+    to_cache = {}
+    for tile, data in fetched:
+        for variable, variable_data in data.items():
+            tile_data[(tile, variable)] = variable_data
+            # Falhas não são cacheadas: o tile volta a ser buscado na próxima vez
+            if not variable_data.get("error"):
+                to_cache[keys[(tile, variable)]] = variable_data
+
+    if to_cache:
+        await set_many_cached_data(to_cache, ttl=TILE_CACHE_TTL)
+
+    for pair, variable_data in await asyncio.gather(*[
+        wait_tile(pair, future) for pair, future in waiting.items()
+    ]):
+        tile_data[pair] = variable_data
+        report(pair[1])
+
+    # Montar a resposta recortando os tiles à geometria pedida
+    started = time.perf_counter()
+    results = {}
+    for variable in variables:
+        parts = [tile_data[(tile, variable)] for tile in tiles]
+        points = PointSet.concat([part["points"] for part in parts])
+        if coords:
+            points = points.filter(points.within_radius(coords['lat'], coords['lng'], resolve_radius(radius)))
+        else:
+            points = points.filter(points.within_bounds(bbox))
+        first = parts[0] if parts else {}
+        result = {
+            "variable": variable,
+            "unit": first.get("unit", get_unit(variable)),
+            "source": first.get("source", ""),
+            "points": points,
+            "count": len(points)
+        }
+        if any(part.get("mock") for part in parts):
+            result["mock"] = True
+        errors = [part["error"] for part in parts if part.get("error")]
+        if errors:
+            result["error"] = errors[0]
+        results[variable] = result
+    TILE_MERGE.observe_since(started)
+
+    stats = {
+        "zoom": zoom,
+        "total": len(tiles),
+        "hits": len(tiles) - len(missing),
+        "misses": len(missing),
+        "coalesced": len(waiting)
+    }
+    return results, stats
@@ -0,0 +1,176 @@
+"""
+SOLARIS - Séries temporais de vários anos por janelas de datas
+Divide o período pedido em janelas de calendário (mês ou ano), busca as
+janelas em paralelo e guarda o resumo de cada uma no cache separadamente:
+estender a série em um mês busca só a janela nova.
+"""
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.gee_client import canonical_request
+from app.services.tiling import fetch_tiled
+from app.utils.cache import get_many_cached_data, set_many_cached_data
+from app.utils.cache_keys import fingerprint, make_cache_key
+from app.utils.point_set import as_point_set
+
+logger = logging.getLogger(__name__)
+
+# Período máximo de uma série (anos)
+TIMESERIES_MAX_YEARS = int(os.getenv("TIMESERIES_MAX_YEARS", "20"))
+# Janelas buscadas em paralelo por série (cada uma ainda passa pelo executor do GEE)
+TIMESERIES_MAX_CONCURRENT = int(os.getenv("TIMESERIES_MAX_CONCURRENT", "4"))
+# TTL do resumo de janelas já encerradas (o passado não muda) e da janela corrente
+TIMESERIES_WINDOW_TTL = int(os.getenv("TIMESERIES_WINDOW_TTL", "604800"))
+TIMESERIES_OPEN_WINDOW_TTL = int(os.getenv("TIMESERIES_OPEN_WINDOW_TTL", "3600"))
+
+AGGREGATIONS = ("monthly", "annual")
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def split_windows(start_date: str, end_date: str, aggregation: str) -> List[Tuple[str, str]]:
+    """
+    Janelas (início, fim) inclusivas que cobrem o período
+
+    As janelas seguem o calendário (mês ou ano civil), recortadas ao
+    período: a mesma janela tem sempre as mesmas datas, e portanto a mesma
+    chave de cache, em séries que se sobrepõem.
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Agregação desconhecida: {aggregation}. Use: {', '.join(AGGREGATIONS)}")
+
+    start, end = _parse_date(start_date), _parse_date(end_date)
+    windows = []
+    current = start
+    while current <= end:
+        if aggregation == "monthly":
+            next_start = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+        else:
+            next_start = date(current.year + 1, 1, 1)
+        window_end = min(next_start - timedelta(days=1), end)
+        windows.append((current.isoformat(), window_end.isoformat()))
+        current = next_start
+    return windows
+
+
+def window_midpoint(window: Tuple[str, str]) -> str:
+    """Data central da janela (referência temporal de cada valor da série)"""
+    start, end = _parse_date(window[0]), _parse_date(window[1])
+    return (start + (end - start) / 2).isoformat()
+
+
+def summarize_window(data: Dict, variables: List[str]) -> Dict:
+    """Estatísticas por variável dos pontos de uma janela (mean/min/max/count)"""
+    summary = {}
+    for variable in variables:
+        variable_data = data.get(variable)
+        points = as_point_set(variable_data, variable)
+        column = points.column(variable) if points is not None else np.empty(0)
+        valid = column[~np.isnan(column)].astype(np.float64)
+        if len(valid):
+            summary[variable] = {
+                "mean": round(float(valid.mean()), 4),
+                "min": round(float(valid.min()), 4),
+                "max": round(float(valid.max()), 4),
+                "count": int(len(valid))
+            }
+        else:
+            summary[variable] = {"mean": None, "min": None, "max": None, "count": 0}
+        if isinstance(variable_data, dict) and variable_data.get("error"):
+            summary[variable]["error"] = variable_data["error"]
+    return summary
+
+
+async def fetch_time_series(coords: Optional[Dict] = None,
+                            bounds: Optional[Dict] = None,
+                            radius: Optional[float] = None,
+                            variables: List[str] = None,
+                            start_date: str = None,
+                            end_date: str = None,
+                            aggregation: str = "monthly",
+                            on_progress=None) -> Dict:
+    """
+    Série de resumos por janela da área pedida
+
+    Retorna {aggregation, windows: [{start, end, date, <variável>: resumo}],
+    series: {dates, <variável>: médias}, stats}. "series" tem o formato
+    aceito por /predict (data.series). Só as janelas ausentes do cache são
+    buscadas, no máximo TIMESERIES_MAX_CONCURRENT ao mesmo tempo.
+    on_progress("windows", prontas, total) é chamado a cada janela concluída.
+    """
+    variables = list(dict.fromkeys(variables or ["LST", "NDVI"]))
+    windows = split_windows(start_date, end_date, aggregation)
+    today = date.today()
+
+    keys = {
+        window: make_cache_key("series", fingerprint(canonical_request(
+            coords=coords, bounds=bounds, radius=radius, variables=variables,
+            start_date=window[0], end_date=window[1]
+        )))
+        for window in windows
+    }
+    cached = await get_many_cached_data(list(keys.values()))
+    summaries = {window: cached[key] for window, key in keys.items() if key in cached}
+    missing = [window for window in windows if window not in summaries]
+
+    logger.info(
+        f"📈 Série {aggregation}: {len(windows)} janelas, {len(summaries)} em cache, "
+        f"{len(missing)} a buscar"
+    )
+
+    semaphore = asyncio.Semaphore(max(1, TIMESERIES_MAX_CONCURRENT))
+    done = len(summaries)
+    if on_progress is not None:
+        on_progress("windows", done, len(windows))
+
+    async def fetch_window(window):
+        async with semaphore:
+            data, _ = await fetch_tiled(
+                coords=coords, bounds=bounds, radius=radius, variables=variables,
+                start_date=window[0], end_date=window[1]
+            )
+        nonlocal done
+        done += 1
+        if on_progress is not None:
+            on_progress("windows", done, len(windows))
+        return window, summarize_window(data, variables)
+
+    fetched = await asyncio.gather(*[fetch_window(window) for window in missing])
+
+    closed, open_windows = {}, {}
+    for window, summary in fetched:
+        summaries[window] = summary
+        # Janelas com falha não são cacheadas: voltam a ser buscadas na próxima vez
+        if any(s.get("error") for s in summary.values()):
+            continue
+        target = open_windows if _parse_date(window[1]) >= today else closed
+        target[keys[window]] = summary
+    if closed:
+        await set_many_cached_data(closed, ttl=TIMESERIES_WINDOW_TTL)
+    if open_windows:
+        await set_many_cached_data(open_windows, ttl=TIMESERIES_OPEN_WINDOW_TTL)
+
+    rows = []
+    series = {"dates": []}
+    for variable in variables:
+        series[variable] = []
+    for window in windows:
+        midpoint = window_midpoint(window)
+        rows.append({"start": window[0], "end": window[1], "date": midpoint, **summaries[window]})
+        series["dates"].append(midpoint)
+        for variable in variables:
+            series[variable].append(summaries[window][variable]["mean"])
+
+    return {
+        "aggregation": aggregation,
+        "windows": rows,
+        "series": series,
+        "stats": {"windows": len(windows), "hits": len(windows) - len(missing), "misses": len(missing)}
+    }
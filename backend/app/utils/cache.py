@@ -1,44 +1,81 @@
 """
-Sistema de cache usando Redis
+Sistema de cache com backends plugáveis
+O backend configurado em CACHE_BACKEND (memória local por worker ou Redis
+compartilhado) recebe todas as operações; este módulo acrescenta métricas,
+tratamento de erros e o stale-while-revalidate por cima dele.
 """
+import asyncio
 import json
-from typing import Any, Optional
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import logging
 
+from app.utils.cache_backends import CacheBackend, create_cache_backend
+from app.utils.metrics import STAGE_SECONDS
+
 logger = logging.getLogger(__name__)
 
-# Cache simples em memória para desenvolvimento
-_memory_cache = {}
+# Séries de métrica dos estágios de leitura e escrita no cache
+CACHE_LOOKUP = STAGE_SECONDS.labels("cache_lookup")
+CACHE_STORE = STAGE_SECONDS.labels("cache_store")
+
+# Backend configurado em CACHE_BACKEND: memória local (padrão) ou Redis
+_backend: Optional[CacheBackend] = None
+
+
+def get_cache_backend() -> CacheBackend:
+    """Obter instância única do backend de cache"""
+    global _backend
+    if _backend is None:
+        _backend = create_cache_backend()
+    return _backend
+
+
+def set_cache_backend(backend: CacheBackend) -> None:
+    """Substituir o backend de cache (ex.: testes e benchmarks)"""
+    global _backend
+    _backend = backend
 
 
 async def get_cached_data(key: str) -> Optional[Any]:
     """Buscar dado do cache"""
+    started = time.perf_counter()
     try:
-        # TODO: Implementar Redis em produção
-        # redis_client = get_redis_client()
-        # data = await redis_client.get(key)
-        
-        # Por enquanto, usar cache em memória
-        if key in _memory_cache:
+        data = await get_cache_backend().get(key)
+        CACHE_LOOKUP.observe_since(started)
+        if data is not None:
             logger.info(f"✅ Cache hit: {key}")
-            return _memory_cache[key]
         
-        return None
+        return data
         
     except Exception as e:
         logger.error(f"❌ Erro ao buscar cache: {str(e)}")
         return None
 
 
+async def get_many_cached_data(keys: List[str]) -> Dict[str, Any]:
+    """Buscar várias chaves de uma vez (uma ida ao Redis)"""
+    started = time.perf_counter()
+    try:
+        found = await get_cache_backend().get_many(keys)
+        CACHE_LOOKUP.observe_since(started)
+        return found
+        
+    except Exception as e:
+        logger.error(f"❌ Erro ao buscar cache: {str(e)}")
+        return {}
+
+
 async def set_cached_data(key: str, data: Any, ttl: int = 3600) -> bool:
     """Salvar dado no cache"""
+    started = time.perf_counter()
     try:
-        # TODO: Implementar Redis em produção
-        # redis_client = get_redis_client()
-        # await redis_client.setex(key, ttl, json.dumps(data))
+        stored = await get_cache_backend().set(key, data, ttl)
+        CACHE_STORE.observe_since(started)
+        if not stored:
+            logger.warning(f"⚠️ Valor grande demais para o cache: {key}")
+            return False
         
-        # Por enquanto, usar cache em memória
-        _memory_cache[key] = data
         logger.info(f"✅ Cache set: {key} (TTL: {ttl}s)")
         return True
         
@@ -47,23 +84,104 @@ async def set_cached_data(key: str, data: Any, ttl: int = 3600) -> bool:
         return False
 
 
-async def clear_cache(pattern: str = "*") -> bool:
-    """Limpar cache"""
+async def set_many_cached_data(items: Dict[str, Any], ttl: int = 3600) -> bool:
+    """Salvar várias chaves de uma vez (pipeline no Redis)"""
+    started = time.perf_counter()
     try:
-        # TODO: Implementar Redis em produção
+        stored = await get_cache_backend().set_many(items, ttl)
+        CACHE_STORE.observe_since(started)
+        return stored
         
-        # Por enquanto, limpar cache em memória
-        if pattern == "*":
-            _memory_cache.clear()
-        else:
-            keys_to_delete = [k for k in _memory_cache.keys() if pattern in k]
-            for key in keys_to_delete:
-                del _memory_cache[key]
+    except Exception as e:
+        logger.error(f"❌ Erro ao salvar cache: {str(e)}")
+        return False
+
+
+async def clear_cache(pattern: str = "*") -> bool:
+    """Limpar cache (pattern no formato glob, ex.: "satellite:*")"""
+    try:
+        removed = await get_cache_backend().clear(pattern)
         
-        logger.info(f"✅ Cache limpo: {pattern}")
+        logger.info(f"✅ Cache limpo: {pattern} ({removed} chaves)")
         return True
         
     except Exception as e:
         logger.error(f"❌ Erro ao limpar cache: {str(e)}")
         return False
 
+
+# Stale-while-revalidate: após o TTL "soft" a entrada ainda é servida (stale)
+# enquanto uma única atualização roda em segundo plano; após o TTL "hard" ela
+# some do backend. A trava de atualização vale entre workers (via add/SET NX).
+REFRESH_LOCK_TTL = 120
+_refreshing: Dict[str, asyncio.Task] = {}
+
+
+async def get_cached_entry(key: str) -> Tuple[Optional[Any], Optional[str]]:
+    """
+    Buscar entrada salva com set_cached_entry
+    
+    Retorna (dado, estado) com estado "fresh" ou "stale"; (None, None) se
+    ausente.
+    """
+    envelope = await get_cached_data(key)
+    
+    if not isinstance(envelope, dict) or "softExpiresAt" not in envelope:
+        return None, None
+    
+    state = "fresh" if time.time() < envelope["softExpiresAt"] else "stale"
+    return envelope["value"], state
+
+
+async def set_cached_entry(key: str, data: Any, soft_ttl: int, hard_ttl: int) -> bool:
+    """Salvar dado com TTL soft (frescor) e hard (remoção)"""
+    envelope = {"value": data, "softExpiresAt": time.time() + soft_ttl}
+    return await set_cached_data(key, envelope, ttl=max(soft_ttl, hard_ttl))
+
+
+def schedule_refresh(key: str, refresh: Callable[[], Awaitable[Any]]) -> bool:
+    """
+    Agendar a atualização em segundo plano de uma entrada stale
+    
+    refresh() deve buscar o dado e salvá-lo com set_cached_entry. Só uma
+    atualização por chave roda de cada vez. Retorna False se já havia uma.
+    """
+    if key in _refreshing:
+        return False
+    
+    async def run():
+        lock_key = f"lock:refresh:{key}"
+        try:
+            if not await get_cache_backend().add(lock_key, 1, REFRESH_LOCK_TTL):
+                return
+            try:
+                logger.info(f"🔄 Atualizando em segundo plano: {key}")
+                await refresh()
+            finally:
+                await get_cache_backend().delete(lock_key)
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar cache: {str(e)}")
+        finally:
+            _refreshing.pop(key, None)
+    
+    _refreshing[key] = asyncio.create_task(run())
+    return True
+
+
+def get_cache_stats() -> Dict:
+    """Contadores de hit, miss, evicção e bytes do cache"""
+    return get_cache_backend().stats()
+
+
+async def refresh_cache_stats() -> None:
+    """Atualizar os contadores lidos do servidor (antes do health check e da coleta)"""
+    try:
+        await get_cache_backend().refresh_stats()
+    except Exception as e:
+        logger.error(f"❌ Erro ao ler estatísticas do cache: {str(e)}")
+
+
+async def close_cache() -> None:
+    """Fechar conexões do backend (shutdown da aplicação)"""
+    if _backend is not None:
+        await _backend.close()
@@ -0,0 +1,261 @@
+"""
+Backends de cache: memória local (por worker) e Redis (compartilhado)
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from app.utils import serialization
+from app.utils.memory_cache import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Interface comum aos backends de cache"""
+
+    name = "base"
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Buscar várias chaves; chaves ausentes ficam fora do resultado"""
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: int) -> bool:
+        raise NotImplementedError
+
+    async def set_many(self, items: Dict[str, Any], ttl: int) -> bool:
+        raise NotImplementedError
+
+    async def add(self, key: str, value: Any, ttl: int) -> bool:
+        """Salvar só se a chave não existir (usado como trava entre workers)"""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def clear(self, pattern: str = "*") -> int:
+        """Remover chaves que casam com o padrão glob; retorna quantas"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """
+        Contadores com as mesmas chaves em todos os backends: backend,
+        entries, bytes, maxBytes, hits, misses, evictions, expirations
+        (None quando o backend não sabe informar)
+        """
+        raise NotImplementedError
+
+    async def refresh_stats(self) -> None:
+        """Atualizar contadores que dependem de uma consulta ao servidor"""
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Cache local ao processo (padrão em desenvolvimento e nos testes)
+
+    A serialização roda no event loop: a estrutura em JSON é pequena e os
+    arrays entram como buffers brutos. Só a compressão e a descompressão
+    (valores acima de compress_threshold) vão para uma thread, onde o zlib
+    libera o GIL; mandar valores pequenos para thread custaria mais do que
+    serializá-los.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int, compress_threshold: int):
+        self.cache = MemoryCache(max_bytes=max_bytes, compress_threshold=compress_threshold)
+
+    async def get(self, key: str) -> Optional[Any]:
+        data = self.cache.get_bytes(key)
+        if data is None:
+            return None
+        if serialization.is_compressed(data):
+            return await asyncio.to_thread(serialization.decode, data)
+        return serialization.decode(data)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found = {}
+        for key in keys:
+            data = self.cache.get_bytes(key)
+            if data is not None:
+                found[key] = data
+        if any(serialization.is_compressed(data) for data in found.values()):
+            return await asyncio.to_thread(
+                lambda: {key: serialization.decode(data) for key, data in found.items()}
+            )
+        return {key: serialization.decode(data) for key, data in found.items()}
+
+    async def _encode(self, value: Any) -> bytes:
+        data = serialization.encode(value, compress_min_bytes=0)
+        threshold = self.cache.compress_threshold
+        if threshold and len(data) >= threshold:
+            data = await asyncio.to_thread(serialization.compress, data)
+        return data
+
+    async def set(self, key: str, value: Any, ttl: int) -> bool:
+        return self.cache.set_bytes(key, await self._encode(value), ttl)
+
+    async def set_many(self, items: Dict[str, Any], ttl: int) -> bool:
+        return all([
+            self.cache.set_bytes(key, await self._encode(value), ttl)
+            for key, value in items.items()
+        ])
+
+    async def add(self, key: str, value: Any, ttl: int) -> bool:
+        return self.cache.add_bytes(key, await self._encode(value), ttl)
+
+    async def delete(self, key: str) -> bool:
+        return self.cache.delete(key)
+
+    async def clear(self, pattern: str = "*") -> int:
+        return self.cache.clear(pattern)
+
+    def stats(self) -> Dict:
+        return {"backend": self.name, **self.cache.stats()}
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cache compartilhado entre workers via protocolo Redis
+
+    Usa um pool de conexões assíncrono, MGET para leituras múltiplas e
+    pipelines para escritas múltiplas. Todas as chaves recebem o prefixo
+    key_prefix para não colidir com outros usuários do mesmo servidor.
+    """
+
+    name = "redis"
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, max_connections: int = 32,
+                 key_prefix: str = "solaris:"):
+        # Dependência opcional: só é necessária com CACHE_BACKEND=redis
+        import redis.asyncio as aioredis
+
+        self.key_prefix = key_prefix
+        self.pool = aioredis.ConnectionPool(
+            host=host,
+            port=port,
+            db=db,
+            password=password or None,
+            max_connections=max_connections
+        )
+        self.client = aioredis.Redis(connection_pool=self.pool)
+        self.hits = 0
+        self.misses = 0
+        # Última leitura de DBSIZE/INFO (refresh_stats); valem para o banco inteiro
+        self._server = {"entries": None, "bytes": None, "maxBytes": None,
+                        "evictions": None, "expirations": None}
+
+    async def get(self, key: str) -> Optional[Any]:
+        data = await self.client.get(self.key_prefix + key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return serialization.decode(data)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+
+        values = await self.client.mget([self.key_prefix + key for key in keys])
+        found = {}
+        for key, data in zip(keys, values):
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                found[key] = serialization.decode(data)
+        return found
+
+    async def set(self, key: str, value: Any, ttl: int) -> bool:
+        return bool(await self.client.set(self.key_prefix + key, serialization.encode(value), ex=ttl))
+
+    async def set_many(self, items: Dict[str, Any], ttl: int) -> bool:
+        if not items:
+            return True
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self.key_prefix + key, serialization.encode(value), ex=ttl)
+            results = await pipe.execute()
+        return all(results)
+
+    async def add(self, key: str, value: Any, ttl: int) -> bool:
+        return bool(await self.client.set(self.key_prefix + key, serialization.encode(value), ex=ttl, nx=True))
+
+    async def delete(self, key: str) -> bool:
+        return bool(await self.client.unlink(self.key_prefix + key))
+
+    async def clear(self, pattern: str = "*") -> int:
+        removed = 0
+        batch = []
+
+        async for key in self.client.scan_iter(match=self.key_prefix + pattern, count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                removed += await self.client.unlink(*batch)
+                batch = []
+
+        if batch:
+            removed += await self.client.unlink(*batch)
+        return removed
+
+    async def refresh_stats(self) -> None:
+        self._server["entries"] = await self.client.dbsize()
+        try:
+            info = {**await self.client.info("memory"), **await self.client.info("stats")}
+        except Exception:
+            # Servidores compatíveis sem INFO (ex.: fakeredis): só DBSIZE
+            return
+        self._server.update({
+            "bytes": info.get("used_memory"),
+            "maxBytes": info.get("maxmemory") or None,
+            "evictions": info.get("evicted_keys"),
+            "expirations": info.get("expired_keys")
+        })
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.name,
+            "entries": self._server["entries"],
+            "bytes": self._server["bytes"],
+            "maxBytes": self._server["maxBytes"],
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._server["evictions"],
+            "expirations": self._server["expirations"]
+        }
+
+    async def close(self) -> None:
+        await self.client.aclose()
+        await self.pool.disconnect()
+
+
+def create_cache_backend() -> CacheBackend:
+    """Criar o backend configurado em CACHE_BACKEND (memory ou redis)"""
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+
+    if backend == "redis":
+        logger.info("🗄️ Cache: Redis")
+        return RedisBackend(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", "6379")),
+            db=int(os.getenv("REDIS_DB", "0")),
+            password=os.getenv("REDIS_PASSWORD"),
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "32")),
+            key_prefix=os.getenv("REDIS_KEY_PREFIX", "solaris:")
+        )
+
+    logger.info("🗄️ Cache: memória local")
+    return MemoryBackend(
+        max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+        compress_threshold=int(os.getenv("CACHE_COMPRESS_THRESHOLD", str(64 * 1024)))
+    )
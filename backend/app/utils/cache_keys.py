@@ -0,0 +1,57 @@
+"""
+Chaves de cache canônicas (impressão digital da requisição)
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+# Casas decimais mantidas nas coordenadas (4 casas ~ 11 m no equador)
+CACHE_COORD_PRECISION = int(os.getenv("CACHE_COORD_PRECISION", "4"))
+
+# Tamanho do digest (caracteres hexadecimais) usado nas chaves
+FINGERPRINT_LENGTH = 32
+
+
+def quantize(value: float, precision: int = CACHE_COORD_PRECISION) -> float:
+    """Arredondar coordenada para a precisão do cache (sem -0.0)"""
+    return round(float(value), precision) + 0.0
+
+
+def canonical_geometry(coords: Optional[Dict] = None,
+                       bounds: Optional[Dict] = None,
+                       radius: Optional[float] = None,
+                       precision: int = CACHE_COORD_PRECISION) -> Dict:
+    """
+    Representação canônica da geometria
+
+    radius já deve estar resolvido (padrão e limite aplicados) e só é
+    considerado para círculos.
+    """
+    if coords:
+        return {
+            "type": "circle",
+            "lat": quantize(coords['lat'], precision),
+            "lng": quantize(coords['lng'], precision),
+            "radius": round(float(radius), 1)
+        }
+    if bounds:
+        return {
+            "type": "rectangle",
+            "north": quantize(bounds['north'], precision),
+            "south": quantize(bounds['south'], precision),
+            "east": quantize(bounds['east'], precision),
+            "west": quantize(bounds['west'], precision)
+        }
+    raise ValueError("Forneça coords ou bounds")
+
+
+def fingerprint(payload: Any) -> str:
+    """Digest de tamanho fixo de um payload canônico (JSON ordenado)"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def make_cache_key(namespace: str, digest: str) -> str:
+    """Montar chave no formato namespace:digest"""
+    return f"{namespace}:{digest}"
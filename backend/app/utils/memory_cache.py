@@ -0,0 +1,206 @@
+"""
+Cache em memória com LRU, TTL e orçamento de bytes
+"""
+import fnmatch
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils import serialization
+
+# Custo fixo estimado por entrada (chave, nó do OrderedDict, metadados)
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value: bytes, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class MemoryCache:
+    """
+    Cache LRU limitado por bytes
+
+    - TTL por entrada, verificado na leitura e expurgado via heap na escrita
+    - Quando o total estimado passa de max_bytes, as entradas menos
+      recentemente usadas são descartadas
+    - Todo valor é guardado serializado (app.utils.serialization) e
+      reconstruído a cada leitura, como no Redis: quem lê recebe sempre uma
+      cópia, nunca um objeto compartilhado com outros leitores. Valores
+      serializados com mais de compress_threshold bytes são comprimidos;
+      0 desativa a compressão. get_bytes/set_bytes/add_bytes trabalham com o
+      valor já serializado, para quem quer (de)serializar fora do lock ou
+      fora do event loop
+    - Escrita e remoção são O(1); clear(pattern) percorre as chaves, o que é
+      aceitável por ser raro (invalidação manual)
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024,
+                 compress_threshold: int = 64 * 1024):
+        self.max_bytes = max_bytes
+        self.compress_threshold = compress_threshold
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Buscar valor (None se ausente ou expirado)"""
+        data = self.get_bytes(key)
+        return None if data is None else serialization.decode(data)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Valor serializado (None se ausente ou expirado)"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def encode(self, value: Any) -> bytes:
+        """Serializar fora do lock (TypeError se o valor não for serializável)"""
+        return serialization.encode(value, compress_min_bytes=self.compress_threshold)
+
+    def _set_locked(self, key: str, data: bytes, ttl: int) -> bool:
+        """Inserir o valor já serializado (chamado com self._lock adquirido)"""
+        size = len(data) + ENTRY_OVERHEAD_BYTES + len(key)
+        if size > self.max_bytes:
+            return False
+
+        now = time.monotonic()
+        expires_at = now + ttl
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = _Entry(data, size, expires_at)
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        self.current_bytes += size
+
+        self._purge_expired(now)
+        self._evict_to_budget()
+        return True
+
+    def set(self, key: str, value: Any, ttl: int) -> bool:
+        """Salvar valor; retorna False se ele sozinho excede o orçamento"""
+        return self.set_bytes(key, self.encode(value), ttl)
+
+    def set_bytes(self, key: str, data: bytes, ttl: int) -> bool:
+        """Salvar valor já serializado com encode()"""
+        with self._lock:
+            return self._set_locked(key, data, ttl)
+
+    def add(self, key: str, value: Any, ttl: int) -> bool:
+        """
+        Salvar só se a chave não existir (ou estiver expirada)
+
+        Verificação e inserção sob o mesmo lock: entre threads concorrentes
+        só uma vence (usado como trava por schedule_refresh).
+        """
+        return self.add_bytes(key, self.encode(value), ttl)
+
+    def add_bytes(self, key: str, data: bytes, ttl: int) -> bool:
+        """add() com o valor já serializado com encode()"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                return False
+            return self._set_locked(key, data, ttl)
+
+    def delete(self, key: str) -> bool:
+        """Remover uma chave"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self, pattern: str = "*") -> int:
+        """
+        Remover chaves que casam com o padrão glob (ex.: "satellite:*")
+
+        Retorna o número de chaves removidas.
+        """
+        with self._lock:
+            if pattern == "*":
+                removed = len(self._entries)
+                self._entries.clear()
+                self._expiry_heap.clear()
+                self.current_bytes = 0
+                return removed
+
+            prefix = _literal_prefix(pattern)
+            keys = [k for k in self._entries
+                    if k.startswith(prefix) and fnmatch.fnmatchcase(k, pattern)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self) -> Dict:
+        """Contadores do cache"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+        # A entrada correspondente no heap é descartada de forma preguiçosa
+
+    def _purge_expired(self, now: float) -> None:
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                self.expirations += 1
+
+        # Evitar que entradas obsoletas acumulem no heap
+        if len(heap) > 2 * len(self._entries) + 64:
+            self._expiry_heap = [(e.expires_at, k) for k, e in self._entries.items()]
+            heapq.heapify(self._expiry_heap)
+
+    def _evict_to_budget(self) -> None:
+        while self.current_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Parte do padrão glob antes do primeiro curinga"""
+    for i, char in enumerate(pattern):
+        if char in "*?[":
+            return pattern[:i]
+    return pattern
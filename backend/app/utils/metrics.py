@@ -0,0 +1,301 @@
+"""
+Métricas no formato de exposição do Prometheus (texto 0.0.4)
+
+Contadores e histogramas baratos o bastante para ficar ligados em produção:
+cada série (combinação de rótulos) é criada uma vez e depois só tem seus
+campos incrementados, sem lock e sem alocar nada por chamada. Sob o GIL
+uma atualização concorrente rara pode se perder, o que é aceitável para
+métricas. Quem mede sempre no mesmo estágio guarda a série em uma
+constante do módulo (ex.: STAGE_SECONDS.labels("cache_lookup")).
+
+Valores que já existem em outro lugar (contadores do cache, fila do
+executor GEE) não são duplicados: entram como callbacks lidos só na coleta.
+"""
+import bisect
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Liga o middleware de latência e o endpoint /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Limites (segundos) dos histogramas de latência de requisição e de estágio
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Tamanhos de arquivo exportado: 1 KB a 1 GB em potências de 4
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(11))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class CounterSeries:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class HistogramSeries:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # Uma posição por limite e a última para +Inf (não acumuladas)
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def observe_since(self, started: float) -> None:
+        """Observar o tempo desde started (time.perf_counter())"""
+        self.observe(time.perf_counter() - started)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Série dos rótulos (criada na primeira vez, sob lock)"""
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: esperados os rótulos {self.labelnames}")
+            with self._lock:
+                series = self._series.setdefault(values, self._new_series())
+        return series
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+
+class Counter(_Metric):
+    """Contador monotônico (sufixo _total no nome)"""
+
+    kind = "counter"
+
+    def _new_series(self):
+        return CounterSeries()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(series.value)}"
+            for values, series in list(self._series.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histograma com limites fixos (buckets acumulados só na coleta)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_series(self):
+        return HistogramSeries(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        names = self.labelnames + ("le",)
+        for values, series in list(self._series.items()):
+            counts = list(series.counts)
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, values + (_format_value(bound),))} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """
+    Valor lido de outro componente na coleta (gauge ou counter)
+
+    fn retorna um número, None (série omitida) ou {valores dos rótulos: número}.
+    """
+
+    def __init__(self, name: str, documentation: str, fn: Callable, kind: str = "gauge",
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def _samples(self) -> List[str]:
+        value = self.fn()
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(v)}"
+            for values, v in value.items() if v is not None
+        ]
+
+
+class MetricsRegistry:
+    """Conjunto de métricas expostas em /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Registrar (idempotente por nome: reimportações recebem a mesma métrica)"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, fn: Callable, kind: str = "gauge",
+                 labelnames: Sequence[str] = ()) -> CallbackMetric:
+        """Registrar (ou substituir) uma métrica lida na coleta"""
+        metric = CallbackMetric(name, documentation, fn, kind, labelnames)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Todas as métricas no formato de texto do Prometheus"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton
+_registry = MetricsRegistry()
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Obter o registro único de métricas do processo"""
+    return _registry
+
+
+# Métricas instrumentadas no código da aplicação
+REQUEST_SECONDS = _registry.histogram(
+    "solaris_http_request_duration_seconds",
+    "Latência das requisições HTTP por rota (até o último byte da resposta)",
+    ("method", "route", "status")
+)
+STAGE_SECONDS = _registry.histogram(
+    "solaris_stage_duration_seconds",
+    "Tempo por estágio do pipeline (cache, conversão, serialização)",
+    ("stage",), STAGE_BUCKETS
+)
+GEE_CALL_SECONDS = _registry.histogram(
+    "solaris_gee_call_duration_seconds",
+    "Chamadas ao GEE por dataset e variável (_count é o número de chamadas)",
+    ("dataset", "variable"), STAGE_BUCKETS
+)
+GEE_ERRORS = _registry.counter(
+    "solaris_gee_errors_total",
+    "Chamadas ao GEE que falharam (inclusive as respondidas com dados mockados)",
+    ("dataset", "variable")
+)
+EXPORT_BYTES = _registry.histogram(
+    "solaris_export_size_bytes",
+    "Tamanho dos arquivos exportados por formato",
+    ("format",), SIZE_BUCKETS
+)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede a latência de cada requisição por rota
+
+    A rota é o template do path (ex.: /api/solaris/jobs/{job_id}), não o
+    path em si, para não criar uma série por ID; paths sem rota caem em
+    "unmatched". O tempo vai até o último bloco enviado, então respostas em
+    streaming (exportações) contam inteiras.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Optional[Dict] = None
+
+    def _route_path(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._routes is None:
+            self._routes = {
+                getattr(route, "endpoint", None): route.path
+                for route in getattr(scope.get("app"), "routes", [])
+            }
+        return self._routes.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # O roteador grava o endpoint no mesmo scope
+            REQUEST_SECONDS.labels(
+                scope["method"], self._route_path(scope), str(status)
+            ).observe_since(started)
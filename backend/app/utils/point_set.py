@@ -0,0 +1,260 @@
+"""
+Conjunto de pontos amostrados em formato colunar (struct-of-arrays)
+"""
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+# Casas decimais dos valores na saída JSON (float32 tem ~7 dígitos significativos)
+VALUE_DECIMALS = 4
+
+
+class PointSet:
+    """
+    Pontos amostrados com arrays NumPy contíguos
+
+    - lat, lon: float64, um elemento por ponto
+    - values: variável -> float32 (NaN quando o ponto não tem a variável)
+    - meta: metadados livres (unidade, fonte, etc.)
+
+    É montado uma vez na fronteira com o GEE e consumido diretamente por
+    vulnerabilidade, exportação e estatísticas. GeoJSON só é gerado na borda
+    da API (to_feature_collection).
+    """
+
+    __slots__ = ("lat", "lon", "values", "meta")
+
+    def __init__(self, lat, lon, values: Optional[Dict[str, Any]] = None,
+                 meta: Optional[Dict] = None):
+        self.lat = np.ascontiguousarray(lat, dtype=np.float64)
+        self.lon = np.ascontiguousarray(lon, dtype=np.float64)
+        self.values = {
+            variable: np.ascontiguousarray(column, dtype=np.float32)
+            for variable, column in (values or {}).items()
+        }
+        self.meta = dict(meta or {})
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def __repr__(self) -> str:
+        return f"PointSet({len(self)} pontos, variáveis={self.variables})"
+
+    @property
+    def variables(self) -> List[str]:
+        return list(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos arrays"""
+        return self.lat.nbytes + self.lon.nbytes + sum(v.nbytes for v in self.values.values())
+
+    @classmethod
+    def empty(cls, variables: Iterable[str] = (), meta: Optional[Dict] = None) -> "PointSet":
+        return cls(np.empty(0), np.empty(0), {v: np.empty(0) for v in variables}, meta)
+
+    @classmethod
+    def from_feature_collection(cls, collection: Dict, variables: Optional[List[str]] = None,
+                                meta: Optional[Dict] = None) -> "PointSet":
+        """Montar a partir de uma FeatureCollection de pontos (resposta do GEE)"""
+        features = (collection or {}).get("features", [])
+        n = len(features)
+
+        if variables is None:
+            variables = list(dict.fromkeys(
+                key for feature in features for key in (feature.get("properties") or {})
+            ))
+
+        lat = np.empty(n, dtype=np.float64)
+        lon = np.empty(n, dtype=np.float64)
+        columns = {variable: np.full(n, np.nan, dtype=np.float32) for variable in variables}
+
+        for i, feature in enumerate(features):
+            lon[i], lat[i] = feature["geometry"]["coordinates"][:2]
+            properties = feature.get("properties") or {}
+            for variable, column in columns.items():
+                value = properties.get(variable)
+                if value is not None:
+                    column[i] = value
+
+        return cls(lat, lon, columns, meta)
+
+    @classmethod
+    def from_points(cls, points: List[Dict], variable: str,
+                    meta: Optional[Dict] = None) -> "PointSet":
+        """Montar a partir de uma lista [{'lat', 'lon', 'value'}] (formato do cliente)"""
+        n = len(points)
+        lat = np.fromiter((p.get('lat', np.nan) for p in points), dtype=np.float64, count=n)
+        lon = np.fromiter((p.get('lon', p.get('lng', np.nan)) for p in points), dtype=np.float64, count=n)
+        values = np.fromiter(
+            (np.nan if p.get('value') is None else p['value'] for p in points),
+            dtype=np.float32, count=n
+        )
+        return cls(lat, lon, {variable: values}, meta)
+
+    @classmethod
+    def concat(cls, sets: List["PointSet"], meta: Optional[Dict] = None) -> "PointSet":
+        """Concatenar conjuntos (variáveis ausentes em um conjunto viram NaN)"""
+        sets = [s for s in sets if s is not None]
+        if not sets:
+            return cls.empty(meta=meta)
+
+        variables = list(dict.fromkeys(v for s in sets for v in s.values))
+        values = {
+            variable: np.concatenate([
+                s.values[variable] if variable in s.values else np.full(len(s), np.nan, dtype=np.float32)
+                for s in sets
+            ])
+            for variable in variables
+        }
+        return cls(
+            np.concatenate([s.lat for s in sets]),
+            np.concatenate([s.lon for s in sets]),
+            values,
+            sets[0].meta if meta is None else meta
+        )
+
+    def select(self, variables: List[str]) -> "PointSet":
+        """Subconjunto de variáveis (compartilha os arrays, sem cópia)"""
+        selected = PointSet.__new__(PointSet)
+        selected.lat = self.lat
+        selected.lon = self.lon
+        selected.values = {v: self.values[v] for v in variables if v in self.values}
+        selected.meta = dict(self.meta)
+        return selected
+
+    def filter(self, mask: np.ndarray) -> "PointSet":
+        """Manter só os pontos onde mask é True"""
+        return PointSet(
+            self.lat[mask],
+            self.lon[mask],
+            {v: column[mask] for v, column in self.values.items()},
+            self.meta
+        )
+
+    def within_radius(self, lat: float, lng: float, radius_m: float) -> np.ndarray:
+        """Máscara dos pontos a até radius_m metros de (lat, lng) (haversine)"""
+        phi1 = math.radians(lat)
+        phi2 = np.radians(self.lat)
+        d_phi = phi2 - phi1
+        d_lambda = np.radians(self.lon - lng)
+        a = np.sin(d_phi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a)) <= radius_m
+
+    def within_bounds(self, bounds: Dict) -> np.ndarray:
+        """Máscara dos pontos dentro de {north, south, east, west}"""
+        return (
+            (self.lat >= bounds['south']) & (self.lat <= bounds['north'])
+            & (self.lon >= bounds['west']) & (self.lon <= bounds['east'])
+        )
+
+    def column(self, variable: Optional[str] = None) -> np.ndarray:
+        """Valores de uma variável (ou da única variável do conjunto)"""
+        if variable is not None and variable not in self.values:
+            # Aceitar 'lst' para 'LST' (chaves usadas pelo cliente)
+            for name in self.values:
+                if name.lower() == variable.lower():
+                    return self.values[name]
+        if variable is None or variable not in self.values:
+            if len(self.values) == 1:
+                return next(iter(self.values.values()))
+            if variable is None:
+                raise ValueError("Informe a variável: o conjunto tem várias")
+            return np.full(len(self), np.nan, dtype=np.float32)
+        return self.values[variable]
+
+    def to_feature_collection(self) -> Dict:
+        """GeoJSON FeatureCollection (só na borda da API)"""
+        lat = self.lat.tolist()
+        lon = self.lon.tolist()
+        columns = {v: _column_to_list(c) for v, c in self.values.items()}
+
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [lon[i], lat[i]]},
+                    "properties": {v: column[i] for v, column in columns.items()}
+                }
+                for i in range(len(lat))
+            ]
+        }
+
+    def to_columns(self) -> Dict:
+        """Formato colunar compacto para JSON"""
+        return {
+            "lat": self.lat.tolist(),
+            "lon": self.lon.tolist(),
+            "values": {v: _column_to_list(c) for v, c in self.values.items()}
+        }
+
+    def to_points(self, variable: Optional[str] = None) -> List[Dict]:
+        """Lista [{'lat', 'lon', 'value'}] (formato antigo do cliente)"""
+        values = _column_to_list(self.column(variable))
+        return [
+            {'lat': lat, 'lon': lon, 'value': value}
+            for lat, lon, value in zip(self.lat.tolist(), self.lon.tolist(), values)
+        ]
+
+
+def _column_to_list(column: np.ndarray) -> List[Optional[float]]:
+    """Coluna float32 -> lista JSON (arredondada, NaN vira None)"""
+    values = np.round(column.astype(np.float64), VALUE_DECIMALS).tolist()
+    # NaN não é JSON válido
+    return [None if v != v else v for v in values]
+
+
+def as_point_set(data: Any, variable: str) -> Optional[PointSet]:
+    """
+    Normalizar os formatos aceitos para PointSet
+
+    Aceita PointSet, lista [{'lat', 'lon', 'value'}], resultado do gee_client
+    ({'points': PointSet} ou {'features': FeatureCollection}) ou
+    FeatureCollection. Retorna None se o formato não for reconhecido.
+    """
+    if isinstance(data, PointSet):
+        return data
+    if isinstance(data, list):
+        return PointSet.from_points(data, variable)
+    if isinstance(data, dict):
+        if isinstance(data.get("points"), PointSet):
+            return data["points"]
+        if data.get("type") == "FeatureCollection":
+            return PointSet.from_feature_collection(data)
+        if isinstance(data.get("features"), dict):
+            return PointSet.from_feature_collection(data["features"])
+    return None
+
+
+def results_to_json(results: Dict, fmt: str = "geojson") -> Dict:
+    """
+    Converter resultados do gee_client (com PointSet) para a resposta da API
+
+    fmt="geojson" gera "features" (FeatureCollection); fmt="columns" gera
+    "columns" ({lat, lon, values}), bem mais compacto.
+    """
+    response = {}
+    for variable, data in results.items():
+        item = {key: value for key, value in data.items() if key != "points"}
+        points = data.get("points")
+        if isinstance(points, PointSet):
+            if fmt == "columns":
+                item["columns"] = points.to_columns()
+            else:
+                item["features"] = points.to_feature_collection()
+        response[variable] = item
+    return response
+
+
+def values_of(data: Any, variable: Optional[str] = None) -> np.ndarray:
+    """Valores de uma variável como array, qualquer que seja o formato de entrada"""
+    if isinstance(data, np.ndarray):
+        return data
+    points = as_point_set(data, variable or "value")
+    if points is None:
+        return np.asarray(data, dtype=np.float64)
+    return points.column(variable if variable in points.values else None)
@@ -0,0 +1,88 @@
+"""
+Codificação de grades regulares (PNG colorido e GeoTIFF float32)
+"""
+import io
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from PIL import Image, TiffImagePlugin, TiffTags
+
+# Rampa de cores do PNG (mesmas cores da escala de LST do cliente, frio -> quente)
+HEAT_RAMP = ("#0000FF", "#00BFFF", "#00FF00", "#FFFF00", "#FFA500", "#FF4500", "#FF0000")
+
+# Tags GeoTIFF
+MODEL_PIXEL_SCALE_TAG = 33550
+MODEL_TIEPOINT_TAG = 33922
+GEO_KEY_DIRECTORY_TAG = 34735
+GDAL_NODATA_TAG = 42113
+
+
+def color_lut(ramp: Sequence[str] = HEAT_RAMP, size: int = 256) -> np.ndarray:
+    """Tabela (size, 3) uint8 interpolando linearmente as cores da rampa"""
+    stops = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in ramp], dtype=np.float64)
+    positions = np.linspace(0, 1, len(stops))
+    samples = np.linspace(0, 1, size)
+    return np.stack(
+        [np.interp(samples, positions, stops[:, channel]) for channel in range(3)],
+        axis=1
+    ).round().astype(np.uint8)
+
+
+def encode_png(grid: np.ndarray, vmin: Optional[float] = None, vmax: Optional[float] = None,
+               ramp: Sequence[str] = HEAT_RAMP) -> bytes:
+    """
+    PNG RGBA da grade (linha 0 = norte)
+
+    Valores mapeados linearmente de vmin..vmax (padrão: extremos da grade)
+    na rampa de cores; células NaN ficam transparentes.
+    """
+    valid = ~np.isnan(grid)
+    if vmin is None:
+        vmin = float(np.nanmin(grid)) if valid.any() else 0.0
+    if vmax is None:
+        vmax = float(np.nanmax(grid)) if valid.any() else 1.0
+    span = (vmax - vmin) or 1.0
+
+    lut = color_lut(ramp)
+    scaled = np.clip((np.nan_to_num(grid, nan=vmin) - vmin) / span, 0, 1)
+    index = (scaled * (len(lut) - 1)).round().astype(np.intp)
+
+    rgba = np.empty(grid.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = lut[index]
+    rgba[..., 3] = np.where(valid, 255, 0)
+
+    output = io.BytesIO()
+    # Compressão rápida: o PNG é gerado por requisição
+    Image.fromarray(rgba, "RGBA").save(output, format="PNG", compress_level=1)
+    return output.getvalue()
+
+
+def encode_geotiff(grid: np.ndarray, bounds: Dict) -> bytes:
+    """
+    GeoTIFF float32 da grade em EPSG:4326 (linha 0 = norte, NaN = nodata)
+
+    bounds {north, south, east, west} são as bordas externas da grade.
+    """
+    height, width = grid.shape
+    pixel_x = (bounds['east'] - bounds['west']) / width
+    pixel_y = (bounds['north'] - bounds['south']) / height
+
+    tags = TiffImagePlugin.ImageFileDirectory_v2()
+    tags[MODEL_PIXEL_SCALE_TAG] = (pixel_x, pixel_y, 0.0)
+    tags.tagtype[MODEL_PIXEL_SCALE_TAG] = TiffTags.DOUBLE
+    tags[MODEL_TIEPOINT_TAG] = (0.0, 0.0, 0.0, bounds['west'], bounds['north'], 0.0)
+    tags.tagtype[MODEL_TIEPOINT_TAG] = TiffTags.DOUBLE
+    tags[GEO_KEY_DIRECTORY_TAG] = (
+        1, 1, 0, 3,
+        1024, 0, 1, 2,     # GTModelType: geográfico
+        1025, 0, 1, 1,     # GTRasterType: PixelIsArea
+        2048, 0, 1, 4326   # GeographicType: WGS 84
+    )
+    tags.tagtype[GEO_KEY_DIRECTORY_TAG] = TiffTags.SHORT
+    tags[GDAL_NODATA_TAG] = "nan"
+    tags.tagtype[GDAL_NODATA_TAG] = TiffTags.ASCII
+
+    output = io.BytesIO()
+    image = Image.fromarray(np.ascontiguousarray(grid, dtype=np.float32), "F")
+    image.save(output, format="TIFF", tiffinfo=tags, compression="tiff_adobe_deflate")
+    return output.getvalue()
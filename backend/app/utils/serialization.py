@@ -0,0 +1,113 @@
+"""
+Serialização binária compacta para valores do cache compartilhado
+"""
+import json
+import struct
+import zlib
+from typing import Any, List
+
+import numpy as np
+
+from app.utils.point_set import PointSet
+
+# Cabeçalho: magic (2 bytes) + versão (1 byte) + flags (1 byte)
+MAGIC = b"SL"
+VERSION = 2
+FLAG_COMPRESSED = 0x01
+
+# Payloads menores que isso não compensam a compressão
+COMPRESS_MIN_BYTES = 1024
+
+
+def encode(value: Any, compress_min_bytes: int = COMPRESS_MIN_BYTES) -> bytes:
+    """
+    Serializar valor
+
+    Corpo: tamanho da estrutura (uint32) + estrutura em JSON compacto +
+    buffers brutos dos arrays NumPy / PointSet referenciados pela estrutura.
+    Comprimido com zlib se for grande.
+    """
+    buffers: List[bytes] = []
+    offset = [0]
+
+    def add_array(array: np.ndarray) -> dict:
+        array = np.ascontiguousarray(array)
+        ref = {
+            "__ndarray__": offset[0],
+            "dtype": array.dtype.str,
+            "shape": list(array.shape)
+        }
+        buffers.append(array.tobytes())
+        offset[0] += array.nbytes
+        return ref
+
+    def default(obj):
+        if isinstance(obj, PointSet):
+            return {
+                "__pointset__": {
+                    "lat": add_array(obj.lat),
+                    "lon": add_array(obj.lon),
+                    "values": {v: add_array(c) for v, c in obj.values.items()},
+                    "meta": obj.meta
+                }
+            }
+        if isinstance(obj, np.ndarray):
+            return add_array(obj)
+        if isinstance(obj, np.generic):
+            return obj.item()
+        raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+    structure = json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=default).encode('utf-8')
+    body = struct.pack("<I", len(structure)) + structure + b"".join(buffers)
+    flags = 0
+
+    if compress_min_bytes and len(body) >= compress_min_bytes:
+        body = zlib.compress(body, 6)
+        flags |= FLAG_COMPRESSED
+
+    return MAGIC + bytes((VERSION, flags)) + body
+
+
+def compress(data: bytes) -> bytes:
+    """Comprimir um valor gerado por encode() sem compressão"""
+    if data[3] & FLAG_COMPRESSED:
+        return data
+    return data[:3] + bytes((data[3] | FLAG_COMPRESSED,)) + zlib.compress(data[4:], 6)
+
+
+def is_compressed(data: bytes) -> bool:
+    """Se o valor gerado por encode() foi comprimido (decode mais caro)"""
+    return bool(data[3] & FLAG_COMPRESSED)
+
+
+def decode(data: bytes) -> Any:
+    """Desserializar valor gerado por encode()"""
+    if data[:2] != MAGIC:
+        raise ValueError("Formato de cache desconhecido")
+    if data[2] != VERSION:
+        raise ValueError(f"Versão de cache não suportada: {data[2]}")
+
+    body = data[4:]
+    if data[3] & FLAG_COMPRESSED:
+        body = zlib.decompress(body)
+
+    (structure_len,) = struct.unpack_from("<I", body)
+    structure = body[4:4 + structure_len]
+    buffer = memoryview(body)[4 + structure_len:]
+
+    def read_array(ref: dict) -> np.ndarray:
+        dtype = np.dtype(ref["dtype"])
+        count = int(np.prod(ref["shape"])) if ref["shape"] else 1
+        start = ref["__ndarray__"]
+        array = np.frombuffer(buffer, dtype=dtype, count=count, offset=start)
+        return array.reshape(ref["shape"])
+
+    def object_hook(obj: dict):
+        if "__ndarray__" in obj:
+            return read_array(obj)
+        if "__pointset__" in obj:
+            spec = obj["__pointset__"]
+            return PointSet(spec["lat"], spec["lon"], spec["values"], spec["meta"])
+        return obj
+
+    return json.loads(structure, object_hook=object_hook)
@@ -0,0 +1,78 @@
+"""
+Coalescência de requisições idênticas em andamento (single-flight)
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class SingleFlight:
+    """
+    Deduplicação de trabalho em andamento por chave
+
+    O primeiro chamador de uma chave executa o trabalho; chamadores
+    concorrentes com a mesma chave aguardam o mesmo future em vez de repetir
+    a busca. `coalesced` conta quantas execuções foram economizadas.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Executar fn() uma única vez por chave em andamento"""
+        future = self.claim(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.fail(key, e)
+            raise
+
+        self.resolve(key, result)
+        return result
+
+    def claim(self, key: str) -> Optional[asyncio.Future]:
+        """
+        Reservar uma chave
+
+        Retorna None se o chamador passou a ser o responsável (e então deve
+        chamar resolve() ou fail()), ou o future a aguardar se outra busca
+        da mesma chave já está em andamento.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return future
+
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        return None
+
+    def resolve(self, key: str, result: Any) -> None:
+        """Entregar o resultado aos que aguardam a chave"""
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def fail(self, key: str, error: BaseException) -> None:
+        """Propagar a falha aos que aguardam a chave"""
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            if isinstance(error, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(error)
+                # Evitar o aviso "exception was never retrieved" sem seguidores
+                future.exception()
+
+    def stats(self) -> Dict:
+        """Contadores de coalescência"""
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
@@ -16,8 +16,8 @@ def validate_coordinates(lat: float, lng: float):
     return True
 
 
-def validate_date_range(start_date: str, end_date: str):
-    """Validar range de datas"""
+def validate_date_range(start_date: str, end_date: str, max_days: int = 365):
+    """Validar range de datas (até max_days dias)"""
     try:
         start = datetime.strptime(start_date, '%Y-%m-%d')
         end = datetime.strptime(end_date, '%Y-%m-%d')
@@ -25,8 +25,12 @@ def validate_date_range(start_date: str, end_date: str):
         if start > end:
             raise HTTPException(status_code=400, detail="Data inicial não pode ser posterior à data final")
         
-        if (end - start).days > 365:
-            raise HTTPException(status_code=400, detail="Período máximo de 1 ano")
+        if (end - start).days > max_days:
+            years = max(1, round(max_days / 365))
+            raise HTTPException(
+                status_code=400,
+                detail="Período máximo de 1 ano" if years == 1 else f"Período máximo de {years} anos"
+            )
         
         return True
         
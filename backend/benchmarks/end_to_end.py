@@ -0,0 +1,361 @@
+"""
+SOLARIS - Benchmark ponta a ponta: busca, previsão e exportação
+
+Roda contra a aplicação ASGI no próprio processo (httpx + ASGITransport),
+com um substituto do GEE no lugar da rede:
+
+- mock (padrão): campos sintéticos determinísticos (GEE_MOCK_MODE), com
+  latência opcional por chamada (--gee-latency-ms) simulando o GEE;
+- replay: respostas gravadas com GEE_REPLAY_MODE=record (--replay-store).
+
+Mede:
+- fetchData: vazão e latência p50/p95/p99 com cache frio, quente e misto;
+- calculate_vulnerability e predict_heat_islands (projeção e série) com
+  número crescente de pontos;
+- export_to_csv, export_to_json e export_to_pdf: tempo e pico de memória
+  (tracemalloc) em 1k, 100k e 1M pontos.
+
+O resultado sai em JSON para comparar execuções ao longo do tempo.
+
+Uso (a partir de backend/):
+    python -m benchmarks.end_to_end --output e2e.json
+    python -m benchmarks.end_to_end --quick
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+SECTIONS = ["fetch", "predict", "export"]
+EXPORTERS = ["csv", "json", "pdf"]
+
+FETCH_PATH = "/api/solaris/fetchData"
+VARIABLES = ["LST", "NDVI", "NDBI", "NDWI", "POP_DENS"]
+# Chave de cada variável nos dados de /predict e das exportações
+DATA_KEYS = {"LST": "lst", "NDVI": "ndvi", "NDBI": "ndbi", "NDWI": "ndwi", "POP_DENS": "popDens"}
+
+
+def configure_gee(mode: str, fetch_points: int, replay_store: str = None) -> None:
+    """Configurar o substituto do GEE (antes de importar a aplicação)"""
+    os.environ["MOCK_POINTS"] = str(fetch_points)
+    if mode == "replay":
+        os.environ["GEE_REPLAY_MODE"] = "replay"
+        if replay_store:
+            os.environ["GEE_REPLAY_STORE"] = replay_store
+    else:
+        os.environ["GEE_MOCK_MODE"] = "true"
+
+
+def add_gee_latency(latency_ms: float) -> None:
+    """
+    Latência fixa por chamada ao GEE
+
+    Dorme na thread do executor, como uma chamada getInfo bloqueante.
+    """
+    from app.services import gee_client
+
+    def delayed(fn):
+        def wrapper(*args, **kwargs):
+            time.sleep(latency_ms / 1000)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    gee_client._fetch_satellite_data = delayed(gee_client._fetch_satellite_data)
+    gee_client._fetch_landsat_indices_data = delayed(gee_client._fetch_landsat_indices_data)
+
+
+def percentiles(samples_ms: list) -> dict:
+    if not samples_ms:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    values = np.asarray(samples_ms)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "mean": round(float(values.mean()), 2),
+        "max": round(float(values.max()), 2)
+    }
+
+
+def fetch_params(index: int, radius: float) -> dict:
+    """
+    Requisição de fetchData número index
+
+    Centros espaçados de 0.5° (mais que o tile): índices diferentes nunca
+    compartilham tiles, então cada índice novo é uma busca fria de verdade.
+    """
+    row, col = divmod(index, 40)
+    return {
+        "coords": {"lat": -30.0 + 0.5 * row, "lng": -60.0 + 0.5 * col},
+        "radius": radius,
+        "variable": VARIABLES[:3],
+        "startDate": "2024-01-01",
+        "endDate": "2024-03-31"
+    }
+
+
+async def run_fetch(requests: int, concurrency: int, radius: float, warm_set: int,
+                    hit_ratio: float) -> list:
+    """fetchData com cache frio, quente e misto"""
+    import httpx
+
+    from app.main import app
+    from app.utils.cache import clear_cache
+
+    rng = np.random.default_rng(0)
+    next_cold = iter(range(warm_set, 10 ** 9))
+
+    async def phase(state: str, indices: list, client) -> dict:
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, statuses, sources = [], {}, {}
+
+        async def one(index):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(FETCH_PATH, json=fetch_params(index, radius))
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            # Latência só das respostas completas (503 e 202 voltam na hora)
+            if response.status_code == 200:
+                latencies.append(elapsed_ms)
+                source = response.json().get("source")
+                sources[source] = sources.get(source, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one(index) for index in indices])
+        elapsed = time.perf_counter() - started
+        return {
+            "state": state,
+            "requests": len(indices),
+            "concurrency": concurrency,
+            "throughputRps": round(len(latencies) / elapsed, 2),
+            "latencyMs": percentiles(latencies),
+            "statuses": {str(k): v for k, v in sorted(statuses.items())},
+            "sources": sources
+        }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        results = []
+
+        # Frio: cache vazio e toda requisição em uma área nova
+        await clear_cache("*")
+        results.append(await phase("cold", [next(next_cold) for _ in range(requests)], client))
+
+        # Quente: o mesmo conjunto de áreas, já no cache
+        await clear_cache("*")
+        warm = list(range(warm_set))
+        for index in warm:
+            await client.post(FETCH_PATH, json=fetch_params(index, radius))
+        results.append(await phase("warm", [warm[i % warm_set] for i in range(requests)], client))
+
+        # Misto: hit_ratio das requisições em áreas quentes, o resto em áreas novas
+        indices = [
+            int(rng.integers(warm_set)) if rng.random() < hit_ratio else next(next_cold)
+            for _ in range(requests)
+        ]
+        mixed = await phase("mixed", indices, client)
+        mixed["hitRatio"] = hit_ratio
+        results.append(mixed)
+
+    return results
+
+
+def make_data(points: int, seed: int = 0) -> dict:
+    """Dados no formato de fetchData (PointSet por variável), do campo sintético"""
+    from app.services.synthetic import generate_field, synthetic_region
+    from app.utils.point_set import PointSet
+
+    region = synthetic_region(bounds={"north": -15.6, "south": -15.9, "east": -47.8, "west": -48.1},
+                              start_date="2024-01-01", end_date="2024-03-31")
+    region["seed"] = f"{region['seed']}:{seed}"
+    field = generate_field(region, VARIABLES, points)
+    return {
+        DATA_KEYS[variable]: PointSet(field.lat, field.lon, {variable: field.column(variable)})
+        for variable in VARIABLES
+    }
+
+
+def make_series(observations: int, months: int = 120, seed: int = 0) -> dict:
+    """Série mensal (data x célula) com cerca de observations valores por variável"""
+    rng = np.random.default_rng(seed)
+    cells = max(1, observations // months)
+    t = np.arange(months)[:, None] / 12
+    season = np.cos(2 * np.pi * t)
+    base = rng.uniform(28, 40, cells)
+    dates = [f"{2014 + m // 12}-{m % 12 + 1:02d}-15" for m in range(months)]
+    return {
+        "dates": dates,
+        "LST": (base + 0.05 * t + 3 * season + rng.normal(0, 0.8, (months, cells))).tolist(),
+        "NDVI": (0.5 - 0.002 * t + 0.1 * season + rng.normal(0, 0.03, (months, cells))).tolist()
+    }
+
+
+def timed(fn, repeat: int) -> float:
+    """Mediana de repeat execuções (ms)"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(float(np.median(samples)), 2)
+
+
+def run_predict(point_counts: list, repeat: int) -> list:
+    """Vulnerabilidade e previsão com número crescente de pontos"""
+    from app.services.ai_model import calculate_vulnerability, predict_heat_islands
+    from app.utils.cache import clear_cache
+
+    results = []
+    for points in point_counts:
+        data = make_data(points)
+        series = {"series": make_series(points)}
+
+        def forecast():
+            # Sem cache: os coeficientes seriam reaproveitados entre repetições
+            asyncio.run(clear_cache("forecast:*"))
+            asyncio.run(predict_heat_islands(series, years=5))
+
+        results.append({
+            "points": points,
+            "vulnerabilityMs": timed(lambda: calculate_vulnerability(data), repeat),
+            "predictMs": timed(lambda: asyncio.run(predict_heat_islands(data, years=5)), repeat),
+            "forecastMs": timed(forecast, repeat),
+            "forecastCells": len(series["series"]["LST"][0])
+        })
+    return results
+
+
+def run_export(point_counts: list) -> list:
+    """
+    Tempo e pico de memória das exportações
+
+    O tracemalloc deixa as alocações bem mais lentas: o tempo vem de uma
+    execução sem ele e o pico de memória de outra, com ele.
+    """
+    from app.services.export_service import export_to_csv, export_to_json, export_to_pdf
+
+    exporters = {"csv": export_to_csv, "json": export_to_json, "pdf": export_to_pdf}
+    results = []
+    for points in point_counts:
+        data = make_data(points)
+        for name in EXPORTERS:
+            started = time.perf_counter()
+            content = exporters[name](data, f"bench.{name}")
+            elapsed = time.perf_counter() - started
+            del content
+
+            tracemalloc.start()
+            content = exporters[name](data, f"bench.{name}")
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append({
+                "format": name,
+                "points": points,
+                "bytes": len(content),
+                "exportMs": round(elapsed * 1000, 2),
+                "peakMemoryMb": round(peak / 2 ** 20, 2)
+            })
+            del content
+    return results
+
+
+def environment(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    from app.utils.cache import get_cache_stats
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "cache": get_cache_stats().get("backend"),
+        "gee": args.gee,
+        "geeLatencyMs": args.gee_latency_ms,
+        "fetchPoints": args.fetch_points
+    }
+
+
+def parse_counts(value: str) -> list:
+    return [int(float(v)) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", default=",".join(SECTIONS), help="Seções: fetch,predict,export")
+    parser.add_argument("--gee", choices=["mock", "replay"], default="mock")
+    parser.add_argument("--replay-store", help="SQLite gravado (modo replay)")
+    parser.add_argument("--gee-latency-ms", type=float, default=0.0)
+    parser.add_argument("--fetch-points", type=int, default=500, help="Pontos por variável em cada busca")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--radius", type=float, default=2000)
+    parser.add_argument("--warm-set", type=int, default=20, help="Áreas distintas no cache quente")
+    parser.add_argument("--hit-ratio", type=float, default=0.8, help="Fração de hits no cenário misto")
+    parser.add_argument("--predict-points", default="1000,10000,100000,1000000")
+    parser.add_argument("--export-points", default="1000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="Tamanhos reduzidos (verificação rápida)")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.requests = min(args.requests, 40)
+        args.predict_points = "1000,10000"
+        args.export_points = "1000,10000"
+        args.repeat = 1
+
+    configure_gee(args.gee, args.fetch_points, args.replay_store)
+    if args.gee_latency_ms:
+        add_gee_latency(args.gee_latency_ms)
+
+    sections = [s for s in args.sections.split(",") if s]
+    report = {"benchmark": "end_to_end", "environment": environment(args), "results": {}}
+
+    if "fetch" in sections:
+        results = asyncio.run(run_fetch(
+            args.requests, args.concurrency, args.radius, args.warm_set, args.hit_ratio
+        ))
+        report["results"]["fetch"] = results
+        for result in results:
+            latency = result["latencyMs"]
+            print(f"fetch {result['state']:5s} {result['throughputRps']:>9.1f} req/s "
+                  f"p50={latency['p50']:>8.2f}ms p95={latency['p95']:>8.2f}ms "
+                  f"p99={latency['p99']:>8.2f}ms status={result['statuses']}")
+
+    if "predict" in sections:
+        results = run_predict(parse_counts(args.predict_points), args.repeat)
+        report["results"]["predict"] = results
+        for result in results:
+            print(f"predict points={result['points']:>9d} vulnerability={result['vulnerabilityMs']:>9.2f}ms "
+                  f"predict={result['predictMs']:>9.2f}ms forecast={result['forecastMs']:>9.2f}ms "
+                  f"({result['forecastCells']} células)")
+
+    if "export" in sections:
+        results = run_export(parse_counts(args.export_points))
+        report["results"]["export"] = results
+        for result in results:
+            print(f"export {result['format']:4s} points={result['points']:>9d} bytes={result['bytes']:>11d} "
+                  f"time={result['exportMs']:>9.2f}ms peak={result['peakMemoryMb']:>8.2f}MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+SOLARIS - Benchmark dos formatos de exportação (tamanho e tempo de carga)
+
+Gera a mesma exportação em CSV, JSON, Parquet, GeoParquet e Arrow IPC e
+mede tamanho do arquivo, tempo de geração e tempo de carga em um
+DataFrame pandas (como fazem os analistas).
+
+Uso (a partir de backend/):
+    python -m benchmarks.export_formats --points 1000000
+"""
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+
+FORMATS = ["csv", "json", "parquet", "geoparquet", "arrow"]
+
+
+def make_data(points: int, seed: int = 0):
+    """Grade regular com valores suaves, como as amostras do GEE"""
+    from app.utils.point_set import PointSet
+
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(points)))
+    lat, lon = np.meshgrid(np.linspace(-15.9, -15.6, side), np.linspace(-48.1, -47.8, side))
+    lat = lat.ravel()[:points]
+    lon = lon.ravel()[:points]
+    lst = 35 + 5 * np.sin(lat * 40) * np.cos(lon * 40) + rng.normal(0, 0.5, points)
+    return {"lst": PointSet(lat, lon, {"LST": lst})}
+
+
+def export(data, export_format: str) -> bytes:
+    from app.services.export_service import iter_columnar, iter_csv, iter_json
+
+    if export_format == "csv":
+        return "".join(iter_csv(data)).encode("utf-8")
+    if export_format == "json":
+        return "".join(iter_json(data)).encode("utf-8")
+    return b"".join(iter_columnar(data, export_format))
+
+
+def load(content: bytes, export_format: str):
+    import pandas as pd
+
+    if export_format == "csv":
+        return pd.read_csv(io.BytesIO(content))
+    if export_format == "json":
+        rows = json.loads(content)["lst"]
+        return pd.DataFrame(rows)
+    if export_format == "arrow":
+        import pyarrow as pa
+        return pa.ipc.open_stream(content).read_all().to_pandas()
+    return pd.read_parquet(io.BytesIO(content))
+
+
+def run(points: int) -> list:
+    data = make_data(points)
+    results = []
+
+    for export_format in FORMATS:
+        start = time.perf_counter()
+        content = export(data, export_format)
+        export_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        frame = load(content, export_format)
+        load_time = time.perf_counter() - start
+
+        results.append({
+            "format": export_format,
+            "points": points,
+            "rows": len(frame),
+            "bytes": len(content),
+            "exportMs": round(export_time * 1000, 2),
+            "loadMs": round(load_time * 1000, 2)
+        })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    results = run(args.points)
+    csv_result = results[0]
+    for result in results:
+        print(f"{result['format']:11s} bytes={result['bytes']:>11d} "
+              f"({csv_result['bytes'] / result['bytes']:>5.1f}x menor que CSV) "
+              f"export={result['exportMs']:>9.2f}ms load={result['loadMs']:>9.2f}ms "
+              f"({csv_result['loadMs'] / result['loadMs']:>5.1f}x mais rápido)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "export_formats", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+SOLARIS - Benchmark das exportações CSV/JSON (streaming x buffer completo)
+
+Mede tempo até o primeiro byte, tempo total e pico de RSS para exportações
+grandes. Cada caso roda em um subprocesso para que o pico de RSS de um não
+contamine o outro.
+
+Uso (a partir de backend/):
+    python -m benchmarks.export_streaming --points 1000000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+CASES = ["csv-stream", "csv-buffered", "json-stream", "json-buffered"]
+
+
+def _max_rss_mb() -> float:
+    # Linux: ru_maxrss em KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_data(points: int, seed: int = 0):
+    """Dados sintéticos no formato interno (PointSet por variável)"""
+    from app.utils.point_set import PointSet
+
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(-15.9, -15.6, points)
+    lon = rng.uniform(-48.1, -47.8, points)
+    return {"lst": PointSet(lat, lon, {"LST": rng.uniform(25, 45, points)})}
+
+
+def run_case(case: str, points: int) -> dict:
+    """Executar um caso no processo atual"""
+    from app.services.export_service import iter_csv, iter_json
+
+    data = make_data(points)
+    rss_before = _max_rss_mb()
+    generator = iter_csv if case.startswith("csv") else iter_json
+
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+
+    if case.endswith("stream"):
+        # Simula o envio pela rede: cada bloco é descartado após "enviado"
+        for chunk in generator(data):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk.encode("utf-8"))
+    else:
+        content = "".join(generator(data)).encode("utf-8")
+        first_byte = time.perf_counter() - start
+        size = len(content)
+
+    total = time.perf_counter() - start
+
+    return {
+        "case": case,
+        "points": points,
+        "bytes": size,
+        "ttfbMs": round(first_byte * 1000, 2),
+        "totalMs": round(total * 1000, 2),
+        "peakRssDeltaMb": round(_max_rss_mb() - rss_before, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--case", choices=CASES, help="Rodar um único caso (uso interno)")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.points)))
+        return
+
+    results = []
+    for case in CASES:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.export_streaming", "--case", case, "--points", str(args.points)],
+            check=True, capture_output=True, text=True
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{case:14s} ttfb={result['ttfbMs']:>9.2f}ms total={result['totalMs']:>9.2f}ms "
+              f"peakRss+={result['peakRssDeltaMb']:>7.1f}MB bytes={result['bytes']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "export_streaming", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
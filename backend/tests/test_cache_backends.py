@@ -0,0 +1,165 @@
+"""
+Mesma suíte para os dois backends de cache: memória local e Redis (simulado
+pelo fakeredis, sem servidor). Rodar de backend/: python -m pytest
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.utils.cache_backends import MemoryBackend, RedisBackend
+from app.utils.point_set import PointSet
+
+STATS_KEYS = {"backend", "entries", "bytes", "maxBytes", "hits", "misses", "evictions", "expirations"}
+
+
+def memory_backend():
+    return MemoryBackend(max_bytes=16 * 1024 * 1024, compress_threshold=1024)
+
+
+def redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = RedisBackend(key_prefix="test:")
+    backend.client = fakeredis.aioredis.FakeRedis()
+    return backend
+
+
+@pytest.fixture(params=[memory_backend, redis_backend], ids=["memory", "redis"])
+def make_backend(request):
+    return request.param
+
+
+def run(make_backend, check):
+    """Executar check(backend) em um único event loop (o cliente Redis fica preso a ele)"""
+    async def main():
+        backend = make_backend()
+        try:
+            await check(backend)
+        finally:
+            await backend.close()
+    asyncio.run(main())
+
+
+def test_set_and_get_roundtrip(make_backend):
+    async def check(backend):
+        value = {"a": 1, "b": [1.5, None, "x"], "nested": {"ok": True}}
+        assert await backend.set("k", value, 60)
+        assert (await backend.get("k")) == value
+
+    run(make_backend, check)
+
+
+def test_get_missing_returns_none(make_backend):
+    async def check(backend):
+        assert (await backend.get("ausente")) is None
+
+    run(make_backend, check)
+
+
+def test_numpy_and_point_set_roundtrip(make_backend):
+    async def check(backend):
+        points = PointSet([1.0, 2.0], [3.0, 4.0], {"LST": [30.5, np.nan]}, {"unit": "°C"})
+        grid = np.arange(12, dtype=np.float32).reshape(3, 4)
+        assert await backend.set("arrays", {"points": points, "grid": grid}, 60)
+
+        cached = await backend.get("arrays")
+        np.testing.assert_array_equal(cached["grid"], grid)
+        assert cached["grid"].dtype == np.float32
+        np.testing.assert_array_equal(cached["points"].lat, points.lat)
+        np.testing.assert_array_equal(cached["points"].values["LST"], points.values["LST"])
+        assert cached["points"].meta == {"unit": "°C"}
+
+    run(make_backend, check)
+
+
+def test_large_value_is_compressed_transparently(make_backend):
+    async def check(backend):
+        value = {"values": list(range(5000))}
+        assert await backend.set("big", value, 60)
+        assert (await backend.get("big")) == value
+
+    run(make_backend, check)
+
+
+def test_returned_value_is_a_copy(make_backend):
+    async def check(backend):
+        await backend.set("k", {"items": [1, 2]}, 60)
+        (await backend.get("k"))["items"].append(3)
+        assert (await backend.get("k")) == {"items": [1, 2]}
+
+    run(make_backend, check)
+
+
+def test_get_many_skips_missing_keys(make_backend):
+    async def check(backend):
+        assert await backend.set_many({"a": 1, "b": 2}, 60)
+        assert (await backend.get_many(["a", "b", "c"])) == {"a": 1, "b": 2}
+        assert (await backend.get_many([])) == {}
+
+    run(make_backend, check)
+
+
+def test_add_only_when_absent(make_backend):
+    async def check(backend):
+        assert await backend.add("lock", 1, 60)
+        assert not await backend.add("lock", 2, 60)
+        assert (await backend.get("lock")) == 1
+
+        await backend.delete("lock")
+        assert await backend.add("lock", 3, 60)
+
+    run(make_backend, check)
+
+
+def test_concurrent_add_has_one_winner(make_backend):
+    async def check(backend):
+        won = await asyncio.gather(*[backend.add("lease", i, 60) for i in range(20)])
+        assert sum(won) == 1
+
+    run(make_backend, check)
+
+
+def test_delete(make_backend):
+    async def check(backend):
+        await backend.set("k", 1, 60)
+        assert await backend.delete("k")
+        assert (await backend.get("k")) is None
+        assert not await backend.delete("k")
+
+    run(make_backend, check)
+
+
+def test_clear_by_pattern(make_backend):
+    async def check(backend):
+        await backend.set_many({"satellite:1": 1, "satellite:2": 2, "tile:1": 3}, 60)
+        assert (await backend.clear("satellite:*")) == 2
+        assert (await backend.get_many(["satellite:1", "satellite:2", "tile:1"])) == {"tile:1": 3}
+        assert (await backend.clear()) == 1
+
+    run(make_backend, check)
+
+
+def test_expired_entry_is_gone(make_backend):
+    async def check(backend):
+        await backend.set("k", 1, 1)
+        await asyncio.sleep(1.1)
+        assert (await backend.get("k")) is None
+
+    run(make_backend, check)
+
+
+def test_stats_have_the_same_keys(make_backend):
+    async def check(backend):
+        await backend.set("k", 1, 60)
+        await backend.get("k")
+        await backend.get("ausente")
+        await backend.refresh_stats()
+
+        stats = backend.stats()
+        assert set(stats) == STATS_KEYS
+        assert stats["backend"] == backend.name
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    run(make_backend, check)
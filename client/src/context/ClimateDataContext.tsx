@@ -46,6 +46,8 @@ export const ClimateDataProvider: React.FC<{ children: React.ReactNode }> = ({ c
   const [climateData, setClimateData] = useState<ClimateData | null>(null);
   const [regionStats, setRegionStats] = useState<RegionStats | null>(null);
   const [isLoading, setIsLoading] = useState(false);
+  // ID do último resultado de fetchData no servidor (exportação sem reenviar os dados)
+  const [resultId, setResultId] = useState<string | null>(null);
 
   const fetchClimateData = useCallback(async (
     lat: number,
@@ -89,6 +91,7 @@ export const ClimateDataProvider: React.FC<{ children: React.ReactNode }> = ({ c
     // 🗑️ LIMPAR DADOS ANTERIORES ANTES DE NOVA ANÁLISE
     setClimateData(null);
     setRegionStats(null);
+    setResultId(null);
     
     setIsLoading(true);
     
@@ -138,7 +141,21 @@ export const ClimateDataProvider: React.FC<{ children: React.ReactNode }> = ({ c
       console.log('📡 Enviando para backend:', payload);
       
       // Chamar API FastAPI
-      const response = await axios.post('http://localhost:8000/api/solaris/fetchData', payload);
+      let response = await axios.post('http://localhost:8000/api/solaris/fetchData', payload);
+      
+      // Áreas grandes viram job (202): aguardar por long-poll e ler o resultado
+      if (response.status === 202 && response.data?.jobId) {
+        const jobUrl = `http://localhost:8000/api/solaris/jobs/${response.data.jobId}`;
+        toast.info('⏳ Área grande: processando em segundo plano...');
+        let job = response.data.job;
+        while (job.status !== 'done' && job.status !== 'failed') {
+          job = (await axios.get(jobUrl, { params: { wait: 20 } })).data;
+        }
+        if (job.status === 'failed') {
+          throw new Error(job.error || 'Falha no processamento');
+        }
+        response = await axios.get(`${jobUrl}/result`);
+      }
       
       console.log('✅ Resposta recebida:', response.data);
       
@@ -181,6 +198,7 @@ export const ClimateDataProvider: React.FC<{ children: React.ReactNode }> = ({ c
         
         setClimateData(processedData);
         setRegionStats(stats);
+        setResultId(response.data.resultId || null);
         
         // Verificar se dados são mockados
         const isMock = Object.values(geeData).some((v: any) => v.mock);
@@ -195,7 +213,7 @@ export const ClimateDataProvider: React.FC<{ children: React.ReactNode }> = ({ c
       }
     } catch (error: any) {
       console.error('❌ Erro ao buscar dados:', error);
-      toast.error(error.response?.data?.detail || 'Erro ao buscar dados do satélite');
+      toast.error(error.response?.data?.detail || error.message || 'Erro ao buscar dados do satélite');
     } finally {
       setIsLoading(false);
     }
@@ -232,8 +250,9 @@ export const ClimateDataProvider: React.FC<{ children: React.ReactNode }> = ({ c
       console.log(`📥 Iniciando download no formato: ${format}`);
       
       // Fazer requisição para o backend com responseType 'blob' para todos os formatos
+      // Com resultId o servidor exporta o resultado que já tem guardado
       const response = await axios.post('http://localhost:8000/api/solaris/export', {
-        data: climateData,
+        ...(resultId ? { resultId } : { data: climateData }),
         format,
         filename: `${filename}.${format}`
       }, {
@@ -263,11 +282,12 @@ export const ClimateDataProvider: React.FC<{ children: React.ReactNode }> = ({ c
       console.error('❌ Erro ao fazer download:', error);
       toast.error(error.response?.data?.detail || 'Erro ao fazer download dos dados');
     }
-  }, [climateData]);
+  }, [climateData, resultId]);
 
   const clearData = useCallback(() => {
     setClimateData(null);
     setRegionStats(null);
+    setResultId(null);
   }, []);
 
   const value: ClimateDataContextType = {
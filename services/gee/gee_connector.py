@@ -45,7 +45,7 @@ class GEEConnector:
             Lista de pontos com lat, lon, value
         """
         if not self.initialized:
-            return self._generate_mock_data(bounds, "LST")
+            return self._generate_mock_data(bounds, "LST", start_date, end_date)
         
         try:
             # Definir região de interesse
@@ -93,12 +93,12 @@ class GEEConnector:
             
         except Exception as e:
             logger.error(f"❌ Erro ao buscar LST: {str(e)}")
-            return self._generate_mock_data(bounds, "LST")
+            return self._generate_mock_data(bounds, "LST", start_date, end_date)
     
     async def get_ndvi_data(self, bounds: Dict, start_date: str, end_date: str) -> List[Dict]:
         """Buscar dados de NDVI"""
         if not self.initialized:
-            return self._generate_mock_data(bounds, "NDVI")
+            return self._generate_mock_data(bounds, "NDVI", start_date, end_date)
         
         try:
             roi = ee.Geometry.Rectangle([
@@ -146,12 +146,12 @@ class GEEConnector:
             
         except Exception as e:
             logger.error(f"❌ Erro ao buscar NDVI: {str(e)}")
-            return self._generate_mock_data(bounds, "NDVI")
+            return self._generate_mock_data(bounds, "NDVI", start_date, end_date)
     
     async def get_ndbi_data(self, bounds: Dict, start_date: str, end_date: str) -> List[Dict]:
         """Buscar dados de NDBI (Normalized Difference Built-up Index)"""
         if not self.initialized:
-            return self._generate_mock_data(bounds, "NDBI")
+            return self._generate_mock_data(bounds, "NDBI", start_date, end_date)
         
         try:
             roi = ee.Geometry.Rectangle([
@@ -198,12 +198,12 @@ class GEEConnector:
             
         except Exception as e:
             logger.error(f"❌ Erro ao buscar NDBI: {str(e)}")
-            return self._generate_mock_data(bounds, "NDBI")
+            return self._generate_mock_data(bounds, "NDBI", start_date, end_date)
     
     async def get_ndwi_data(self, bounds: Dict, start_date: str, end_date: str) -> List[Dict]:
         """Buscar dados de NDWI (Normalized Difference Water Index)"""
         if not self.initialized:
-            return self._generate_mock_data(bounds, "NDWI")
+            return self._generate_mock_data(bounds, "NDWI", start_date, end_date)
         
         try:
             roi = ee.Geometry.Rectangle([
@@ -251,37 +251,30 @@ class GEEConnector:
             
         except Exception as e:
             logger.error(f"❌ Erro ao buscar NDWI: {str(e)}")
-            return self._generate_mock_data(bounds, "NDWI")
+            return self._generate_mock_data(bounds, "NDWI", start_date, end_date)
     
-    def _generate_mock_data(self, bounds: Dict, variable: str) -> List[Dict]:
-        """Gerar dados mock para desenvolvimento"""
-        import random
-        
-        data = []
-        num_points = 50
+    def _generate_mock_data(self, bounds: Dict, variable: str,
+                            start_date: Optional[str] = None,
+                            end_date: Optional[str] = None) -> List[Dict]:
+        """
+        Gerar dados mock para desenvolvimento
         
-        # Definir ranges por variável
-        ranges = {
-            "LST": (20, 45),
-            "NDVI": (0, 1),
-            "NDBI": (-0.2, 0.8),
-            "NDWI": (-0.5, 0.5),
-            "POP_DENS": (0, 10000),
-            "NIGHT_LIGHTS": (0, 100)
-        }
+        Usa o campo sintético determinístico do backend
+        (app.services.synthetic, requer backend/ no PYTHONPATH): a mesma
+        área e janela geram sempre os mesmos pontos, com os mesmos valores
+        que o backend produz em modo mock.
+        """
+        from app.services.synthetic import MOCK_POINTS, generate_field, synthetic_region
         
-        min_val, max_val = ranges.get(variable, (0, 100))
+        region = synthetic_region(bounds=bounds, start_date=start_date, end_date=end_date)
+        points = generate_field(region, [variable], MOCK_POINTS, stream=variable)
         
-        for _ in range(num_points):
-            lat = bounds['south'] + random.random() * (bounds['north'] - bounds['south'])
-            lon = bounds['west'] + random.random() * (bounds['east'] - bounds['west'])
-            value = min_val + random.random() * (max_val - min_val)
-            
-            data.append({
-                'lat': round(lat, 6),
-                'lon': round(lon, 6),
-                'value': round(value, 2)
-            })
+        data = [
+            {'lat': round(lat, 6), 'lon': round(lon, 6), 'value': round(value, 2)}
+            for lat, lon, value in zip(
+                points.lat.tolist(), points.lon.tolist(), points.column(variable).tolist()
+            )
+        ]
         
         logger.info(f"⚠️  Usando dados mock para {variable}: {len(data)} pontos")
         return data